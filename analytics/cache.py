@@ -0,0 +1,130 @@
+"""
+Cache de respostas do blueprint de analytics.
+
+Chave: (endpoint, escopo do papel, brokerId, startDate, endDate, demais args).
+Cada entrada guarda a "geração" do dono que ela cobre; escritas em clients/
+interactions chamam `invalidate_owner`, que incrementa a geração do dono e a
+geração global (usada pelas visões de MANAGER/ADMIN sem brokerId). TTL é o
+backstop para escritas feitas por outros workers/processos.
+
+Resposta lida da réplica (utils/replica.py) só entra no cache se a última
+medição do atraso, feita depois da última invalidação do dono, deu zero: com
+a réplica atrasada o resultado pode ser de antes da escrita e ficaria guardado
+sob a geração nova pelo TTL inteiro.
+"""
+
+import threading
+import time
+from functools import wraps
+
+from cachetools import TTLCache
+from flask import Response, current_app, g, request
+
+from utils import replica
+
+_ALL = "*"
+
+_lock = threading.Lock()
+_cache: TTLCache | None = None
+_generations: dict = {}
+_invalidated_at: dict = {}  # dono -> monotonic da última invalidação
+_stats = {"hits": 0, "misses": 0, "stale": 0, "stores": 0, "invalidations": 0, "replicaSkips": 0}
+
+
+def _store() -> TTLCache | None:
+    global _cache
+    ttl = int(current_app.config.get("ANALYTICS_CACHE_TTL", 60))
+    if ttl <= 0:
+        return None
+    if _cache is None or _cache.ttl != ttl:
+        _cache = TTLCache(maxsize=int(current_app.config.get("ANALYTICS_CACHE_MAXSIZE", 1024)), ttl=ttl)
+    return _cache
+
+
+def _scope():
+    """(escopo do papel, dono coberto) da requisição atual."""
+    j = getattr(g, "jwt", {})
+    if j.get("role") == "BROKER":
+        sub = str(j.get("sub"))
+        return f"BROKER:{sub}", sub
+    broker_id = request.args.get("brokerId")
+    return "TEAM", (str(broker_id) if broker_id else _ALL)
+
+
+def _generation(owner: str) -> int:
+    return _generations.get(owner, 0)
+
+
+def _replica_caught_up(owner: str) -> bool:
+    """A requisição leu do primário, ou da réplica já em dia com a última escrita do dono."""
+    monitor = replica.get_monitor()
+    if monitor is None or not g.get("_db_replica"):
+        return True
+    invalidated = _invalidated_at.get(owner)
+    checked = monitor.checked_at
+    return monitor.lag == 0 and checked is not None and (invalidated is None or checked > invalidated)
+
+
+def cached(fn):
+    """Decorator para rotas de analytics (aplicar depois de @supabase_required)."""
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        store = _store()
+        if store is None:
+            return fn(*args, **kwargs)
+
+        scope, owner = _scope()
+        extra = tuple(sorted(
+            (k, v) for k, v in request.args.items(multi=True)
+            if k not in ("brokerId", "startDate", "endDate")
+        ))
+        key = (
+            request.endpoint,
+            scope,
+            request.args.get("brokerId"),
+            request.args.get("startDate"),
+            request.args.get("endDate"),
+            extra,
+        )
+
+        with _lock:
+            gen = _generation(owner)
+            entry = store.get(key)
+            if entry is not None and entry[0] == gen:
+                _stats["hits"] += 1
+                body, status, mimetype = entry[1]
+                return Response(body, status=status, mimetype=mimetype)
+            _stats["stale" if entry is not None else "misses"] += 1
+
+        rv = current_app.make_response(fn(*args, **kwargs))
+        if rv.status_code == 200 and not rv.direct_passthrough:
+            with _lock:
+                if not _replica_caught_up(owner):
+                    _stats["replicaSkips"] += 1
+                    return rv
+                store[key] = (gen, (rv.get_data(), rv.status_code, rv.mimetype))
+                _stats["stores"] += 1
+        return rv
+
+    return wrapper
+
+
+def invalidate_owner(*owner_ids) -> None:
+    """Invalida o cache dos donos informados (e as visões agregadas de time)."""
+    now = time.monotonic()
+    with _lock:
+        for owner in {str(o) for o in owner_ids if o} | {_ALL}:
+            _generations[owner] = _generation(owner) + 1
+            _invalidated_at[owner] = now
+        _stats["invalidations"] += 1
+
+
+def stats() -> dict:
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"] + _stats["stale"]
+        return {
+            **_stats,
+            "size": len(_cache) if _cache is not None else 0,
+            "hitRatio": round(_stats["hits"] / lookups, 4) if lookups else None,
+        }
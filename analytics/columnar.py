@@ -0,0 +1,353 @@
+"""
+Snapshot colunar de clients/interactions para relatórios ad-hoc.
+
+`build_snapshot` lê as tabelas uma vez (transação REPEATABLE READ, em lotes)
+e grava cada coluna como um .npy em ANALYTICS_SNAPSHOT_DIR/<versão>/, com as
+colunas categóricas codificadas em dicionário (meta.json). O arquivo CURRENT
+aponta para a versão ativa e é trocado atomicamente.
+
+O build roda só fora dos workers web (`flask snapshot_analytics`, uma vez ou
+com --loop a cada ANALYTICS_SNAPSHOT_MAX_AGE): a extração lê da réplica
+quando configurada e o NumPy não disputa CPU com as requisições. Um arquivo
+de lock com flock (solto quando o dono termina ou morre) impede dois builds
+ao mesmo tempo.
+
+Os relatórios (`REPORTS`) abrem as colunas com mmap e agregam com NumPy
+(bincount sobre códigos combinados), sem tocar no banco; `load_snapshot` só lê.
+"""
+
+import fcntl
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import text
+
+from extensions import db
+
+CLIENT_COLUMNS = ("created_at", "owner", "status", "source", "product", "follow_up", "property_value")
+INTERACTION_COLUMNS = ("client", "type", "to_status", "created_at")
+CATEGORICAL = {"owner", "status", "source", "product", "follow_up", "type", "to_status"}
+
+_BATCH = 50_000
+_KEEP_VERSIONS = 2
+_WEEK = 7 * 86400
+# 1970-01-05 foi uma segunda-feira: semanas ISO a partir daí
+_MONDAY_EPOCH = 4 * 86400
+
+_loaded: dict = {}
+_lock = threading.Lock()
+
+
+class SnapshotUnavailable(Exception):
+    pass
+
+
+class BuildInProgress(Exception):
+    pass
+
+
+def snapshot_dir() -> str:
+    path = current_app.config.get("ANALYTICS_SNAPSHOT_DIR") or "var/analytics"
+    return path if os.path.isabs(path) else os.path.join(current_app.root_path, path)
+
+
+# ---------------------------------------------------------------------------
+# Construção
+# ---------------------------------------------------------------------------
+
+class _Encoder:
+    """Codificação em dicionário: valor -> código int (None -> -1)."""
+
+    def __init__(self):
+        self.vocab: list = []
+        self._index: dict = {}
+
+    def __call__(self, value) -> int:
+        if value is None:
+            return -1
+        value = str(value)
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.vocab)
+            self.vocab.append(value)
+        return code
+
+
+def _epoch(dt) -> int:
+    return int(dt.timestamp()) if dt is not None else 0
+
+
+def _stream(conn, sql: str):
+    result = conn.execution_options(stream_results=True, max_row_buffer=_BATCH).execute(text(sql))
+    while True:
+        rows = result.fetchmany(_BATCH)
+        if not rows:
+            return
+        yield rows
+
+
+def _extract(conn) -> tuple:
+    enc = {name: _Encoder() for name in CATEGORICAL}
+    cols = {name: [] for name in CLIENT_COLUMNS}
+    for rows in _stream(conn, """
+        SELECT created_at, owner_id, status, source, product, follow_up_state, property_value
+        FROM public.clients ORDER BY id
+    """):
+        cols["created_at"].append(np.fromiter((_epoch(r[0]) for r in rows), np.int64, len(rows)))
+        cols["owner"].append(np.fromiter((enc["owner"](r[1]) for r in rows), np.int32, len(rows)))
+        cols["status"].append(np.fromiter((enc["status"](r[2]) for r in rows), np.int32, len(rows)))
+        cols["source"].append(np.fromiter((enc["source"](r[3]) for r in rows), np.int32, len(rows)))
+        cols["product"].append(np.fromiter((enc["product"](r[4]) for r in rows), np.int32, len(rows)))
+        cols["follow_up"].append(np.fromiter((enc["follow_up"](r[5]) for r in rows), np.int32, len(rows)))
+        cols["property_value"].append(np.fromiter(
+            (float(r[6]) if r[6] is not None else np.nan for r in rows), np.float64, len(rows)))
+
+    icols = {name: [] for name in INTERACTION_COLUMNS}
+    # índice do cliente = posição na ordem por id usada acima
+    for rows in _stream(conn, """
+        SELECT c.idx, i.type, i.to_status, i.created_at
+        FROM public.interactions i
+        JOIN (SELECT id, (row_number() OVER (ORDER BY id) - 1)::int AS idx FROM public.clients) c
+          ON c.id = i.client_id
+    """):
+        icols["client"].append(np.fromiter((r[0] for r in rows), np.int32, len(rows)))
+        icols["type"].append(np.fromiter((enc["type"](r[1]) for r in rows), np.int32, len(rows)))
+        icols["to_status"].append(np.fromiter((enc["to_status"](r[2]) for r in rows), np.int32, len(rows)))
+        icols["created_at"].append(np.fromiter((_epoch(r[3]) for r in rows), np.int64, len(rows)))
+
+    dtypes = {"created_at": np.int64, "property_value": np.float64}
+    def concat(parts, name):
+        return np.concatenate(parts) if parts else np.empty(0, dtypes.get(name, np.int32))
+
+    clients = {name: concat(parts, name) for name, parts in cols.items()}
+    interactions = {name: concat(parts, name) for name, parts in icols.items()}
+    vocab = {name: e.vocab for name, e in enc.items()}
+    return clients, interactions, vocab
+
+
+def build_snapshot() -> dict:
+    """Gera uma nova versão do snapshot e a torna CURRENT. Retorna o meta."""
+    base = snapshot_dir()
+    os.makedirs(base, exist_ok=True)
+    # flock: solto pelo kernel quando o dono sai ou morre, sem expiração por idade
+    with open(os.path.join(base, "LOCK"), "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise BuildInProgress("outro build do snapshot em andamento") from None
+        try:
+            return _build(base)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _source_engine():
+    """Réplica de leitura quando configurada (o full scan não compete com o OLTP do primário)."""
+    from utils.replica import BIND
+
+    return db.engines.get(BIND) or db.engine
+
+
+def _build(base: str) -> dict:
+    started = time.monotonic()
+    with _source_engine().connect() as conn:
+        conn = conn.execution_options(isolation_level="REPEATABLE READ")
+        with conn.begin():
+            clients, interactions, vocab = _extract(conn)
+
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    tmp = os.path.join(base, f".{version}.tmp")
+    os.makedirs(tmp)
+    for name, arr in clients.items():
+        np.save(os.path.join(tmp, f"clients.{name}.npy"), arr)
+    for name, arr in interactions.items():
+        np.save(os.path.join(tmp, f"interactions.{name}.npy"), arr)
+    meta = {
+        "version": version,
+        "createdAt": datetime.now(timezone.utc).isoformat(),
+        "clients": int(len(clients["created_at"])),
+        "interactions": int(len(interactions["created_at"])),
+        "vocab": vocab,
+        "buildSeconds": round(time.monotonic() - started, 3),
+    }
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(base, version))
+
+    pointer = os.path.join(base, ".CURRENT.tmp")
+    with open(pointer, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(base, "CURRENT"))
+
+    versions = sorted(d for d in os.listdir(base) if not d.startswith(".") and d != "CURRENT" and d != "LOCK")
+    for old in versions[:-_KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(base, old), ignore_errors=True)
+    return {k: v for k, v in meta.items() if k != "vocab"}
+
+
+def run_builds(interval: float) -> None:
+    """`snapshot_analytics --loop`: um build a cada `interval` segundos."""
+    while True:
+        started = time.monotonic()
+        try:
+            meta = build_snapshot()
+            current_app.logger.info("[columnar] snapshot %s: %s clientes, %s interações em %ss",
+                                    meta["version"], meta["clients"], meta["interactions"], meta["buildSeconds"])
+        except BuildInProgress as e:
+            current_app.logger.info("[columnar] %s", e)
+        except Exception:
+            current_app.logger.exception("[columnar] falha ao gerar snapshot")
+        time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+# ---------------------------------------------------------------------------
+# Leitura
+# ---------------------------------------------------------------------------
+
+class Snapshot:
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.vocab = self.meta["vocab"]
+        self._cols: dict = {}
+
+    def col(self, table: str, name: str) -> np.ndarray:
+        key = f"{table}.{name}"
+        arr = self._cols.get(key)
+        if arr is None:
+            arr = self._cols[key] = np.load(os.path.join(self.path, f"{key}.npy"), mmap_mode="r")
+        return arr
+
+    def code(self, column: str, value) -> int:
+        try:
+            return self.vocab[column].index(str(value))
+        except ValueError:
+            return -2  # não existe no snapshot: não casa com nenhuma linha
+
+    def label(self, column: str, code: int):
+        return self.vocab[column][code] if code >= 0 else None
+
+
+def _current_version(base: str) -> str | None:
+    try:
+        with open(os.path.join(base, "CURRENT"), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def load_snapshot() -> Snapshot:
+    """Snapshot corrente (mmap, cacheado por versão). Só leitura: o build é do CLI."""
+    base = snapshot_dir()
+    version = _current_version(base)
+    if not version:
+        raise SnapshotUnavailable("snapshot ainda não gerado")
+
+    with _lock:
+        snap = _loaded.get(base)
+        if snap is None or snap.meta["version"] != version:
+            snap = _loaded[base] = Snapshot(os.path.join(base, version))
+        return snap
+
+
+# ---------------------------------------------------------------------------
+# Relatórios (vetorizados)
+# ---------------------------------------------------------------------------
+
+def client_mask(snap: Snapshot, owner_id=None, start=None, end_excl=None) -> np.ndarray:
+    created = snap.col("clients", "created_at")
+    mask = np.ones(len(created), dtype=bool)
+    if owner_id:
+        mask &= snap.col("clients", "owner") == snap.code("owner", owner_id)
+    if start is not None:
+        mask &= created >= int(start.timestamp())
+    if end_excl is not None:
+        mask &= created < int(end_excl.timestamp())
+    return mask
+
+
+def _reached(snap: Snapshot, stages) -> np.ndarray:
+    """Clientes que já passaram (histórico) ou estão em alguma das etapas."""
+    n = len(snap.col("clients", "created_at"))
+    reached = np.isin(snap.col("clients", "status"), [snap.code("status", s) for s in stages])
+    to_status = snap.col("interactions", "to_status")
+    hit = np.isin(to_status, [snap.code("to_status", s) for s in stages])
+    reached[snap.col("interactions", "client")[hit]] = True
+    return reached[:n]
+
+
+def cohorts(snap: Snapshot, mask: np.ndarray) -> list:
+    """Leads por origem x semana de criação, com quantos chegaram a Proposta e a Fechado."""
+    source = snap.col("clients", "source")[mask].astype(np.int64) + 1  # -1 (sem origem) -> 0
+    week = (snap.col("clients", "created_at")[mask] - _MONDAY_EPOCH) // _WEEK
+    if not len(week):
+        return []
+    w0 = int(week.min())
+    n_weeks = int(week.max()) - w0 + 1
+    key = source * n_weeks + (week - w0)
+    size = (len(snap.vocab["source"]) + 1) * n_weeks
+    leads = np.bincount(key, minlength=size)
+    proposal = np.bincount(key, weights=_reached(snap, ["Proposta", "Fechado"])[mask], minlength=size)
+    closed = np.bincount(key, weights=(snap.col("clients", "status") == snap.code("status", "Fechado"))[mask], minlength=size)
+
+    out = []
+    for k in np.flatnonzero(leads):
+        s, w = divmod(int(k), n_weeks)
+        week_start = datetime.fromtimestamp((w0 + w) * _WEEK + _MONDAY_EPOCH, tz=timezone.utc).date()
+        out.append({
+            "source": snap.label("source", s - 1),
+            "week": week_start.isoformat(),
+            "leads": int(leads[k]),
+            "reachedProposal": int(proposal[k]),
+            "closed": int(closed[k]),
+            "conversionRate": round(float(closed[k]) / float(leads[k]), 4),
+        })
+    return out
+
+
+def pipeline(snap: Snapshot, mask: np.ndarray) -> list:
+    """Quantidade e soma de property_value por status."""
+    status = snap.col("clients", "status")[mask].astype(np.int64) + 1
+    value = snap.col("clients", "property_value")[mask]
+    size = len(snap.vocab["status"]) + 1
+    count = np.bincount(status, minlength=size)
+    total = np.bincount(status, weights=np.nan_to_num(value), minlength=size)
+    with_value = np.bincount(status, weights=~np.isnan(value), minlength=size)
+    return [
+        {
+            "status": snap.label("status", int(k) - 1),
+            "count": int(count[k]),
+            "totalValue": round(float(total[k]), 2),
+            "avgValue": round(float(total[k] / with_value[k]), 2) if with_value[k] else None,
+        }
+        for k in np.flatnonzero(count)
+    ]
+
+
+def conversion(snap: Snapshot, mask: np.ndarray, by: str = "product") -> list:
+    """Leads, fechados e taxa de conversão por produto (ou origem)."""
+    column = "product" if by == "product" else "source"
+    key = snap.col("clients", column)[mask].astype(np.int64) + 1
+    size = len(snap.vocab[column]) + 1
+    leads = np.bincount(key, minlength=size)
+    closed = np.bincount(key, weights=(snap.col("clients", "status") == snap.code("status", "Fechado"))[mask], minlength=size)
+    return [
+        {
+            column: snap.label(column, int(k) - 1),
+            "leads": int(leads[k]),
+            "closed": int(closed[k]),
+            "conversionRate": round(float(closed[k]) / float(leads[k]), 4),
+        }
+        for k in np.flatnonzero(leads)
+    ]
+
+
+REPORTS = {"cohorts", "pipeline", "conversion"}
+
@@ -0,0 +1,340 @@
+"""
+Rollups incrementais para analytics.
+
+- analytics_interaction_hourly: job periódico (`flask refresh_rollups`) agrega
+  interações por hora até o watermark "interactions"; o que vem depois dele
+  (hot tail) é lido direto de `interactions`.
+- analytics_client_status: contadores correntes de clientes, ajustados no mesmo
+  flush/transação de cada escrita ORM em `Client`; o rebuild inicial grava o
+  watermark "client_status", que libera a leitura pelas rotas.
+
+Tudo depende das tabelas de scripts/migrations/0001_analytics_rollups.sql:
+sem elas (migração ainda não aplicada) o hook de escrita não faz nada e as
+rotas leem as tabelas brutas. A checagem é feita uma vez por processo, no
+init_app (ou no primeiro uso, se o banco não respondeu no boot).
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import event, func, inspect, literal_column, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from extensions import db
+from models.client import Client
+from models.interaction import Interaction
+from models.analytics_rollup import InteractionHourlyRollup, ClientStatusRollup, RollupState
+
+INTERACTIONS = "interactions"
+CLIENT_STATUS = "client_status"
+
+# owner_id nulo não pode entrar na PK do rollup
+NIL_OWNER = uuid.UUID(int=0)
+
+# Backfill em fatias para não segurar uma transação gigante
+_CHUNK = timedelta(days=31)
+
+_TABLES_SQL = text(
+    """
+    SELECT to_regclass('public.analytics_client_status') IS NOT NULL
+       AND to_regclass('public.analytics_interaction_hourly') IS NOT NULL
+       AND to_regclass('public.analytics_rollup_state') IS NOT NULL
+    """
+)
+_installed = None  # tabelas da migração 0001 presentes? (None = ainda não checado)
+
+
+def _utc_day(dt: datetime | None):
+    if dt is None:
+        return datetime.now(timezone.utc).date()
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).date()
+
+
+def client_key(owner_id, created_at, status, follow_up_state):
+    return (owner_id or NIL_OWNER, _utc_day(created_at), status, follow_up_state or "")
+
+
+def _old_values(session, obj: Client):
+    """Valores persistidos (antes deste flush) das colunas que compõem a chave."""
+    state = inspect(obj)
+    names = ("owner_id", "created_at", "status", "follow_up_state")
+    values = {}
+    for name in names:
+        hist = state.attrs[name].history
+        if hist.deleted:
+            values[name] = hist.deleted[0]
+        elif hist.unchanged:
+            values[name] = hist.unchanged[0]
+        elif not hist.added:
+            values[name] = getattr(obj, name)
+        else:
+            # atributo expirado e sobrescrito: o banco ainda tem o valor antigo
+            row = session.connection().execute(
+                select(Client.owner_id, Client.created_at, Client.status, Client.follow_up_state)
+                .where(Client.id == obj.id)
+            ).one_or_none()
+            return dict(row._mapping) if row else None
+    return values
+
+
+def _collect_client_deltas(session) -> dict:
+    deltas: dict = {}
+
+    def bump(key, n):
+        deltas[key] = deltas.get(key, 0) + n
+
+    for obj in session.new:
+        if isinstance(obj, Client):
+            bump(client_key(obj.owner_id, obj.created_at, obj.status, obj.follow_up_state), 1)
+    for obj in session.deleted:
+        if isinstance(obj, Client):
+            old = _old_values(session, obj)
+            if old:
+                bump(client_key(**old), -1)
+    for obj in session.dirty:
+        if not isinstance(obj, Client) or not session.is_modified(obj):
+            continue
+        old = _old_values(session, obj)
+        if not old:
+            continue
+        before = client_key(**old)
+        after = client_key(obj.owner_id, obj.created_at, obj.status, obj.follow_up_state)
+        if before != after:
+            bump(before, -1)
+            bump(after, 1)
+    return {k: n for k, n in deltas.items() if n}
+
+
+def _check_tables(app) -> None:
+    global _installed
+    try:
+        with db.engine.connect() as conn:
+            _installed = bool(conn.execute(_TABLES_SQL).scalar())
+    except Exception as e:
+        app.logger.warning("[rollups] checagem das tabelas falhou (nova tentativa no primeiro uso): %s", e)
+        return
+    if not _installed:
+        app.logger.warning("[rollups] tabelas de 0001_analytics_rollups.sql ausentes: rollups desligados")
+
+
+def enabled() -> bool:
+    """ANALYTICS_ROLLUPS_ENABLED ligado e tabelas dos rollups presentes."""
+    if not current_app.config.get("ANALYTICS_ROLLUPS_ENABLED", True):
+        return False
+    if _installed is None:
+        from utils import query_budget
+
+        query_budget.allow(1)  # checagem única, fora do orçamento da rota
+        _check_tables(current_app)
+    return bool(_installed)
+
+
+def _before_flush(session, flush_context, instances):
+    if not current_app or session.get_bind().dialect.name != "postgresql":
+        return
+    if not enabled():
+        return
+    deltas = _collect_client_deltas(session)
+    if deltas:
+        apply_client_deltas(session.connection(), deltas)
+
+
+def apply_client_deltas(conn, deltas: dict) -> None:
+    """Aplica {(owner_id, created_day, status, follow_up_state): delta} no rollup de clientes.
+
+    Exposto para escritas fora do ORM (UPDATEs em lote), que devem chamar isto
+    na mesma transação.
+    """
+    rows = [
+        {"owner_id": k[0], "created_day": k[1], "status": k[2], "follow_up_state": k[3], "total": n}
+        for k, n in deltas.items()
+    ]
+    stmt = pg_insert(ClientStatusRollup).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["owner_id", "created_day", "status", "follow_up_state"],
+        set_={"total": ClientStatusRollup.total + stmt.excluded.total},
+    )
+    conn.execute(stmt)
+
+
+def init_app(app):
+    """Checa as tabelas e registra o hook de escrita do rollup de clientes."""
+    if app.config.get("ANALYTICS_ROLLUPS_ENABLED", True):
+        with app.app_context():
+            _check_tables(app)
+    if not event.contains(db.session, "before_flush", _before_flush):
+        event.listen(db.session, "before_flush", _before_flush)
+
+
+# ---------------------------------------------------------------------------
+# Leitura
+# ---------------------------------------------------------------------------
+
+def interactions_watermark():
+    """Expressão SQL do watermark de interações (-infinity quando não há rollup)."""
+    if not enabled():
+        return text("'-infinity'::timestamptz")
+    wm = (
+        select(RollupState.watermark)
+        .where(RollupState.name == INTERACTIONS)
+        .scalar_subquery()
+    )
+    return func.coalesce(wm, text("'-infinity'::timestamptz"))
+
+
+def _client_rollup_built() -> bool:
+    st = db.session.get(RollupState, CLIENT_STATUS)
+    return bool(st and st.watermark)
+
+
+def client_rollup_ready() -> bool:
+    if not enabled():
+        return False
+    return _client_rollup_built()
+
+
+def interaction_events(start, end_excl, user_id=None, *, use_rollup=True):
+    """Subquery (ts, type, user_id, n) que junta rollup (< watermark) e hot tail bruto.
+
+    use_rollup=False lê só `interactions` (ex.: fusos com offset fracionário,
+    em que a hora UTC do rollup não cabe num bucket local).
+    """
+    use_rollup = use_rollup and enabled()
+    wm = interactions_watermark() if use_rollup else text("'-infinity'::timestamptz")
+    R = InteractionHourlyRollup
+    rolled = (
+        select(R.bucket.label("ts"), R.type.label("type"), R.user_id.label("user_id"), R.total.label("n"))
+        .where(R.bucket >= start, R.bucket < end_excl, R.bucket < wm)
+    )
+    raw = (
+        select(
+            Interaction.created_at.label("ts"),
+            Interaction.type.label("type"),
+            Interaction.user_id.label("user_id"),
+            literal_column("1").label("n"),
+        )
+        .where(Interaction.created_at >= start, Interaction.created_at < end_excl, Interaction.created_at >= wm)
+    )
+    if user_id:
+        rolled = rolled.where(R.user_id == user_id)
+        raw = raw.where(Interaction.user_id == user_id)
+    if not use_rollup:
+        return raw.subquery("events")
+    return rolled.union_all(raw).subquery("events")
+
+
+# ---------------------------------------------------------------------------
+# Job periódico
+# ---------------------------------------------------------------------------
+
+def _set_watermark(conn, name: str, wm) -> None:
+    stmt = pg_insert(RollupState).values(name=name, watermark=wm, updated_at=func.now())
+    conn.execute(stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={"watermark": stmt.excluded.watermark, "updated_at": func.now()},
+    ))
+
+
+def _try_lock(conn, name: str) -> bool:
+    return bool(conn.execute(text("SELECT pg_try_advisory_xact_lock(hashtext(:n))"), {"n": name}).scalar())
+
+
+def rebuild_client_rollup() -> int:
+    """Recalcula o rollup de clientes do zero (bloqueia escritas em clients durante o rebuild)."""
+    conn = db.session.connection()
+    conn.execute(text("LOCK TABLE public.clients IN SHARE MODE"))
+    conn.execute(ClientStatusRollup.__table__.delete())
+    res = conn.execute(text(
+        """
+        INSERT INTO public.analytics_client_status (owner_id, created_day, status, follow_up_state, total)
+        SELECT coalesce(owner_id, :nil), (coalesce(created_at, now()) AT TIME ZONE 'UTC')::date,
+               status, coalesce(follow_up_state, ''), count(*)
+        FROM public.clients
+        GROUP BY 1, 2, 3, 4
+        """
+    ), {"nil": NIL_OWNER})
+    _set_watermark(conn, CLIENT_STATUS, func.now())
+    db.session.commit()
+    return res.rowcount
+
+
+def advance_watermark(name: str, apply_chunk, *, reset=None) -> tuple:
+    """Processa `interactions` em fatias [watermark, watermark + _CHUNK) até o alvo.
+
+    O alvo é `now() - ANALYTICS_ROLLUP_LAG_MINUTES` truncado na hora, para não
+    perder linhas de transações que ainda não commitaram. Cada fatia commita
+    junto com o novo watermark, então o job pode ser interrompido e retomado;
+    um advisory lock por `name` impede execuções simultâneas.
+    `apply_chunk(conn, lo, hi)` grava a fatia; `reset(conn)` limpa tudo (rebuild).
+    Retorna (de, até).
+    """
+    lag = timedelta(minutes=int(current_app.config.get("ANALYTICS_ROLLUP_LAG_MINUTES", 15)))
+    start = wm = None
+    while True:
+        conn = db.session.connection()
+        if not _try_lock(conn, name):
+            db.session.rollback()
+            break
+        if reset is not None:
+            reset(conn)
+            conn.execute(RollupState.__table__.delete().where(RollupState.name == name))
+            reset = None
+
+        target = conn.execute(
+            text("SELECT date_trunc('hour', now() - :lag, 'UTC')"), {"lag": lag}
+        ).scalar()
+        wm = conn.execute(
+            select(RollupState.watermark).where(RollupState.name == name).with_for_update()
+        ).scalar()
+        if wm is None:
+            first = conn.execute(
+                text("SELECT date_trunc('hour', min(created_at), 'UTC') FROM public.interactions")
+            ).scalar()
+            wm = min(first, target) if first else target
+        if start is None:
+            start = wm
+        if wm >= target:
+            _set_watermark(conn, name, wm)
+            db.session.commit()
+            break
+
+        upto = min(wm + _CHUNK, target)
+        apply_chunk(conn, wm, upto)
+        _set_watermark(conn, name, upto)
+        db.session.commit()
+        wm = upto
+    return start, wm
+
+
+def _interaction_chunk(conn, lo, hi) -> None:
+    conn.execute(text(
+        """
+        INSERT INTO public.analytics_interaction_hourly (bucket, user_id, type, total)
+        SELECT date_trunc('hour', created_at, 'UTC'), user_id, type, count(*)
+        FROM public.interactions
+        WHERE created_at >= :lo AND created_at < :hi
+        GROUP BY 1, 2, 3
+        ON CONFLICT (bucket, user_id, type) DO UPDATE SET total = excluded.total
+        """
+    ), {"lo": lo, "hi": hi})
+
+
+def refresh_interaction_rollup(*, rebuild: bool = False) -> tuple:
+    """Agrega horas fechadas de `interactions` a partir do watermark."""
+    reset = (lambda conn: conn.execute(InteractionHourlyRollup.__table__.delete())) if rebuild else None
+    return advance_watermark(INTERACTIONS, _interaction_chunk, reset=reset)
+
+
+def refresh_all(*, rebuild: bool = False) -> dict:
+    """Entrada do job: rebuild do rollup de clientes quando necessário + incrementais sobre interações."""
+    from analytics import transitions
+
+    out = {}
+    if rebuild or not _client_rollup_built():
+        out["client_status_rows"] = rebuild_client_rollup()
+    out["interactions"] = refresh_interaction_rollup(rebuild=rebuild)
+    out["stage_transitions"] = transitions.refresh(rebuild=rebuild)
+    return out
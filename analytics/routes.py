@@ -1,78 +1,242 @@
 # analytics/routes.py
+from datetime import date, datetime, time, timedelta, timezone
 from flask import Blueprint, request, jsonify, g
 from sqlalchemy import func
 from extensions import db
 from models.client import Client
-from models.interaction import Interaction
+from models.analytics_rollup import ClientStatusRollup
 from auth.supabase_middleware import supabase_required
+from utils.rbac import require_roles
+from analytics import rollups, series, team, transitions
+from analytics import cache as analytics_cache
+from utils import warmup
+from utils.query_budget import query_budget
+from utils.replica import read_replica
+from utils.statement_timeout import statement_timeout
 
 bp = Blueprint("analytics", __name__)
 
+FUNNEL_STAGES = ["Primeiro Atendimento", "Em Tratativa", "Proposta", "Fechado"]
+
 def _error(msg, code): return jsonify({"error": msg}), code
 
+def _parse_range(start, end):
+    """startDate/endDate (YYYY-MM-DD) -> (início, fim exclusivo) ou None se inválido."""
+    try:
+        d0 = date.fromisoformat(start)
+        d1 = date.fromisoformat(end)
+    except (TypeError, ValueError):
+        return None
+    if d1 < d0:
+        return None
+    return d0, d1 + timedelta(days=1)
+
+@warmup.register("analytics")
+def _warm_queries():
+    # KPIs por dono (dashboard/stream) e checagem do rollup
+    team.kpis_for(warmup.NIL_ID)
+    team.kpis_for(None)
+
 @bp.get("/broker-kpis")
 @supabase_required()
+@analytics_cache.cached
+@read_replica
+@query_budget(4)
+@statement_timeout(30000)
 def broker_kpis():
     j = getattr(g, "jwt", {})
-    qry = Client.query
-    if j.get("role") == "BROKER":
-        qry = qry.filter(Client.owner_id == j.get("sub"))
-
-    total = qry.count()
-    primeiro = qry.filter(Client.status == "Primeiro Atendimento").count()
-    em_tratativa = qry.filter(Client.status == "Em Tratativa").count()
-    atrasado = qry.filter(Client.follow_up_state == "Atrasado").count()
-
-    return jsonify({
-        "followUpAtrasado": atrasado,
-        "leadsEmTratativa": em_tratativa,
-        "leadsPrimeiroAtendimento": primeiro,
-        "totalLeads": total
-    }), 200
+    owner_id = j.get("sub") if j.get("role") == "BROKER" else None
+    return jsonify(team.kpis_for(owner_id)), 200
 
 @bp.get("/productivity")
 @supabase_required()
+@analytics_cache.cached
+@read_replica
+@query_budget(3)
+@statement_timeout(30000)
 def productivity():
     j = getattr(g, "jwt", {})
     start = request.args.get("startDate")
     end = request.args.get("endDate")
     broker_id = request.args.get("brokerId")
+    granularity = request.args.get("granularity") or "day"
+    group_by = request.args.get("groupBy") or None
+    tz = series.parse_tz(request.args.get("tz"))
 
-    if not start or not end:
+    rng = _parse_range(start, end)
+    if not rng or not tz or granularity not in series.GRANULARITIES:
+        return _error("Dados inválidos.", 400)
+    if group_by is not None and group_by not in series.GROUP_BY:
         return _error("Dados inválidos.", 400)
+    d0, d1 = rng[0], rng[1] - timedelta(days=1)
+    if series.too_many_buckets(d0, d1, granularity):
+        return _error("Intervalo muito grande para a granularidade.", 400)
     if j.get("role") == "BROKER":
         broker_id = j.get("sub")
 
-    q = db.session.query(
-        func.date_trunc('day', Interaction.created_at).label("dia"),
-        func.count(Interaction.id)
-    ).group_by(func.date_trunc('day', Interaction.created_at))\
-     .filter(Interaction.created_at >= start)\
-     .filter(Interaction.created_at < f"{end} 23:59:59")
-
-    if broker_id:
-        q = q.filter(Interaction.user_id == broker_id)
-
-    series = [{"date": r.dia.date().isoformat(), "count": r[1]} for r in q.order_by("dia").all()]
-    return jsonify({"series": series}), 200
+    rows = series.productivity_rows(d0, d1, tz=tz, granularity=granularity, group_by=group_by, broker_id=broker_id)
+    payload = {"granularity": granularity, "tz": tz.key}
+    if group_by is None:
+        payload["series"] = [{"date": series.format_bucket(b, granularity), "count": int(n)} for b, _k, n in rows]
+    else:
+        groups = {}
+        for b, k, n in rows:
+            groups.setdefault(k, []).append({"date": series.format_bucket(b, granularity), "count": int(n)})
+        payload["groupBy"] = group_by
+        payload["groups"] = [{"key": k, "series": v} for k, v in groups.items()]
+    return jsonify(payload), 200
 
 @bp.get("/funnel")
 @supabase_required()
+@analytics_cache.cached
+@read_replica
+@query_budget(7)
+@statement_timeout(30000)
 def funnel():
     j = getattr(g, "jwt", {})
     start = request.args.get("startDate")
     end = request.args.get("endDate")
     broker_id = request.args.get("brokerId")
 
-    if not start or not end:
+    rng = _parse_range(start, end)
+    if not rng:
         return _error("Dados inválidos.", 400)
     if j.get("role") == "BROKER":
         broker_id = j.get("sub")
 
-    qry = Client.query.filter(Client.created_at >= start).filter(Client.created_at < f"{end} 23:59:59")
-    if broker_id:
-        qry = qry.filter(Client.owner_id == broker_id)
+    if rollups.client_rollup_ready():
+        R = ClientStatusRollup
+        q = db.session.query(R.status, func.sum(R.total))\
+            .filter(R.created_day >= rng[0], R.created_day < rng[1], R.status.in_(FUNNEL_STAGES))\
+            .group_by(R.status)
+        if broker_id:
+            q = q.filter(R.owner_id == broker_id)
+        found = {status: int(n) for status, n in q.all()}
+        counts = {s: found.get(s, 0) for s in FUNNEL_STAGES}
+    else:
+        qry = Client.query.filter(Client.created_at >= rng[0]).filter(Client.created_at < rng[1])
+        if broker_id:
+            qry = qry.filter(Client.owner_id == broker_id)
 
-    stages = ["Primeiro Atendimento", "Em Tratativa", "Proposta", "Fechado"]
-    counts = {s: qry.filter(Client.status == s).count() for s in stages}
+        counts = {s: qry.filter(Client.status == s).count() for s in FUNNEL_STAGES}
     return jsonify({"stages": counts}), 200
+
+@bp.get("/team")
+@supabase_required()
+@analytics_cache.cached
+@read_replica
+@query_budget(8)
+@statement_timeout(30000)
+def team_dashboard():
+    """KPIs, funil e sparkline de produtividade de todos os corretores do escopo.
+
+    Número fixo de consultas (corretores, KPIs, funil, série), agrupadas por dono.
+    """
+    j = getattr(g, "jwt", {})
+    granularity = request.args.get("granularity") or "day"
+    tz = series.parse_tz(request.args.get("tz"))
+    rng = _parse_range(request.args.get("startDate"), request.args.get("endDate"))
+    if not rng or not tz or granularity not in series.GRANULARITIES:
+        return _error("Dados inválidos.", 400)
+    d0, d1 = rng[0], rng[1] - timedelta(days=1)
+    if series.too_many_buckets(d0, d1, granularity):
+        return _error("Intervalo muito grande para a granularidade.", 400)
+
+    only_id = j.get("sub") if j.get("role") == "BROKER" else None
+    brokers = team.brokers_in_scope(only_id)
+    ids = [b.id for b in brokers]
+    if not ids:
+        return jsonify({"brokers": [], "buckets": []}), 200
+
+    kpis = team.kpis_by_owner(ids)
+    funnels = team.funnel_by_owner(ids, rng[0], rng[1], FUNNEL_STAGES)
+    rows = series.productivity_rows(d0, d1, tz=tz, granularity=granularity, group_by="user", broker_id=only_id)
+
+    axis = series.bucket_axis(d0, d1, granularity)
+    spark = {}
+    for b, k, n in rows:
+        spark.setdefault(k, {})[b] = int(n)
+    empty_kpis = dict.fromkeys(team.KPI_KEYS, 0)
+
+    items = []
+    for b in brokers:
+        f = funnels.get(b.id, {})
+        items.append({
+            "id": b.id,
+            "name": b.name,
+            "email": b.email,
+            "kpis": kpis.get(b.id, empty_kpis),
+            "funnel": {s: f.get(s, 0) for s in FUNNEL_STAGES},
+            "productivity": [spark.get(str(b.id), {}).get(x, 0) for x in axis],
+        })
+    buckets = [series.format_bucket(x, granularity) for x in axis]
+    return jsonify({"granularity": granularity, "tz": tz.key, "buckets": buckets, "brokers": items}), 200
+
+@bp.get("/stage-transitions")
+@supabase_required()
+@analytics_cache.cached
+@read_replica
+@query_budget(5)
+@statement_timeout(30000)
+def stage_transitions():
+    """Matriz de transições, taxas de conversão e tempo em etapa (mediana/p90) no período."""
+    j = getattr(g, "jwt", {})
+    broker_id = request.args.get("brokerId")
+    rng = _parse_range(request.args.get("startDate"), request.args.get("endDate"))
+    if not rng:
+        return _error("Dados inválidos.", 400)
+    if j.get("role") == "BROKER":
+        broker_id = j.get("sub")
+
+    matrix = transitions.transition_matrix(rng[0], rng[1], broker_id)
+    wm = transitions.watermark()
+    return jsonify({
+        "matrix": matrix,
+        "conversionRates": transitions.conversion_rates(matrix),
+        "timeInStage": transitions.time_in_stage(rng[0], rng[1], broker_id),
+        # dados processados até aqui (job de rollup)
+        "watermark": wm,
+    }), 200
+
+@bp.get("/reports/<name>")
+@supabase_required()
+@analytics_cache.cached
+@read_replica
+def report(name):
+    """Relatórios sobre o snapshot colunar (cohorts, pipeline, conversion)."""
+    from analytics import columnar  # numpy só é importado quando o relatório é pedido
+
+    if name not in columnar.REPORTS:
+        return _error("Relatório não encontrado.", 404)
+    j = getattr(g, "jwt", {})
+    broker_id = request.args.get("brokerId")
+    if j.get("role") == "BROKER":
+        broker_id = j.get("sub")
+    start = end_excl = None
+    if request.args.get("startDate") or request.args.get("endDate"):
+        rng = _parse_range(request.args.get("startDate"), request.args.get("endDate"))
+        if not rng:
+            return _error("Dados inválidos.", 400)
+        start, end_excl = (datetime.combine(d, time(), tzinfo=timezone.utc) for d in rng)
+    by = request.args.get("by", "product")
+    if by not in ("product", "source"):
+        return _error("Dados inválidos.", 400)
+
+    try:
+        snap = columnar.load_snapshot()
+    except columnar.SnapshotUnavailable:
+        return _error("Snapshot de analytics ainda não disponível.", 503)
+    mask = columnar.client_mask(snap, broker_id, start, end_excl)
+    if name == "cohorts":
+        rows = columnar.cohorts(snap, mask)
+    elif name == "pipeline":
+        rows = columnar.pipeline(snap, mask)
+    else:
+        rows = columnar.conversion(snap, mask, by)
+    return jsonify({"report": name, "snapshotAt": snap.meta["createdAt"], "rows": rows}), 200
+
+@bp.get("/cache-stats")
+@supabase_required()
+@require_roles("ADMIN")
+def cache_stats():
+    return jsonify(analytics_cache.stats()), 200
@@ -0,0 +1,112 @@
+"""
+Séries temporais de produtividade (interações por bucket).
+
+Bucketing e gap filling (generate_series) são feitos no SQL, no fuso pedido;
+as contagens vêm de `rollups.interaction_events`, ou seja, do rollup horário
+até o watermark e de `interactions` só no hot tail.
+"""
+
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import Interval, String, and_, cast, func, literal, select, true
+from sqlalchemy.dialects.postgresql import TIMESTAMP
+
+from extensions import db
+from analytics import rollups
+
+GRANULARITIES = {"hour", "day", "week", "month"}
+GROUP_BY = {"type", "user"}
+
+# Evita séries gigantes (ex.: granularity=hour em vários anos)
+MAX_BUCKETS = 20000
+
+_STEP_HOURS = {"hour": 1, "day": 24, "week": 24 * 7, "month": 24 * 28}
+
+
+def parse_tz(name: str | None) -> ZoneInfo | None:
+    try:
+        return ZoneInfo(name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def too_many_buckets(d0: date, d1: date, granularity: str) -> bool:
+    hours = ((d1 - d0).days + 1) * 24
+    return hours / _STEP_HOURS[granularity] > MAX_BUCKETS
+
+
+def _whole_hour_offsets(tz: ZoneInfo, *moments: datetime) -> bool:
+    return all(tz.utcoffset(m).total_seconds() % 3600 == 0 for m in moments)
+
+
+def productivity_rows(d0: date, d1: date, *, tz: ZoneInfo, granularity: str = "day",
+                      group_by: str | None = None, broker_id=None):
+    """Linhas (bucket local, chave, contagem) de d0 a d1 (inclusivo), com buckets vazios = 0.
+
+    Sem group_by a chave é sempre None. Uma única instrução SQL.
+    """
+    lo_local = datetime.combine(d0, time())
+    hi_local = datetime.combine(d1 + timedelta(days=1), time())
+    lo = lo_local.replace(tzinfo=tz)
+    hi = hi_local.replace(tzinfo=tz)
+
+    ev = rollups.interaction_events(lo, hi, broker_id, use_rollup=_whole_hour_offsets(tz, lo, hi))
+    tz_name = literal(tz.key)
+    bucket = func.date_trunc(granularity, func.timezone(tz_name, ev.c.ts))
+
+    step = cast(literal(f"1 {granularity}"), Interval)
+    first = func.date_trunc(granularity, cast(literal(lo_local), TIMESTAMP))
+    last = func.date_trunc(granularity, cast(literal(hi_local), TIMESTAMP) - cast(literal("1 microsecond"), Interval))
+    buckets = select(func.generate_series(first, last, step).label("bucket")).subquery("buckets")
+
+    if group_by is None:
+        agg = select(bucket.label("bucket"), func.sum(ev.c.n).label("n")).group_by(bucket).subquery("agg")
+        q = (
+            select(buckets.c.bucket, literal(None).label("key"), func.coalesce(agg.c.n, 0))
+            .select_from(buckets.outerjoin(agg, agg.c.bucket == buckets.c.bucket))
+            .order_by(buckets.c.bucket)
+        )
+    else:
+        key = ev.c.type if group_by == "type" else cast(ev.c.user_id, String)
+        agg = (
+            select(bucket.label("bucket"), key.label("key"), func.sum(ev.c.n).label("n"))
+            .group_by(bucket, key)
+            .subquery("agg")
+        )
+        keys = select(agg.c.key).distinct().subquery("keys")
+        q = (
+            select(buckets.c.bucket, keys.c.key, func.coalesce(agg.c.n, 0))
+            .select_from(
+                buckets.join(keys, true()).outerjoin(
+                    agg, and_(agg.c.bucket == buckets.c.bucket, agg.c.key == keys.c.key)
+                )
+            )
+            .order_by(keys.c.key, buckets.c.bucket)
+        )
+    return db.session.execute(q).all()
+
+
+def bucket_axis(d0: date, d1: date, granularity: str) -> list:
+    """Inícios de bucket (locais, naive) de d0 a d1, iguais aos do generate_series."""
+    if granularity == "hour":
+        first, last = datetime.combine(d0, time()), datetime.combine(d1, time(23))
+    elif granularity == "week":
+        first = datetime.combine(d0 - timedelta(days=d0.weekday()), time())
+        last = datetime.combine(d1 - timedelta(days=d1.weekday()), time())
+    elif granularity == "month":
+        first, last = datetime.combine(d0.replace(day=1), time()), datetime.combine(d1.replace(day=1), time())
+    else:
+        first, last = datetime.combine(d0, time()), datetime.combine(d1, time())
+    out, cur = [], first
+    while cur <= last:
+        out.append(cur)
+        if granularity == "month":
+            cur = cur.replace(year=cur.year + cur.month // 12, month=cur.month % 12 + 1)
+        else:
+            cur += timedelta(hours=_STEP_HOURS[granularity])
+    return out
+
+
+def format_bucket(bucket: datetime, granularity: str) -> str:
+    return bucket.isoformat() if granularity == "hour" else bucket.date().isoformat()
@@ -0,0 +1,90 @@
+"""
+Consultas agrupadas por corretor para o dashboard de time.
+
+Cada função é uma única instrução (GROUP BY owner_id/user_id), então o custo
+do endpoint não cresce com o número de corretores.
+"""
+
+from sqlalchemy import func
+
+from extensions import db
+from models.client import Client
+from models.user import User
+from models.analytics_rollup import ClientStatusRollup
+from analytics import rollups
+
+KPI_KEYS = ("totalLeads", "leadsPrimeiroAtendimento", "leadsEmTratativa", "followUpAtrasado")
+
+
+def brokers_in_scope(only_id=None) -> list:
+    q = db.session.query(User.id, User.name, User.email)
+    q = q.filter(User.id == only_id) if only_id else q.filter(User.role == "BROKER")
+    return q.order_by(User.name, User.email).all()
+
+
+def kpis_for(owner_id=None) -> dict:
+    """KPIs de um dono (ou do time todo, owner_id=None) em uma consulta."""
+    if rollups.client_rollup_ready():
+        R = ClientStatusRollup
+        total = func.sum(R.total)
+        q = db.session.query(
+            func.coalesce(total, 0),
+            func.coalesce(total.filter(R.status == "Primeiro Atendimento"), 0),
+            func.coalesce(total.filter(R.status == "Em Tratativa"), 0),
+            func.coalesce(total.filter(R.follow_up_state == "Atrasado"), 0),
+        )
+        owner = R.owner_id
+    else:
+        n = func.count(Client.id)
+        q = db.session.query(
+            n,
+            n.filter(Client.status == "Primeiro Atendimento"),
+            n.filter(Client.status == "Em Tratativa"),
+            n.filter(Client.follow_up_state == "Atrasado"),
+        )
+        owner = Client.owner_id
+    if owner_id:
+        q = q.filter(owner == owner_id)
+    return dict(zip(KPI_KEYS, (int(v) for v in q.one())))
+
+
+def kpis_by_owner(owner_ids) -> dict:
+    """{owner_id: {totalLeads, leadsPrimeiroAtendimento, leadsEmTratativa, followUpAtrasado}}"""
+    if rollups.client_rollup_ready():
+        R = ClientStatusRollup
+        owner, total = R.owner_id, func.sum(R.total)
+        cols = (
+            func.coalesce(total, 0),
+            func.coalesce(total.filter(R.status == "Primeiro Atendimento"), 0),
+            func.coalesce(total.filter(R.status == "Em Tratativa"), 0),
+            func.coalesce(total.filter(R.follow_up_state == "Atrasado"), 0),
+        )
+    else:
+        owner, n = Client.owner_id, func.count(Client.id)
+        cols = (
+            n,
+            n.filter(Client.status == "Primeiro Atendimento"),
+            n.filter(Client.status == "Em Tratativa"),
+            n.filter(Client.follow_up_state == "Atrasado"),
+        )
+    rows = db.session.query(owner, *cols).filter(owner.in_(owner_ids)).group_by(owner).all()
+    return {r[0]: dict(zip(KPI_KEYS, (int(v) for v in r[1:]))) for r in rows}
+
+
+def funnel_by_owner(owner_ids, start, end_excl, stages) -> dict:
+    """{owner_id: {status: n}} para clientes criados em [start, end_excl)."""
+    if rollups.client_rollup_ready():
+        R = ClientStatusRollup
+        q = db.session.query(R.owner_id, R.status, func.sum(R.total))\
+            .filter(R.created_day >= start, R.created_day < end_excl)\
+            .group_by(R.owner_id, R.status)
+        owner, status = R.owner_id, R.status
+    else:
+        q = db.session.query(Client.owner_id, Client.status, func.count(Client.id))\
+            .filter(Client.created_at >= start, Client.created_at < end_excl)\
+            .group_by(Client.owner_id, Client.status)
+        owner, status = Client.owner_id, Client.status
+    out: dict = {}
+    for o, s, n in q.filter(owner.in_(owner_ids), status.in_(stages)).all():
+        out.setdefault(o, {})[s] = int(n)
+    return out
@@ -0,0 +1,109 @@
+"""
+Transições de etapa e tempo em etapa a partir do histórico de interações.
+
+`refresh` (chamado por `flask refresh_rollups`) lê as interações CLIENT_CREATED
+e STATUS_CHANGE depois do watermark "stage_transitions", encadeia as mudanças
+de cada cliente com lead() e grava uma linha por permanência em
+`analytics_stage_stints`, fechando a permanência aberta anterior. As consultas
+do endpoint leem só essa tabela; mudanças de status feitas direto no PUT de
+clientes (sem interação) não entram.
+"""
+
+from sqlalchemy import and_, extract, func, text
+
+from extensions import db
+from models.analytics_rollup import StageStint
+from analytics import rollups
+
+STAGE_TRANSITIONS = "stage_transitions"
+
+
+def _chunk(conn, lo, hi) -> None:
+    conn.execute(text(
+        """
+        WITH ev AS (
+            SELECT i.id, i.client_id, i.user_id, coalesce(c.owner_id, :nil) AS owner_id,
+                   i.type, i.from_status, i.to_status, i.created_at
+            FROM public.interactions i
+            JOIN public.clients c ON c.id = i.client_id
+            WHERE i.created_at >= :lo AND i.created_at < :hi
+              AND i.to_status IS NOT NULL
+              AND (i.type = 'CLIENT_CREATED'
+                   OR (i.type = 'STATUS_CHANGE' AND i.to_status IS DISTINCT FROM i.from_status))
+        ), seq AS (
+            SELECT ev.*,
+                   lead(created_at) OVER w AS left_at,
+                   lead(to_status) OVER w AS next_stage
+            FROM ev
+            WINDOW w AS (PARTITION BY client_id ORDER BY created_at, id)
+        ), first_ev AS (
+            SELECT DISTINCT ON (client_id) client_id, created_at, to_status
+            FROM ev
+            ORDER BY client_id, created_at, id
+        ), closed AS (
+            UPDATE public.analytics_stage_stints s
+            SET left_at = f.created_at, next_stage = f.to_status
+            FROM first_ev f
+            WHERE s.client_id = f.client_id AND s.left_at IS NULL
+            RETURNING s.interaction_id
+        )
+        INSERT INTO public.analytics_stage_stints
+            (interaction_id, client_id, owner_id, user_id, prev_stage, stage, entered_at, left_at, next_stage)
+        SELECT id, client_id, owner_id, user_id,
+               CASE WHEN type = 'CLIENT_CREATED' THEN NULL ELSE from_status END,
+               to_status, created_at, left_at, next_stage
+        FROM seq
+        ON CONFLICT (interaction_id) DO NOTHING
+        """
+    ), {"lo": lo, "hi": hi, "nil": rollups.NIL_OWNER})
+
+
+def refresh(*, rebuild: bool = False) -> tuple:
+    reset = (lambda conn: conn.execute(StageStint.__table__.delete())) if rebuild else None
+    return rollups.advance_watermark(STAGE_TRANSITIONS, _chunk, reset=reset)
+
+
+def watermark():
+    st = db.session.get(rollups.RollupState, STAGE_TRANSITIONS)
+    return st.watermark if st else None
+
+
+def transition_matrix(start, end_excl, owner_id=None) -> dict:
+    """{de: {para: n}} das transições que aconteceram em [start, end_excl)."""
+    S = StageStint
+    q = db.session.query(S.prev_stage, S.stage, func.count())\
+        .filter(S.prev_stage.isnot(None), S.entered_at >= start, S.entered_at < end_excl)\
+        .group_by(S.prev_stage, S.stage)
+    if owner_id:
+        q = q.filter(S.owner_id == owner_id)
+    out: dict = {}
+    for frm, to, n in q.all():
+        out.setdefault(frm, {})[to] = int(n)
+    return out
+
+
+def conversion_rates(matrix: dict) -> dict:
+    """{de: {para: fração das saídas de `de` que foram para `para`}}"""
+    rates = {}
+    for frm, targets in matrix.items():
+        total = sum(targets.values())
+        rates[frm] = {to: round(n / total, 4) for to, n in targets.items()}
+    return rates
+
+
+def time_in_stage(start, end_excl, owner_id=None) -> dict:
+    """{etapa: {count, medianSeconds, p90Seconds}} das permanências encerradas em [start, end_excl)."""
+    S = StageStint
+    secs = extract("epoch", S.left_at - S.entered_at)
+    q = db.session.query(
+        S.stage,
+        func.count(),
+        func.percentile_cont(0.5).within_group(secs),
+        func.percentile_cont(0.9).within_group(secs),
+    ).filter(and_(S.left_at.isnot(None), S.left_at >= start, S.left_at < end_excl)).group_by(S.stage)
+    if owner_id:
+        q = q.filter(S.owner_id == owner_id)
+    return {
+        stage: {"count": int(n), "medianSeconds": round(float(p50), 1), "p90Seconds": round(float(p90), 1)}
+        for stage, n, p50, p90 in q.all()
+    }
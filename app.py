@@ -7,26 +7,66 @@ from dotenv import load_dotenv
 ENV_PATH = Path(__file__).resolve().with_name(".env")
 load_dotenv(dotenv_path=ENV_PATH)
 
-from flask import Flask, jsonify, request
-from sqlalchemy import text
+import click
+from flask import Flask, request
 
-# Suporte a execução como script (python app.py) e como módulo (flask --app app)
-try:
-    from config import Config
-    from extensions import db, init_cors, bcrypt
-except ModuleNotFoundError:
-    from .config import Config  # type: ignore
-    from .extensions import db, init_cors, bcrypt  # type: ignore
+
+def _imports():
+    # Suporte a execução como script (python app.py) e como módulo (flask --app app).
+    # Adiado até create_app: config exige DATABASE_URL e extensions carrega o SQLAlchemy.
+    try:
+        from config import Config
+        from extensions import db, init_cors, bcrypt
+    except ModuleNotFoundError:
+        from .config import Config  # type: ignore
+        from .extensions import db, init_cors, bcrypt  # type: ignore
+    return Config, db, init_cors, bcrypt
 
 
 def create_app():
+    Config, db, init_cors, bcrypt = _imports()
     app = Flask(__name__)
     app.config.from_object(Config)
+    # JSON com orjson (UUID/datetime/Decimal nativos); antes do metrics.init_app, que envolve app.json.response
+    from utils.json_provider import FastJSONProvider
+    app.json = FastJSONProvider(app)
+
+    # DB_POOL_MODE: local (QueuePool) ou transaction (NullPool atrás de PgBouncer/Supavisor)
+    from utils.db_pool import apply_pool_mode
+    apply_pool_mode(app.config)
 
     db.init_app(app)
     bcrypt.init_app(app)
+    # IPv4/DNS resolvido ao abrir conexões (não no import do config)
+    from utils import db_engine
+    db_engine.init_app(app)
     init_cors(app)
 
+    # Rollups de analytics (hook de escrita em clients)
+    from analytics import rollups
+    rollups.init_app(app)
+    # Notificações de mudança para o stream SSE (realtime/)
+    from realtime import events as realtime_events
+    realtime_events.init_app(app)
+    # Métricas por endpoint no formato do Prometheus (utils/metrics.py)
+    from utils import metrics
+    metrics.init_app(app)
+    # Queries lentas com EXPLAIN assíncrono (utils/slow_queries.py)
+    from utils import slow_queries
+    slow_queries.init_app(app)
+    # Orçamento de queries por endpoint / detector de N+1 (utils/query_budget.py)
+    from utils import query_budget
+    query_budget.init_app(app)
+    # statement_timeout por rota, cancelamento quando o cliente desconecta, 504/503 (utils/statement_timeout.py)
+    from utils import statement_timeout
+    statement_timeout.init_app(app)
+    # Réplica de leitura opcional para as rotas @read_replica (utils/replica.py)
+    from utils import replica
+    replica.init_app(app)
+    # Compressão das respostas (utils/compression.py); depois das métricas para entrar na fase "compress"
+    from utils import compression
+    compression.init_app(app)
+
     # Startup diagnostics (safe; masks secrets)
     try:
         from urllib.parse import urlparse, parse_qsl
@@ -71,6 +111,10 @@ def create_app():
     from analytics.routes import bp as analytics_bp
     from clients.routes import bp as clients_bp
     from interactions.routes import bp as inter_bp
+    from realtime.routes import bp as realtime_bp
+    from internal.routes import bp as internal_bp
+    from exports.routes import bp as exports_bp
+    from health.routes import bp as health_bp
     from routes.me import bp as me_bp
     from routes.clients import bp as clients_v2_bp
     from routes.interactions import bp as interactions_v2_bp
@@ -79,31 +123,18 @@ def create_app():
     app.register_blueprint(analytics_bp, url_prefix="/api/v1/analytics")
     app.register_blueprint(clients_bp, url_prefix="/api/v1/clients")
     app.register_blueprint(inter_bp, url_prefix="/api/v1/interactions")
+    app.register_blueprint(realtime_bp, url_prefix="/api/v1")
+    app.register_blueprint(internal_bp, url_prefix="/api/v1/internal")
+    app.register_blueprint(exports_bp, url_prefix="/api/v1/exports")
+    app.register_blueprint(health_bp, url_prefix="/api/v1")
     # New unified endpoints
     app.register_blueprint(me_bp, url_prefix="/api")
     app.register_blueprint(clients_v2_bp, url_prefix="/api")
     app.register_blueprint(interactions_v2_bp, url_prefix="/api")
 
-    # Health
-    @app.get("/api/v1/health")
-    def health():
-        # Verifica conectividade com o banco
-        try:
-            db.session.execute(text("SELECT 1"))
-            db_ok = True
-            detail = None
-        except Exception as e:
-            db_ok = False
-            detail = str(e)
-
-        payload = {
-            "status": "ok" if db_ok else "error",
-            "db": "ok" if db_ok else "error",
-        }
-        if detail and not db_ok:
-            payload["detail"] = detail
-
-        return jsonify(payload), (200 if db_ok else 500)
+    # Warm-up do worker (utils/warmup.py); os blueprints acima já registraram seus passos
+    from utils import warmup
+    warmup.init_app(app)
 
     # seed opcional (DEV/TEST)
     @app.cli.command("seed_admin")
@@ -112,12 +143,94 @@ def create_app():
             from scripts.seed_admin import run as seed_admin_run
             seed_admin_run()
 
+    # migrações de scripts/migrations (pendentes, em ordem); roda no deploy antes do gunicorn
+    @app.cli.command("migrate")
+    def migrate_cmd():
+        with app.app_context():
+            from scripts.migrate import run as migrate_run
+            print("Migrações aplicadas:", migrate_run() or "nenhuma pendente")
+
+    # massa de dados sintética para testes de desempenho (banco descartável)
+    @app.cli.command("generate_data")
+    @click.option("--users", default=200, show_default=True, help="Usuários (1 ADMIN, ~5% MANAGER, resto BROKER).")
+    @click.option("--clients", default=1_000_000, show_default=True)
+    @click.option("--interactions-per-client", default=12.0, show_default=True, help="Média de interações por cliente.")
+    @click.option("--days", default=730, show_default=True, help="Janela do created_at dos clientes.")
+    @click.option("--owner-skew", default=0.8, show_default=True, help="Expoente Zipf da carteira por corretor.")
+    @click.option("--workers", type=int, default=None, help="Processos de COPY (default: núcleos - 1, até 8).")
+    @click.option("--chunk-size", default=10_000, show_default=True, help="Clientes por fatia/transação.")
+    @click.option("--seed", default=42, show_default=True)
+    @click.option("--truncate", is_flag=True, help="Apaga clientes, interações e usuários gerados antes.")
+    def generate_data_cmd(users, clients, interactions_per_client, days, owner_skew, workers, chunk_size, seed,
+                          truncate):
+        with app.app_context():
+            from scripts import generate_data
+            generate_data.run(
+                users=users, clients=clients, interactions_per_client=interactions_per_client,
+                workers=workers or generate_data.default_workers(), seed=seed, days=days,
+                chunk_size=chunk_size, owner_skew=owner_skew, truncate=truncate,
+            )
+
+    # job periódico dos rollups de analytics (cron)
+    @app.cli.command("refresh_rollups")
+    @click.option("--rebuild", is_flag=True, help="Recalcula os rollups do zero.")
+    def refresh_rollups_cmd(rebuild):
+        with app.app_context():
+            out = rollups.refresh_all(rebuild=rebuild)
+            print("Rollups:", out)
+
+    # snapshot colunar dos relatórios de analytics
+    # (fora dos workers web; --loop regera a cada ANALYTICS_SNAPSHOT_MAX_AGE)
+    @app.cli.command("snapshot_analytics")
+    @click.option("--loop", is_flag=True, help="Regera a cada ANALYTICS_SNAPSHOT_MAX_AGE segundos.")
+    def snapshot_analytics_cmd(loop):
+        with app.app_context():
+            from analytics.columnar import BuildInProgress, build_snapshot, run_builds
+            interval = float(app.config["ANALYTICS_SNAPSHOT_MAX_AGE"])
+            if loop and interval > 0:
+                run_builds(interval)
+                return
+            try:
+                print("Snapshot:", build_snapshot())
+            except BuildInProgress as e:
+                print("Snapshot:", e)
+
+    # scheduler de follow-ups: marca "Atrasado" os vencidos (processo separado ou cron com --once)
+    @app.cli.command("followup_scheduler")
+    @click.option("--once", is_flag=True, help="Executa um único passo e sai.")
+    def followup_scheduler_cmd(once):
+        with app.app_context():
+            from clients.followups import run_scheduler
+            run_scheduler(
+                interval=app.config["FOLLOWUP_SCHEDULER_INTERVAL"],
+                batch_size=app.config["FOLLOWUP_SCHEDULER_BATCH"],
+                once=once,
+            )
+
     return app
 
 
-app = create_app()
+_app = None
+
+
+def get_app():
+    """App do módulo, criado no primeiro uso (importar este módulo não tem efeitos colaterais)."""
+    global _app
+    if _app is None:
+        _app = create_app()
+    return _app
+
+
+def __getattr__(name):
+    # `from app import app`, gunicorn `app:app` e `flask --app app` resolvem por aqui
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
+    app = get_app()
+    db = _imports()[1]
     with app.app_context():
         # opcional: criar tabelas se não usa alembic
         try:
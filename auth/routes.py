@@ -9,9 +9,9 @@ import os
 from extensions import db
 from models.user import User
 from .supabase_middleware import supabase_required
+from utils.query_budget import query_budget
 import time
 import uuid as _uuid
-import jwt as pyjwt
 
 # Registered by app.py at /api/v1/auth
 bp = Blueprint("auth", __name__)
@@ -110,7 +110,7 @@ def register():
         return jsonify({"error": "Local bootstrap failed", "detail": str(e)}), 500
 
     return jsonify({
-        "id": str(user.id),
+        "id": user.id,
         "email": user.email,
         "name": user.name,
         "role": user.role,
@@ -120,6 +120,7 @@ def register():
 
 @bp.route("/me", methods=["GET"])
 @supabase_required()
+@query_budget(3)
 def me():
     # Middleware already validated token, ensured local user, and set g.current_user
     user = getattr(g, "current_user", None)
@@ -132,7 +133,7 @@ def me():
         user = u
 
     return jsonify({
-        "id": str(user.id),
+        "id": user.id,
         "name": user.name or (user.email.split("@")[0] if user.email else None),
         "email": user.email,
         "role": user.role,
@@ -201,6 +202,8 @@ def dev_login():
         claims["aud"] = "authenticated"
 
     secret = current_app.config.get("SUPABASE_JWT_SECRET") or os.getenv("SUPABASE_JWT_SECRET") or "dev-secret"
+    import jwt as pyjwt
+
     token = pyjwt.encode(claims, secret, algorithm="HS256")
 
     return jsonify({
@@ -4,9 +4,6 @@ from typing import Dict, Any
 
 from flask import current_app
 
-# PyJWT is required to validate Supabase tokens
-import jwt as pyjwt
-
 
 class SupabaseAuthError(Exception):
     pass
@@ -17,6 +14,9 @@ def verify_supabase_jwt(token: str) -> Dict[str, Any]:
 
     Requires SUPABASE_JWT_SECRET to be configured.
     """
+    # PyJWT is required to validate Supabase tokens (imported lazily: pulls in cryptography)
+    import jwt as pyjwt
+
     secret = (current_app.config.get("SUPABASE_JWT_SECRET")
               if current_app else os.getenv("SUPABASE_JWT_SECRET"))
     if not secret:
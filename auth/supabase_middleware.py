@@ -7,6 +7,8 @@ from flask import request, jsonify, g, current_app
 
 from extensions import db, bcrypt
 from models.user import User
+from utils import metrics, query_budget, warmup
+from utils.statement_timeout import should_propagate
 from .supabase_auth import verify_supabase_jwt, SupabaseAuthError
 import uuid
 from sqlalchemy import text
@@ -55,12 +57,16 @@ def _ensure_local_user(email: str, name_hint: Optional[str], supabase_sub: str,
     if user:
         return user
 
-    # Fallback to legacy by-email lookup
+    # Fallback to legacy by-email lookup (e.g. users from scripts/seed_admin.py):
+    # one statement on top of the endpoint budget, which still applies.
+    query_budget.allow(1)
     user = db.session.query(User).filter(User.email == email).one_or_none()
     if user:
         return user
 
-    # Auto-provision with a dummy password as Supabase manages credentials
+    # Auto-provision with a dummy password as Supabase manages credentials.
+    # One-off extra statements: keep this request out of the endpoint query budget.
+    query_budget.skip()
     dummy_pw_hash = bcrypt.generate_password_hash("supabase-external").decode("utf-8")
     user = User(
         id=sup_uuid,
@@ -74,6 +80,13 @@ def _ensure_local_user(email: str, name_hint: Optional[str], supabase_sub: str,
     return user
 
 
+@warmup.register("auth")
+def _warm_queries() -> None:
+    """Compile the per-request user lookups (by primary key and by email)."""
+    db.session.get(User, warmup.NIL_ID)
+    db.session.query(User).filter(User.email == "").one_or_none()
+
+
 def supabase_required() -> Callable:
     """Decorator to protect endpoints using a Supabase access token.
 
@@ -92,7 +105,8 @@ def supabase_required() -> Callable:
                 return jsonify({"error": "Unauthorized"}), 401
 
             try:
-                sup_claims = verify_supabase_jwt(token)
+                with metrics.timed("auth"):
+                    sup_claims = verify_supabase_jwt(token)
             except SupabaseAuthError as e:
                 return jsonify({"error": "Unauthorized", "detail": str(e)}), 401
 
@@ -121,6 +135,8 @@ def supabase_required() -> Callable:
                 user = _ensure_local_user(email, name_hint, sup_claims.get("sub"), default_role=default_role)
             except Exception as e:
                 db.session.rollback()
+                if should_propagate(e):
+                    raise  # pool esgotado / statement_timeout: 503/504 em utils/statement_timeout.py
                 return jsonify({"error": "Internal Server Error", "detail": str(e)}), 500
 
             # Normalize claims to mimic previous JWT claims used in the app
@@ -0,0 +1,141 @@
+"""
+Peças comuns dos benchmarks HTTP (bench/load.py, bench/workers.py).
+
+- start_server/stop_server: sobe o app com o gunicorn.conf.py (perfil, workers)
+  contra o Postgres de DATABASE_URL, com o /auth/dev/login habilitado
+- start_latency_proxy: proxy TCP que atrasa cada pacote até o Postgres
+- ensure_schema: cria as tabelas num banco descartável (db.create_all)
+- dev_token: token de um usuário via POST /api/v1/auth/dev/login
+- summarize: requisições, erros, vazão e percentis de uma lista de latências
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import httpx
+from sqlalchemy.engine import make_url
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values) - 1, max(0, round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def summarize(latencies, errors, elapsed):
+    """Latências em segundos (só as bem-sucedidas) -> resumo em ms."""
+    latencies = sorted(latencies)
+    ms = lambda v: round(v * 1000, 2) if v is not None else None  # noqa: E731
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+    }
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return out.stdout.strip() + ("-dirty" if dirty else "") if out.returncode == 0 else None
+    except OSError:
+        return None
+
+
+def start_latency_proxy(database_url, latency_ms, port):
+    """Proxy TCP com atraso para o Postgres de `database_url`; devolve a URL que passa por ele."""
+    url = make_url(database_url)
+    sock_dir = url.query.get("host")
+    delay = latency_ms / 2000.0
+
+    async def pipe(reader, writer):
+        try:
+            while data := await reader.read(65536):
+                await asyncio.sleep(delay)
+                writer.write(data)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle(c_reader, c_writer):
+        if sock_dir:
+            u_reader, u_writer = await asyncio.open_unix_connection(f"{sock_dir}/.s.PGSQL.{url.port or 5432}")
+        else:
+            u_reader, u_writer = await asyncio.open_connection(url.host or "localhost", url.port or 5432)
+        await asyncio.gather(pipe(c_reader, u_writer), pipe(u_reader, c_writer))
+
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(handle, "127.0.0.1", port))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    proxied = url.difference_update_query(["host"]).set(host="127.0.0.1", port=port)
+    return proxied.render_as_string(hide_password=False), server
+
+
+def ensure_schema(database_url):
+    """db.create_all() num subprocesso (tabelas que já existem são mantidas)."""
+    code = (
+        "import app\n"
+        "from extensions import db\n"
+        "a = app.get_app()\n"
+        "with a.app_context():\n"
+        "    db.create_all()\n"
+    )
+    env = dict(os.environ, DATABASE_URL=database_url)
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"create_all falhou: {proc.stderr[-2000:]}")
+
+
+def start_server(profile, port, workers, database_url, extra_env=None):
+    env = dict(os.environ, GUNICORN_PROFILE=profile, PORT=str(port), WEB_CONCURRENCY=str(workers),
+               DATABASE_URL=database_url, DEV_LOGIN_ENABLED="1", **(extra_env or {}))
+    env.setdefault("ANALYTICS_CACHE_TTL", "0")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"gunicorn ({profile}) saiu: {proc.stderr.read().decode()[-2000:]}")
+        try:
+            if httpx.get(f"{base}/api/v1/ready", timeout=1.0).status_code == 200:
+                return proc, base
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.3)
+    proc.terminate()
+    raise RuntimeError(f"gunicorn ({profile}) não respondeu em 30s")
+
+
+def stop_server(proc):
+    proc.terminate()
+    try:
+        proc.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def dev_token(base, email, role):
+    """Headers com o token do usuário; a primeira chamada autenticada provisiona o usuário local."""
+    r = httpx.post(f"{base}/api/v1/auth/dev/login", json={"email": email, "role": role}, timeout=30.0)
+    r.raise_for_status()
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    httpx.get(f"{base}/api/v1/auth/me", headers=headers, timeout=30.0).raise_for_status()
+    return headers
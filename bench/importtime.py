@@ -0,0 +1,98 @@
+"""
+Guarda de regressão do tempo de startup (python -X importtime).
+
+Mede, em subprocessos limpos (melhor de --runs execuções):
+- import:     `import app` — deve ser barato e sem efeitos colaterais
+- create_app: `import app; app.get_app()` — o que um worker/CLI paga no boot
+
+e falha (exit 1) se um orçamento for estourado ou se um módulo pesado que
+deve ser carregado sob demanda aparecer (httpx, jwt/cryptography, numpy...).
+
+Uso:
+    DATABASE_URL=postgresql+psycopg2://... python bench/importtime.py [--runs 5] [--top 15]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PHASES = {
+    "import": {
+        "code": "import app",
+        "budget_ms": 350,
+        # nem config nem SQLAlchemy: importar o módulo não cria nada
+        "forbidden": ["config", "sqlalchemy", "httpx", "jwt", "cryptography", "numpy"],
+    },
+    "create_app": {
+        "code": "import app; app.get_app()",
+        "budget_ms": 1200,
+        "forbidden": ["httpx", "jwt", "cryptography", "numpy", "gevent"],
+    },
+}
+
+
+def measure(code: str) -> dict:
+    """{módulo: (self_us, cumulativo_us)} de uma execução."""
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "postgresql+psycopg2://user@localhost/importtime")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+    mods = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            self_us, cum_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue  # cabeçalho
+        mods[parts[2].strip()] = (self_us, cum_us)
+    return mods
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--top", type=int, default=15)
+    ap.add_argument("--budget-import-ms", type=float, default=PHASES["import"]["budget_ms"])
+    ap.add_argument("--budget-create-ms", type=float, default=PHASES["create_app"]["budget_ms"])
+    args = ap.parse_args(argv)
+    budgets = {"import": args.budget_import_ms, "create_app": args.budget_create_ms}
+
+    report, failures = {}, []
+    for name, phase in PHASES.items():
+        runs = [measure(phase["code"]) for _ in range(args.runs)]
+        # total = soma dos tempos próprios de todos os módulos importados
+        totals = [sum(self_us for self_us, _ in r.values()) for r in runs]
+        best = runs[totals.index(min(totals))]
+        total_ms = round(min(totals) / 1000, 1)
+        heavy = sorted(best.items(), key=lambda kv: kv[1][1], reverse=True)[: args.top]
+        loaded_forbidden = [m for m in phase["forbidden"] if m in best]
+        report[name] = {
+            "totalMs": total_ms,
+            "budgetMs": budgets[name],
+            "forbiddenLoaded": loaded_forbidden,
+            "top": [{"module": m, "cumulativeMs": round(cum / 1000, 1)} for m, (_, cum) in heavy],
+        }
+        if total_ms > budgets[name]:
+            failures.append(f"{name}: {total_ms} ms > orçamento {budgets[name]} ms")
+        if loaded_forbidden:
+            failures.append(f"{name}: módulos que deveriam ser lazy foram importados: {', '.join(loaded_forbidden)}")
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if failures:
+        print("\n".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Teste de carga HTTP reprodutível da API (planejamento de capacidade).
+
+Sobe o app (gunicorn.conf.py) contra o Postgres de DATABASE_URL, cria um
+dataset configurável via API (corretores com tokens do /auth/dev/login,
+clientes e interações por corretor) e roda um mix de operações com
+concorrência fixa por --duration segundos (depois de --warmup segundos
+descartados). Cada thread alterna entre os corretores, sempre sobre os próprios
+clientes (RBAC), e o gerente faz as leituras de analytics de time.
+
+Operações:
+- list:     GET  /api/v1/clients
+- search:   GET  /api/v1/clients?q=<termo>
+- detail:   GET  /api/v1/clients/<id> (com interações)
+- interact: POST /api/v1/interactions (NOTE)
+- kpis:     GET  /api/v1/analytics/broker-kpis
+- team:     GET  /api/v1/analytics/team (MANAGER)
+
+Imprime (e grava em --out) um JSON com vazão e p50/p95/p99 por operação e no
+total, mais o commit, o mix e o dataset, para comparar rodadas entre commits;
+--compare <json anterior> mostra a variação por operação no stderr.
+
+Uso (banco descartável):
+    DATABASE_URL=postgresql+psycopg2://postgres@localhost/i2sales_bench \\
+    SUPABASE_URL=https://example.supabase.co SUPABASE_JWT_SECRET=dev-secret \\
+    python bench/load.py --create-schema --mix browse --concurrency 32 --duration 30 --out var/bench/load.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+
+import httpx
+
+from harness import (
+    dev_token, ensure_schema, git_commit, start_latency_proxy, start_server, stop_server, summarize,
+)
+
+# pesos por operação
+MIXES = {
+    "browse": {"list": 35, "search": 20, "detail": 30, "interact": 10, "kpis": 4, "team": 1},
+    "write": {"list": 20, "detail": 20, "interact": 60},
+    "analytics": {"list": 20, "kpis": 50, "team": 30},
+}
+
+SEARCH_TERMS = ["Silva", "Souza", "Lima", "Costa", "119", "site", "indicacao"]
+SURNAMES = ["Silva", "Souza", "Lima", "Costa", "Pereira", "Almeida", "Rocha"]
+SOURCES = ["site", "indicacao", "instagram", "portal"]
+
+
+class Dataset:
+    def __init__(self):
+        self.brokers = []  # [(headers, [client_id, ...])]
+        self.manager = None
+
+    def describe(self):
+        return {
+            "brokers": len(self.brokers),
+            "clients": sum(len(ids) for _, ids in self.brokers),
+        }
+
+
+def seed(base, brokers, clients_per_broker, interactions_per_client, parallel, seed_value):
+    data = Dataset()
+    data.manager = dev_token(base, "load-manager@example.com", "MANAGER")
+    for b in range(brokers):
+        data.brokers.append((dev_token(base, f"load-broker-{b}@example.com", "BROKER"), []))
+
+    def create(b, i):
+        rng = random.Random(f"{seed_value}:{b}:{i}")  # mesmo cliente em qualquer ordem de execução
+        headers, ids = data.brokers[b]
+        with httpx.Client(base_url=base, headers=headers, timeout=60.0) as c:
+            r = c.post("/api/v1/clients", json={
+                "name": f"Load {rng.choice(SURNAMES)} {b}-{i}",
+                "phone": f"119{b:03d}{i:05d}",
+                "source": rng.choice(SOURCES),
+            })
+            r.raise_for_status()
+            cid = r.json()["id"]
+            for k in range(interactions_per_client):
+                c.post("/api/v1/interactions", json={
+                    "clientId": cid, "type": "NOTE", "observation": f"seed {k}",
+                }).raise_for_status()
+        ids.append(cid)
+
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
+        for f in [pool.submit(create, b, i) for b in range(brokers) for i in range(clients_per_broker)]:
+            f.result()
+    return data
+
+
+def request_for(op, data, rng):
+    """(método, caminho, json, headers) de uma operação."""
+    headers, ids = rng.choice(data.brokers)
+    if op == "list":
+        return "GET", "/api/v1/clients", None, headers
+    if op == "search":
+        return "GET", f"/api/v1/clients?q={rng.choice(SEARCH_TERMS)}", None, headers
+    if op == "detail":
+        return "GET", f"/api/v1/clients/{rng.choice(ids)}", None, headers
+    if op == "interact":
+        return "POST", "/api/v1/interactions", {
+            "clientId": rng.choice(ids), "type": "NOTE", "observation": "load",
+        }, headers
+    if op == "kpis":
+        return "GET", "/api/v1/analytics/broker-kpis", None, headers
+    if op == "team":
+        today = date.today().isoformat()
+        return "GET", f"/api/v1/analytics/team?startDate={today[:4]}-01-01&endDate={today}", None, data.manager
+    raise ValueError(op)
+
+
+def run_mix(base, data, mix, duration, warmup, concurrency, seed_value):
+    ops, weights = zip(*MIXES[mix].items())
+    samples = {op: [] for op in ops}
+    errors = {op: 0 for op in ops}
+    lock = threading.Lock()
+    t_start = time.perf_counter()
+    measure_from = t_start + warmup
+    stop_at = measure_from + duration
+
+    def worker(n):
+        rng = random.Random(seed_value * 1000 + n)
+        local = {op: [] for op in ops}
+        failed = {op: 0 for op in ops}
+        with httpx.Client(base_url=base, timeout=60.0) as c:
+            while (now := time.perf_counter()) < stop_at:
+                op = rng.choices(ops, weights)[0]
+                method, path, body, headers = request_for(op, data, rng)
+                t0 = time.perf_counter()
+                try:
+                    ok = c.request(method, path, json=body, headers=headers).status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                if now < measure_from:
+                    continue
+                if ok:
+                    local[op].append(time.perf_counter() - t0)
+                else:
+                    failed[op] += 1
+        with lock:
+            for op in ops:
+                samples[op].extend(local[op])
+                errors[op] += failed[op]
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - measure_from
+
+    endpoints = {op: summarize(samples[op], errors[op], elapsed) for op in ops}
+    total = summarize([v for op in ops for v in samples[op]], sum(errors.values()), elapsed)
+    return total, endpoints
+
+
+def compare(previous, current):
+    """Variação por operação (rps e p95) em relação a um resultado anterior."""
+    lines = [f"comparando com {previous['meta'].get('commit')} ({previous['meta'].get('mix')}):"]
+    for op, cur in {"total": current["total"], **current["endpoints"]}.items():
+        old = previous["total"] if op == "total" else previous["endpoints"].get(op)
+        if not old or not old.get("rps") or not old.get("p95_ms") or not cur.get("p95_ms"):
+            continue
+        d_rps = (cur["rps"] - old["rps"]) / old["rps"] * 100
+        d_p95 = (cur["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100
+        lines.append(f"  {op:<9} rps {old['rps']:>8} -> {cur['rps']:>8} ({d_rps:+.1f}%)   "
+                     f"p95 {old['p95_ms']:>8} -> {cur['p95_ms']:>8} ms ({d_p95:+.1f}%)")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--mix", choices=sorted(MIXES), default="browse")
+    ap.add_argument("--duration", type=float, default=30.0)
+    ap.add_argument("--warmup", type=float, default=5.0)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--brokers", type=int, default=10)
+    ap.add_argument("--clients-per-broker", type=int, default=50)
+    ap.add_argument("--interactions-per-client", type=int, default=2)
+    ap.add_argument("--seed-parallel", type=int, default=8)
+    ap.add_argument("--seed", type=int, default=42, help="semente do dataset e da sequência de operações")
+    ap.add_argument("--profile", default="sync", help="perfil do gunicorn.conf.py (sync|gevent)")
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--port", type=int, default=5057)
+    ap.add_argument("--db-latency-ms", type=float, default=0.0)
+    ap.add_argument("--base-url", help="usar um servidor já no ar (DEV_LOGIN_ENABLED=1) em vez de subir um")
+    ap.add_argument("--create-schema", action="store_true", help="db.create_all() antes de subir o app")
+    ap.add_argument("--out", help="grava o JSON do resultado neste arquivo")
+    ap.add_argument("--compare", help="JSON de uma rodada anterior para comparar")
+    args = ap.parse_args(argv)
+
+    proc = None
+    if args.base_url:
+        base = args.base_url.rstrip("/")
+    else:
+        database_url = os.environ["DATABASE_URL"]
+        if args.create_schema:
+            ensure_schema(database_url)
+        if args.db_latency_ms > 0:
+            database_url, _ = start_latency_proxy(database_url, args.db_latency_ms, args.port + 1)
+        proc, base = start_server(args.profile, args.port, args.workers, database_url)
+    try:
+        t0 = time.perf_counter()
+        data = seed(base, args.brokers, args.clients_per_broker, args.interactions_per_client,
+                    args.seed_parallel, args.seed)
+        print(f"dataset {data.describe()} em {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+        total, endpoints = run_mix(base, data, args.mix, args.duration, args.warmup, args.concurrency, args.seed)
+    finally:
+        if proc is not None:
+            stop_server(proc)
+
+    result = {
+        "meta": {
+            "commit": git_commit(),
+            "at": datetime.now(timezone.utc).isoformat(),
+            "mix": args.mix,
+            "weights": MIXES[args.mix],
+            "concurrency": args.concurrency,
+            "durationS": args.duration,
+            "profile": None if args.base_url else args.profile,
+            "workers": None if args.base_url else args.workers,
+            "dbLatencyMs": args.db_latency_ms,
+            "seed": args.seed,
+            "dataset": {**data.describe(), "interactionsPerClient": args.interactions_per_client},
+        },
+        "total": total,
+        "endpoints": endpoints,
+    }
+    out = json.dumps(result, indent=2)
+    print(out)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            f.write(out + "\n")
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare(json.load(f), result), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Validação de token nos dois verificadores (auth/supabase_auth.py e utils/supabase_jwt.py)."""
+
+import json
+import time
+import uuid
+
+import pytest
+
+jwt = pytest.importorskip("jwt")
+
+SECRET = "microbench-secret"
+ISS = "https://example.supabase.co/auth/v1"
+
+
+def _claims():
+    now = int(time.time())
+    return {
+        "iss": ISS,
+        "sub": str(uuid.uuid4()),
+        "aud": "authenticated",
+        "email": "broker@example.com",
+        "iat": now,
+        "exp": now + 3600,
+        "role": "authenticated",
+        "user_metadata": {"email": "broker@example.com", "role": "BROKER", "name": "Corretor"},
+        "app_metadata": {"provider": "email", "providers": ["email"]},
+    }
+
+
+def test_supabase_auth_hs256(benchmark, app_ctx):
+    from auth.supabase_auth import verify_supabase_jwt
+
+    app_ctx.config["SUPABASE_JWT_SECRET"] = SECRET
+    token = jwt.encode(_claims(), SECRET, algorithm="HS256")
+    claims = benchmark(verify_supabase_jwt, token)
+    assert claims["email"] == "broker@example.com"
+
+
+def test_supabase_jwt_hs256(benchmark, app_ctx):
+    from utils.supabase_jwt import verify_supabase_jwt
+
+    app_ctx.config.update(SUPABASE_JWT_SECRET=SECRET, SUPABASE_JWT_AUD="authenticated")
+    token = jwt.encode(_claims(), SECRET, algorithm="HS256")
+    claims = benchmark(verify_supabase_jwt, token)
+    assert claims
+
+
+def test_supabase_jwt_rs256(benchmark, app_ctx):
+    pytest.importorskip("cryptography")
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from utils import supabase_jwt
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(key.public_key()))
+    jwk.update(kid="bench", alg="RS256", use="sig")
+    app_ctx.config["SUPABASE_JWT_AUD"] = "authenticated"
+    # JWKS já em cache, como depois do warm-up: mede só a validação
+    supabase_jwt._jwks_cache[supabase_jwt._jwks_url()] = {"keys": [jwk]}
+    token = jwt.encode(_claims(), key, algorithm="RS256", headers={"kid": "bench"})
+    claims = benchmark(supabase_jwt.verify_supabase_jwt, token)
+    assert claims
@@ -0,0 +1,19 @@
+"""Escrita do CSV do export de clientes (mesmo caminho de clients/routes.py::export_clients)."""
+
+import csv
+import io
+
+
+def test_export_csv(benchmark, clients_export):
+    from clients.routes import EXPORT_HEADER, _export_row
+
+    def write():
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(EXPORT_HEADER)
+        for c in clients_export:
+            writer.writerow(_export_row(c))
+        return output.getvalue()
+
+    data = benchmark(write)
+    assert data.count("\n") == 5001
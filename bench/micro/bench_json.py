@@ -0,0 +1,68 @@
+"""
+Serialização JSON das respostas: JSONProvider do app (utils/json_provider.py,
+orjson com UUID/datetime/Decimal nativos) contra o caminho anterior (conversão
+campo a campo com str/float/isoformat + json da stdlib via DefaultJSONProvider
+do Flask), para uma página de 200 clientes e um histórico de 5000 interações.
+"""
+
+import pytest
+from flask.json.provider import DefaultJSONProvider
+
+
+def _legacy_client(c):
+    return {
+        "id": str(c.id),
+        "name": c.name,
+        "phone": c.phone,
+        "source": c.source,
+        "status": c.status,
+        "email": c.email,
+        "observations": c.observations,
+        "product": c.product,
+        "propertyValue": float(c.property_value) if c.property_value is not None else None,
+        "followUpState": c.follow_up_state,
+        "followUpDueAt": c.follow_up_due_at.isoformat() if c.follow_up_due_at else None,
+        "createdAt": c.created_at.isoformat() if c.created_at else None,
+        "updatedAt": c.updated_at.isoformat() if c.updated_at else None,
+    }
+
+
+def _legacy_interaction(i):
+    return {
+        "id": str(i.id),
+        "type": i.type,
+        "observation": i.observation,
+        "fromStatus": i.from_status,
+        "toStatus": i.to_status,
+        "createdAt": i.created_at.isoformat() if i.created_at else None,
+    }
+
+
+@pytest.fixture
+def legacy_json(request_ctx):
+    return DefaultJSONProvider(request_ctx)
+
+
+def test_client_page_stdlib(benchmark, request_ctx, legacy_json, clients_page):
+    resp = benchmark(lambda: legacy_json.response([_legacy_client(c) for c in clients_page]))
+    assert resp.status_code == 200
+
+
+def test_client_page_orjson(benchmark, request_ctx, clients_page):
+    from clients.routes import _camel_client
+
+    resp = benchmark(lambda: request_ctx.json.response([_camel_client(c) for c in clients_page]))
+    assert resp.status_code == 200
+
+
+def test_interaction_history_stdlib(benchmark, request_ctx, legacy_json, interactions_history):
+    resp = benchmark(lambda: legacy_json.response([_legacy_interaction(i) for i in interactions_history]))
+    assert resp.status_code == 200
+
+
+def test_interaction_history_orjson(benchmark, request_ctx, interactions_history):
+    from clients.routes import _camel_interaction
+
+    resp = benchmark(lambda: request_ctx.json.response([_camel_interaction(i) for i in interactions_history]))
+    assert resp.status_code == 200
+
@@ -0,0 +1,23 @@
+"""Checagens de RBAC por registro e por rota."""
+
+from flask import g
+
+
+def test_ensure_client_access_page(benchmark, request_ctx, clients_page):
+    from utils.rbac import ensure_client_access_or_403
+
+    g.jwt = {"sub": str(clients_page[0].owner_id), "role": "BROKER"}
+    owners = [c.owner_id for c in clients_page]
+    denied = benchmark(lambda: sum(ensure_client_access_or_403(o) is not None for o in owners))
+    assert 0 < denied < len(owners)
+
+
+def test_require_roles(benchmark, request_ctx):
+    from utils.rbac import require_roles
+
+    @require_roles("MANAGER", "ADMIN")
+    def view():
+        return "ok"
+
+    g.jwt = {"sub": "x", "role": "ADMIN"}
+    assert benchmark(lambda: [view() for _ in range(200)])[0] == "ok"
@@ -0,0 +1,34 @@
+"""Serialização das respostas: listagem de clientes, detalhe com interações, helpers de casing."""
+
+from utils.casing import dict_keys_to_camel, sa_model_to_dict
+
+
+def test_camel_client_page(benchmark, clients_page):
+    from clients.routes import _camel_client
+
+    items = benchmark(lambda: [_camel_client(c) for c in clients_page])
+    assert len(items) == 200
+
+
+def test_camel_interaction_detail(benchmark, interactions_detail):
+    from clients.routes import _camel_interaction
+
+    items = benchmark(lambda: [_camel_interaction(i) for i in interactions_detail])
+    assert len(items) == 30
+
+
+def test_sa_model_to_dict_page(benchmark, clients_page):
+    items = benchmark(lambda: [sa_model_to_dict(c) for c in clients_page])
+    assert "followUpState" in items[0]
+
+
+def test_dict_keys_to_camel_page(benchmark, clients_page, interactions_detail):
+    payload = [
+        {
+            **sa_model_to_dict(c, camel=False),
+            "recent_interactions": [sa_model_to_dict(i, camel=False) for i in interactions_detail[:3]],
+        }
+        for c in clients_page
+    ]
+    out = benchmark(dict_keys_to_camel, payload)
+    assert "recentInteractions" in out[0]
@@ -0,0 +1,114 @@
+"""
+Fixtures dos microbenchmarks: app sem banco (o engine é criado mas nunca
+conecta) e dados em memória com tamanhos de produção: listagem de 200
+clientes, detalhe com 30 interações, histórico de 5000 interações, export de
+5000 linhas.
+"""
+
+import os
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg2://bench@localhost/microbench")
+os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "microbench-secret")
+os.environ.update(METRICS_ENABLED="0", SLOW_QUERY_MS="0", QUERY_BUDGET_MODE="off", REALTIME_ENABLED="0")
+
+STATUSES = ["Primeiro Atendimento", "Em Tratativa", "Proposta", "Fechado", "Perdido"]
+FOLLOW_UPS = ["Sem Follow Up", "Ativo", "Atrasado", "Concluido"]
+
+
+@pytest.fixture(scope="session")
+def app():
+    import app as app_module
+
+    return app_module.get_app()
+
+
+@pytest.fixture
+def app_ctx(app):
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def request_ctx(app):
+    with app.test_request_context():
+        yield app
+
+
+def make_clients(n, seed=1):
+    from models.client import Client
+
+    rng = random.Random(seed)
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    owners = [uuid.UUID(int=rng.getrandbits(128)) for _ in range(20)]
+    out = []
+    for i in range(n):
+        created = now - timedelta(days=rng.randint(0, 720), seconds=rng.randint(0, 86400))
+        out.append(Client(
+            id=uuid.UUID(int=rng.getrandbits(128)),
+            name=f"Cliente {i} {rng.choice(['Silva', 'Souza', 'Lima', 'Costa'])}",
+            phone=f"1199{rng.randint(0, 9999999):07d}",
+            email=f"cliente{i}@example.com" if rng.random() < 0.7 else None,
+            source=rng.choice(["site", "indicacao", "instagram", "portal"]),
+            status=rng.choice(STATUSES),
+            owner_id=rng.choice(owners),
+            observations="Interessado em apartamento de 2 quartos" if rng.random() < 0.4 else None,
+            product=rng.choice(["Residencial Aurora", "Vila Verde", None]),
+            property_value=Decimal(rng.randint(150_000, 1_500_000)) if rng.random() < 0.6 else None,
+            follow_up_state=rng.choice(FOLLOW_UPS),
+            follow_up_due_at=created + timedelta(days=3) if rng.random() < 0.5 else None,
+            created_at=created,
+            updated_at=created + timedelta(hours=rng.randint(0, 500)),
+        ))
+    return out
+
+
+def make_interactions(n, client_id, seed=2):
+    from models.interaction import Interaction
+
+    rng = random.Random(seed)
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        Interaction(
+            id=uuid.UUID(int=rng.getrandbits(128)),
+            client_id=client_id,
+            user_id=uuid.UUID(int=rng.getrandbits(128)),
+            type=rng.choice(["NOTE", "STATUS_CHANGE", "CALL"]),
+            observation="Ligou e pediu retorno na semana que vem",
+            from_status=rng.choice(STATUSES),
+            to_status=rng.choice(STATUSES),
+            created_at=now - timedelta(hours=i),
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.fixture(scope="session")
+def clients_page():
+    return make_clients(200)
+
+
+@pytest.fixture(scope="session")
+def clients_export():
+    return make_clients(5000, seed=3)
+
+
+@pytest.fixture(scope="session")
+def interactions_detail():
+    return make_interactions(30, uuid.uuid4())
+
+
+@pytest.fixture(scope="session")
+def interactions_history():
+    return make_interactions(5000, uuid.uuid4(), seed=4)
@@ -0,0 +1,82 @@
+"""
+Guarda de regressão dos microbenchmarks (bench/micro, pytest-benchmark).
+
+    python bench/micro/gate.py save
+        roda a suíte e grava a baseline local (var/benchmarks/<máquina>/*_baseline.json)
+    python bench/micro/gate.py check [--threshold 25]
+        roda a suíte e falha se a mediana de algum benchmark piorar mais que o limiar (%)
+        em relação à baseline local
+    python bench/micro/gate.py check --base-ref origin/main [--threshold 25]
+        roda a suíte do ref num git worktree e a do checkout atual na mesma máquina e compara
+        (é o que a CI faz: baselines de outra máquina não são comparáveis)
+
+O limiar também vem de MICROBENCH_THRESHOLD (default 25; runners compartilhados de CI oscilam 10-20%).
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+LOCAL_STORAGE = ROOT / "var" / "benchmarks"
+
+
+def pytest_cmd(tree: Path, storage: Path, *extra):
+    return [
+        sys.executable, "-m", "pytest", str(tree / "bench" / "micro"),
+        "-c", str(tree / "bench" / "micro" / "pytest.ini"),
+        f"--benchmark-storage=file://{storage}", *extra,
+    ]
+
+
+def run(cmd, cwd):
+    print("+", " ".join(cmd), file=sys.stderr)
+    return subprocess.run(cmd, cwd=cwd).returncode
+
+
+def save():
+    for old in LOCAL_STORAGE.glob("*/*_baseline.json"):
+        old.unlink()
+    return run(pytest_cmd(ROOT, LOCAL_STORAGE, "--benchmark-save=baseline"), ROOT)
+
+
+def check(threshold: int, base_ref: str | None):
+    fail = f"--benchmark-compare-fail=median:{threshold}%"
+    if not base_ref:
+        if not list(LOCAL_STORAGE.glob("*/*_baseline.json")):
+            print("sem baseline local: rode `python bench/micro/gate.py save` antes", file=sys.stderr)
+            return 2
+        return run(pytest_cmd(ROOT, LOCAL_STORAGE, "--benchmark-compare=*_baseline", fail), ROOT)
+
+    tmp = Path(tempfile.mkdtemp(prefix="microbench-"))
+    worktree, storage = tmp / "base", tmp / "storage"
+    try:
+        if run(["git", "worktree", "add", "--detach", str(worktree), base_ref], ROOT) != 0:
+            return 2
+        if not (worktree / "bench" / "micro").is_dir():
+            print(f"{base_ref} não tem bench/micro: nada para comparar", file=sys.stderr)
+            return 0
+        if run(pytest_cmd(worktree, storage, "--benchmark-save=base"), worktree) != 0:
+            return 2
+        return run(pytest_cmd(ROOT, storage, "--benchmark-compare=0001", fail), ROOT)
+    finally:
+        subprocess.run(["git", "worktree", "remove", "--force", str(worktree)], cwd=ROOT, capture_output=True)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("command", choices=["save", "check"])
+    ap.add_argument("--threshold", type=int, default=int(os.getenv("MICROBENCH_THRESHOLD", "25")),
+                    help="piora máxima da mediana, em %% inteiro")
+    ap.add_argument("--base-ref")
+    args = ap.parse_args(argv)
+    sys.exit(save() if args.command == "save" else check(args.threshold, args.base_ref))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark de carga dos perfis do gunicorn (gunicorn.conf.py).
+
+Sobe o app com cada perfil contra o Postgres de DATABASE_URL, cria dados via
+API (token do /auth/dev/login) e mede vazão e latência (p50/p95/p99) de:
+- clients_list:       GET  /api/v1/clients
+- interaction_create: POST /api/v1/interactions (NOTE)
+
+Com Postgres local a latência de rede é ~0 e o teste fica limitado por CPU;
+--db-latency-ms coloca um proxy TCP entre o app e o banco que atrasa cada
+pacote (metade em cada sentido), simulando o RTT até o Supabase.
+
+Uso (Postgres local, banco descartável):
+    DATABASE_URL=postgresql+psycopg2://postgres@localhost/i2sales_bench \\
+    SUPABASE_URL=https://example.supabase.co SUPABASE_JWT_SECRET=dev-secret \\
+    python bench/workers.py --profiles sync,gevent --duration 20 --concurrency 64 --db-latency-ms 5
+
+Imprime um JSON com um resultado por (perfil, cenário). Servidor, proxy e
+resumo vêm de bench/harness.py; para mixes da API inteira, ver bench/load.py.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+import httpx
+
+from harness import dev_token, start_latency_proxy, start_server, stop_server, summarize
+
+
+def seed(base, headers, n):
+    ids = []
+    with httpx.Client(base_url=base, headers=headers, timeout=30.0) as c:
+        for i in range(n):
+            r = c.post("/api/v1/clients", json={"name": f"Bench {i}", "phone": f"1199{i:07d}", "source": "bench"})
+            r.raise_for_status()
+            ids.append(r.json()["id"])
+    return ids
+
+
+def run_load(base, headers, scenario, client_ids, duration, concurrency):
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def worker():
+        local, failed = [], 0
+        with httpx.Client(base_url=base, headers=headers, timeout=60.0) as c:
+            while time.perf_counter() < stop_at:
+                t0 = time.perf_counter()
+                try:
+                    if scenario == "clients_list":
+                        r = c.get("/api/v1/clients")
+                    else:
+                        r = c.post("/api/v1/interactions", json={
+                            "clientId": random.choice(client_ids), "type": "NOTE", "observation": "bench",
+                        })
+                    ok = r.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    local.append(time.perf_counter() - t0)
+                else:
+                    failed += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    return summarize(latencies, errors[0], elapsed)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--profiles", default="sync,gevent")
+    ap.add_argument("--scenarios", default="clients_list,interaction_create")
+    ap.add_argument("--duration", type=float, default=20.0)
+    ap.add_argument("--concurrency", type=int, default=64)
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--seed-clients", type=int, default=200)
+    ap.add_argument("--port", type=int, default=5055)
+    ap.add_argument("--db-latency-ms", type=float, default=0.0)
+    args = ap.parse_args(argv)
+
+    database_url = os.environ["DATABASE_URL"]
+    if args.db_latency_ms > 0:
+        database_url, _ = start_latency_proxy(database_url, args.db_latency_ms, args.port + 1)
+
+    results = []
+    for profile in args.profiles.split(","):
+        proc, base = start_server(profile, args.port, args.workers, database_url)
+        try:
+            headers = dev_token(base, "bench-broker@example.com", "BROKER")
+            client_ids = seed(base, headers, args.seed_clients)
+            for scenario in args.scenarios.split(","):
+                res = run_load(base, headers, scenario, client_ids, args.duration, args.concurrency)
+                results.append({
+                    "profile": profile, "scenario": scenario, "concurrency": args.concurrency,
+                    "dbLatencyMs": args.db_latency_ms, **res,
+                })
+                print(json.dumps(results[-1]), file=sys.stderr)
+        finally:
+            stop_server(proc)
+    print(json.dumps({"results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Follow-ups com vencimento.
+
+- `parse_due_at`: valida o `dueAt`/`followUpDueAt` recebido pela API.
+- `mark_overdue`: passo do scheduler (`flask followup_scheduler`). Marca como
+  "Atrasado" os clientes com follow-up "Ativo" vencido, em UPDATEs em lote
+  guiados pelo índice parcial ix_clients_follow_up_due_pending; o rollup de
+  clientes e as notificações do stream (realtime/) vão na mesma transação.
+"""
+
+import time
+from datetime import datetime, timezone
+
+from flask import current_app
+from sqlalchemy import text
+
+from extensions import db
+from analytics import rollups
+from analytics.cache import invalidate_owner
+from realtime import events
+
+# Estados em que o follow-up ainda está pendente (aparece na worklist)
+PENDING_STATES = ("Ativo", "Atrasado")
+# Estados que encerram o follow-up (limpa o vencimento)
+CLOSED_STATES = {"Sem Follow Up", "Concluido", "Concluído", "Cancelado", "Perdido"}
+
+
+class InvalidDueAt(ValueError):
+    pass
+
+
+def parse_due_at(value):
+    """ISO 8601 -> datetime com fuso (sem fuso = UTC); None/'' -> None."""
+    if value in (None, ""):
+        return None
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        raise InvalidDueAt(f"data inválida: {value}")
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+_MARK_OVERDUE_SQL = text(
+    """
+    WITH due AS (
+        SELECT id
+        FROM public.clients
+        WHERE follow_up_state = 'Ativo'
+          AND follow_up_due_at IS NOT NULL
+          AND follow_up_due_at < now()
+        ORDER BY follow_up_due_at
+        LIMIT :batch
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE public.clients c
+    SET follow_up_state = 'Atrasado'
+    FROM due
+    WHERE c.id = due.id
+    RETURNING c.id, c.owner_id, c.created_at, c.status
+    """
+)
+
+
+def mark_overdue(batch_size: int = 500) -> int:
+    """Marca todos os follow-ups vencidos, `batch_size` por transação. Retorna o total."""
+    total = 0
+    while True:
+        rows = db.session.execute(_MARK_OVERDUE_SQL, {"batch": batch_size}).all()
+        if rows and rollups.enabled():
+            deltas: dict = {}
+            for _, owner_id, created_at, status in rows:
+                before = rollups.client_key(owner_id, created_at, status, "Ativo")
+                after = rollups.client_key(owner_id, created_at, status, "Atrasado")
+                deltas[before] = deltas.get(before, 0) - 1
+                deltas[after] = deltas.get(after, 0) + 1
+            rollups.apply_client_deltas(db.session.connection(), deltas)
+        if rows and events.enabled():
+            events.publish(db.session.connection(), (
+                {"t": "client", "op": "update", "id": str(r.id), "owner": str(r.owner_id) if r.owner_id else None}
+                for r in rows
+            ))
+        db.session.commit()
+        if rows:
+            invalidate_owner(*{r.owner_id for r in rows})
+        total += len(rows)
+        if len(rows) < batch_size:
+            return total
+
+
+def run_scheduler(interval: float = 60.0, batch_size: int = 500, once: bool = False) -> None:
+    while True:
+        started = time.monotonic()
+        try:
+            n = mark_overdue(batch_size)
+            if n:
+                current_app.logger.info("[followups] %s follow-up(s) marcados como Atrasado", n)
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception("[followups] falha ao marcar atrasados")
+        finally:
+            db.session.remove()
+        if once:
+            return
+        time.sleep(max(0.0, interval - (time.monotonic() - started)))
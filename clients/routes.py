@@ -1,7 +1,7 @@
 # clients/routes.py
 from flask import Blueprint, request, jsonify, Response, g
 from sqlalchemy.exc import IntegrityError
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal, InvalidOperation
 import uuid
 import csv
@@ -12,6 +12,13 @@ from models.client import Client
 from models.interaction import Interaction
 from utils.rbac import ensure_client_access_or_403, require_roles
 from auth.supabase_middleware import supabase_required
+from analytics.cache import invalidate_owner
+from utils import warmup
+from utils.query_budget import query_budget
+from utils.idempotency import idempotent
+from utils.replica import read_replica
+from utils.statement_timeout import should_propagate, statement_timeout
+from clients.followups import InvalidDueAt, parse_due_at, PENDING_STATES, CLOSED_STATES
 
 # Blueprint sem prefixo interno; app.py define /api/v1/clients
 bp = Blueprint("clients", __name__)
@@ -46,18 +53,18 @@ def _to_decimal(val):
 
 def _camel_interaction(i: Interaction) -> dict:
     return {
-        "id": str(i.id),
+        "id": i.id,
         "type": i.type,
         "observation": i.observation,
         "fromStatus": i.from_status,
         "toStatus": i.to_status,
-        "createdAt": i.created_at.isoformat() if i.created_at else None,
+        "createdAt": i.created_at,
     }
 
 
 def _camel_client(c: Client, with_interactions=False) -> dict:
     base = {
-        "id": str(c.id),
+        "id": c.id,
         "name": c.name,
         "phone": c.phone,
         "source": c.source,
@@ -65,10 +72,11 @@ def _camel_client(c: Client, with_interactions=False) -> dict:
         "email": c.email,
         "observations": c.observations,
         "product": c.product,
-        "propertyValue": float(c.property_value) if c.property_value is not None else None,
+        "propertyValue": c.property_value,
         "followUpState": c.follow_up_state,
-        "createdAt": c.created_at.isoformat() if c.created_at else None,
-        "updatedAt": c.updated_at.isoformat() if c.updated_at else None,
+        "followUpDueAt": c.follow_up_due_at,
+        "createdAt": c.created_at,
+        "updatedAt": c.updated_at,
     }
     if with_interactions:
         interactions = (
@@ -90,6 +98,8 @@ def _normalize_follow_up(value: str | None) -> str | None:
 
 @bp.post("")
 @supabase_required()
+@idempotent
+@query_budget(10)
 def create_client():
     payload = request.get_json(silent=True) or {}
 
@@ -105,6 +115,10 @@ def create_client():
         return jsonify({"error": f"followUpState inválido: {follow_up}"}), 400
     if not name or not phone:
         return jsonify({"error": "name e phone são obrigatórios"}), 400
+    try:
+        due_at = parse_due_at(payload.get("followUpDueAt"))
+    except InvalidDueAt as e:
+        return jsonify({"error": f"followUpDueAt inválido: {e}"}), 400
 
     j = getattr(g, "jwt", {})
     owner_uuid = j.get("sub")
@@ -120,6 +134,7 @@ def create_client():
         product=payload.get("product"),
         property_value=_to_decimal(payload.get("propertyValue")),
         follow_up_state=follow_up,
+        follow_up_due_at=due_at if follow_up not in CLOSED_STATES else None,
         owner_id=owner_uuid,
         created_at=_now(),
         updated_at=_now(),
@@ -144,20 +159,32 @@ def create_client():
         return jsonify({"error": "Violação de integridade", "detail": str(e.orig)}), 400
     except Exception as e:
         db.session.rollback()
+        if should_propagate(e):  # 503/504 dos handlers de utils/statement_timeout
+            raise
         return jsonify({"error": "Internal Server Error", "detail": str(e)}), 500
 
+    invalidate_owner(owner_uuid)
     return jsonify(_camel_client(client)), 201
 
 
 @bp.get("")
 @supabase_required()
+@read_replica
+@query_budget(3)
+@statement_timeout(5000)
 def list_clients():
     j = getattr(g, "jwt", {})
     q = (request.args.get("q") or "").strip()
-    qry = Client.query
     # RBAC: brokers só veem seus registros
-    if j.get("role") == "BROKER":
-        qry = qry.filter(Client.owner_id == j.get("sub"))
+    owner_id = j.get("sub") if j.get("role") == "BROKER" else None
+    items = [_camel_client(c) for c in _list_query(owner_id, q).all()]
+    return jsonify(items), 200
+
+
+def _list_query(owner_id=None, q=""):
+    qry = Client.query
+    if owner_id:
+        qry = qry.filter(Client.owner_id == owner_id)
     if q:
         ilike = f"%{q}%"
         qry = qry.filter(
@@ -168,12 +195,49 @@ def list_clients():
         )
     # ordem recente primeiro
     qry = qry.order_by(Client.updated_at.desc().nullslast(), Client.created_at.desc().nullslast())
-    items = [_camel_client(c) for c in qry.limit(200).all()]
+    return qry.limit(200)
+
+
+@warmup.register("clients")
+def _warm_queries():
+    # listagem do corretor, detalhe e interações do detalhe
+    _list_query(warmup.NIL_ID).all()
+    db.session.get(Client, warmup.NIL_ID)
+    Interaction.query.filter_by(client_id=warmup.NIL_ID).order_by(Interaction.created_at.desc()).all()
+
+
+@bp.get("/follow-ups")
+@supabase_required()
+@read_replica
+@query_budget(3)
+@statement_timeout(5000)
+def follow_up_worklist():
+    """Follow-ups pendentes (Ativo/Atrasado) vencendo nas próximas `withinHours` horas, por vencimento."""
+    j = getattr(g, "jwt", {})
+    broker_id = request.args.get("brokerId")
+    if j.get("role") == "BROKER":
+        broker_id = j.get("sub")
+    try:
+        within = float(request.args.get("withinHours", 24))
+        limit = min(200, max(1, int(request.args.get("limit", 200))))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Dados inválidos."}), 400
+
+    qry = Client.query.filter(
+        Client.follow_up_state.in_(PENDING_STATES),
+        Client.follow_up_due_at.isnot(None),
+        Client.follow_up_due_at <= _now() + timedelta(hours=within),
+    )
+    if broker_id:
+        qry = qry.filter(Client.owner_id == broker_id)
+    items = [_camel_client(c) for c in qry.order_by(Client.follow_up_due_at.asc()).limit(limit).all()]
     return jsonify(items), 200
 
 
 @bp.get("/<uuid:client_id>")
 @supabase_required()
+@read_replica
+@query_budget(4)
 def get_client(client_id: uuid.UUID):
     c = Client.query.get(client_id)
     if not c:
@@ -186,6 +250,7 @@ def get_client(client_id: uuid.UUID):
 
 @bp.put("/<uuid:client_id>")
 @supabase_required()
+@query_budget(6)
 def update_client(client_id: uuid.UUID):
     c = Client.query.get(client_id)
     if not c:
@@ -212,26 +277,75 @@ def update_client(client_id: uuid.UUID):
         if new_fu not in VALID_FU:
             return jsonify({"error": f"followUpState inválido: {new_fu}"}), 400
         c.follow_up_state = new_fu
+        if new_fu in CLOSED_STATES:
+            c.follow_up_due_at = None
+    if "followUpDueAt" in data:
+        try:
+            c.follow_up_due_at = parse_due_at(data.get("followUpDueAt"))
+        except InvalidDueAt as e:
+            return jsonify({"error": f"followUpDueAt inválido: {e}"}), 400
+        # novo vencimento no futuro reabre um follow-up atrasado
+        if c.follow_up_state == "Atrasado" and c.follow_up_due_at and c.follow_up_due_at > _now():
+            c.follow_up_state = "Ativo"
 
     c.updated_at = _now()
+    owner_id = c.owner_id
     db.session.commit()
+    invalidate_owner(owner_id)
     return jsonify(_camel_client(c)), 200
 
 
 @bp.delete("/<uuid:client_id>")
 @supabase_required()
 @require_roles("ADMIN")
+@query_budget(6)
 def delete_client(client_id: uuid.UUID):
     c = Client.query.get(client_id)
     if not c:
         return jsonify({"error": "Not Found"}), 404
+    owner_id = c.owner_id
     db.session.delete(c)
     db.session.commit()
+    invalidate_owner(owner_id)
     return Response(status=204)
 
 
+EXPORT_HEADER = [
+    "id",
+    "name",
+    "phone",
+    "email",
+    "source",
+    "status",
+    "followUpState",
+    "product",
+    "propertyValue",
+    "createdAt",
+    "updatedAt",
+]
+
+
+def _export_row(c: Client) -> list:
+    return [
+        str(c.id),
+        c.name or "",
+        c.phone or "",
+        c.email or "",
+        c.source or "",
+        c.status or "",
+        c.follow_up_state or "",
+        c.product or "",
+        f"{c.property_value}" if c.property_value is not None else "",
+        c.created_at.isoformat() if c.created_at else "",
+        c.updated_at.isoformat() if c.updated_at else "",
+    ]
+
+
 @bp.get("/export")
 @supabase_required()
+@read_replica
+@query_budget(3)
+@statement_timeout(60000)
 def export_clients():
     j = getattr(g, "jwt", {})
     qry = Client.query
@@ -239,32 +353,8 @@ def export_clients():
         qry = qry.filter(Client.owner_id == j.get("sub"))
     output = io.StringIO()
     writer = csv.writer(output)
-    writer.writerow([
-        "id",
-        "name",
-        "phone",
-        "email",
-        "source",
-        "status",
-        "followUpState",
-        "product",
-        "propertyValue",
-        "createdAt",
-        "updatedAt",
-    ])
+    writer.writerow(EXPORT_HEADER)
     for c in qry.order_by(Client.created_at.desc().nullslast()).all():
-        writer.writerow([
-            str(c.id),
-            c.name or "",
-            c.phone or "",
-            c.email or "",
-            c.source or "",
-            c.status or "",
-            c.follow_up_state or "",
-            c.product or "",
-            f"{c.property_value}" if c.property_value is not None else "",
-            c.created_at.isoformat() if c.created_at else "",
-            c.updated_at.isoformat() if c.updated_at else "",
-        ])
+        writer.writerow(_export_row(c))
     csv_data = output.getvalue()
     return Response(csv_data, mimetype="text/csv; charset=utf-8"), 200
@@ -1,6 +1,5 @@
 # config.py
 import os
-import socket
 from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
 from datetime import timedelta
 
@@ -16,6 +15,33 @@ def _parse_duration(s: str) -> timedelta:
         return timedelta(minutes=int(s[:-1] or 60))
     return timedelta(days=int(s))
 
+def _normalize_db_url(uri: str) -> str:
+    # Corrige URLs antigas 'postgres://'
+    if uri.startswith("postgres://"):
+        uri = uri.replace("postgres://", "postgresql+psycopg2://", 1)
+
+    # Supabase: SSL por padrão. A preferência por IPv4 (hostaddr) é resolvida na
+    # hora de conectar, com cache (utils/db_engine.py), e não no import do config.
+    try:
+        parsed = urlparse(uri)
+        host = parsed.hostname or ""
+        if host.endswith("supabase.co") or host.endswith("supabase.com"):
+            q = dict(parse_qsl(parsed.query, keep_blank_values=True))
+            if "sslmode" not in q:
+                q["sslmode"] = "require"
+                uri = urlunparse((
+                    parsed.scheme,
+                    parsed.netloc,
+                    parsed.path,
+                    parsed.params,
+                    urlencode(q),
+                    parsed.fragment,
+                ))
+    except Exception:
+        # Qualquer falha mantém a URI original
+        pass
+    return uri
+
 class Config:
     # Supabase project URL (e.g., https://<ref>.supabase.co)
     SUPABASE_URL = os.getenv("SUPABASE_URL", "")
@@ -43,50 +69,120 @@ class Config:
     if not SQLALCHEMY_DATABASE_URI:
         raise RuntimeError("DATABASE_URL/SQLALCHEMY_DATABASE_URI não definida no ambiente/.env")
 
-    # Corrige URLs antigas 'postgres://'
-    if SQLALCHEMY_DATABASE_URI.startswith("postgres://"):
-        SQLALCHEMY_DATABASE_URI = SQLALCHEMY_DATABASE_URI.replace("postgres://", "postgresql+psycopg2://", 1)
-
-    # Força IPv4 quando o resolver devolver IPv6 não alcançável (comum em hosts serverless)
-    # Implementado adicionando 'hostaddr=<ipv4>' na query string do DSN.
-    try:
-        parsed = urlparse(SQLALCHEMY_DATABASE_URI)
-        host = parsed.hostname or ""
-        if host.endswith("supabase.co") or host.endswith("supabase.com"):
-            q = dict(parse_qsl(parsed.query, keep_blank_values=True))
-            # Garante SSL por padrão
-            if "sslmode" not in q:
-                q["sslmode"] = "require"
+    SQLALCHEMY_DATABASE_URI = _normalize_db_url(SQLALCHEMY_DATABASE_URI)
+    # TTL (s) do cache de DNS IPv4 usado nas conexões (0 = resolve a cada conexão nova)
+    DB_DNS_CACHE_TTL = int(os.getenv("DB_DNS_CACHE_TTL", "300"))
 
-            if "hostaddr" not in q:
-                # resolve apenas IPv4
-                infos = socket.getaddrinfo(host, parsed.port or 5432, socket.AF_INET, socket.SOCK_STREAM)
-                if infos:
-                    ipv4 = infos[0][4][0]
-                    q["hostaddr"] = ipv4
-
-            new_query = urlencode(q)
-            SQLALCHEMY_DATABASE_URI = urlunparse((
-                parsed.scheme,
-                parsed.netloc,
-                parsed.path,
-                parsed.params,
-                new_query,
-                parsed.fragment,
-            ))
-    except Exception:
-        # Qualquer falha mantém a URI original
-        pass
+    # Réplica de leitura opcional (utils/replica.py): bind "replica"; rotas marcadas com @read_replica leem dela
+    REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL")
+    SQLALCHEMY_BINDS = {"replica": _normalize_db_url(REPLICA_DATABASE_URL)} if REPLICA_DATABASE_URL else {}
+    # atraso máximo aceito antes de voltar ao primário; janela de read-your-writes após uma escrita do usuário
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+    REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+    # intervalo (s) entre checagens do atraso da réplica, por worker
+    REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", "2"))
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = os.getenv("SQLALCHEMY_ECHO", "0") == "1"
+    # Pool: local (QueuePool por worker) | transaction (pooler externo em modo transação, NullPool)
+    # Opções finais montadas por utils/db_pool.apply_pool_mode
+    DB_POOL_MODE = os.getenv("DB_POOL_MODE", "local")
+    # Conexão direta (sem pooler) para o que precisa de sessão, ex.: LISTEN do stream
+    DATABASE_DIRECT_URL = os.getenv("DATABASE_DIRECT_URL")
     SQLALCHEMY_ENGINE_OPTIONS = {
-        "pool_pre_ping": True,
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1") == "1",
         "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
         "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
         "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        # espera por conexão livre quando a concorrência passa do pool (perfil gevent)
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
     }
 
+    # Analytics: leitura via rollups (analytics/rollups.py) e atraso do job em relação ao "agora"
+    ANALYTICS_ROLLUPS_ENABLED = os.getenv("ANALYTICS_ROLLUPS_ENABLED", "1") == "1"
+    ANALYTICS_ROLLUP_LAG_MINUTES = int(os.getenv("ANALYTICS_ROLLUP_LAG_MINUTES", "15"))
+    # Cache de respostas de analytics (analytics/cache.py); TTL 0 desliga
+    ANALYTICS_CACHE_TTL = int(os.getenv("ANALYTICS_CACHE_TTL", "60"))
+    ANALYTICS_CACHE_MAXSIZE = int(os.getenv("ANALYTICS_CACHE_MAXSIZE", "1024"))
+    # Snapshot colunar dos relatórios (analytics/columnar.py); intervalo em segundos do `snapshot_analytics --loop`
+    ANALYTICS_SNAPSHOT_DIR = os.getenv("ANALYTICS_SNAPSHOT_DIR", "var/analytics")
+    ANALYTICS_SNAPSHOT_MAX_AGE = int(os.getenv("ANALYTICS_SNAPSHOT_MAX_AGE", "900"))
+
+    # Scheduler de follow-ups (clients/followups.py): intervalo em segundos e tamanho do lote
+    FOLLOWUP_SCHEDULER_INTERVAL = float(os.getenv("FOLLOWUP_SCHEDULER_INTERVAL", "60"))
+    FOLLOWUP_SCHEDULER_BATCH = int(os.getenv("FOLLOWUP_SCHEDULER_BATCH", "500"))
+
+    # Stream SSE de mudanças (realtime/): LISTEN/NOTIFY, limites por worker e tempo de vida da conexão
+    REALTIME_ENABLED = os.getenv("REALTIME_ENABLED", "1") == "1"
+    REALTIME_CHANNEL = os.getenv("REALTIME_CHANNEL", "i2sales_changes")
+    REALTIME_MAX_SUBSCRIBERS = int(os.getenv("REALTIME_MAX_SUBSCRIBERS", "100"))
+    REALTIME_QUEUE_SIZE = int(os.getenv("REALTIME_QUEUE_SIZE", "256"))
+    REALTIME_HEARTBEAT_SECONDS = float(os.getenv("REALTIME_HEARTBEAT_SECONDS", "15"))
+    REALTIME_STREAM_MAX_SECONDS = float(os.getenv("REALTIME_STREAM_MAX_SECONDS", "300"))
+    REALTIME_DEBOUNCE_MS = int(os.getenv("REALTIME_DEBOUNCE_MS", "250"))
+
+    # Warm-up do worker (utils/warmup.py): off | hook (gunicorn post_worker_init) | background
+    WARMUP_MODE = os.getenv("WARMUP_MODE", "off")
+    WARMUP_JWKS = os.getenv("WARMUP_JWKS", "1") == "1"
+
+    # Probes (health/prober.py): checagem em segundo plano de banco e JWKS; /health e /ready leem o cache
+    PROBE_INTERVAL_SECONDS = float(os.getenv("PROBE_INTERVAL_SECONDS", "10"))
+    PROBE_TIMEOUT_SECONDS = float(os.getenv("PROBE_TIMEOUT_SECONDS", "3"))
+    PROBE_JWKS_REQUIRED = os.getenv("PROBE_JWKS_REQUIRED", "0") == "1"
+
+    # Métricas Prometheus (utils/metrics.py); multiprocess via PROMETHEUS_MULTIPROC_DIR (gunicorn.conf.py)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+    # Log de queries lentas (utils/slow_queries.py): limiar em ms (0 desliga), buffer por worker e EXPLAIN assíncrono
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+    SLOW_QUERY_BUFFER = int(os.getenv("SLOW_QUERY_BUFFER", "200"))
+    SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "1") == "1"
+    SLOW_QUERY_EXPLAIN_TTL = float(os.getenv("SLOW_QUERY_EXPLAIN_TTL", "300"))
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "5000"))
+
+    # Tempo máximo por statement nas requisições (utils/statement_timeout.py); rotas com @statement_timeout sobrescrevem.
+    # 0 desliga. Queries de requisição com o cliente já desconectado são canceladas (checagem a cada POLL_SECONDS)
+    STATEMENT_TIMEOUT_MS = int(os.getenv("STATEMENT_TIMEOUT_MS", "15000"))
+    STATEMENT_CANCEL_ON_DISCONNECT = os.getenv("STATEMENT_CANCEL_ON_DISCONNECT", "1") == "1"
+    STATEMENT_CANCEL_POLL_SECONDS = float(os.getenv("STATEMENT_CANCEL_POLL_SECONDS", "0.5"))
+
+    # Exports assíncronos (exports/jobs.py): diretório local dos artefatos, threads por worker, fila máxima,
+    # reaproveitamento de jobs iguais, expiração dos arquivos, linhas por lote e nível do gzip
+    EXPORT_DIR = os.getenv("EXPORT_DIR", "var/exports")
+    EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "2"))
+    EXPORT_MAX_PENDING = int(os.getenv("EXPORT_MAX_PENDING", "20"))
+    EXPORT_DEDUP_SECONDS = float(os.getenv("EXPORT_DEDUP_SECONDS", "60"))
+    EXPORT_TTL_SECONDS = float(os.getenv("EXPORT_TTL_SECONDS", "86400"))
+    EXPORT_BATCH = int(os.getenv("EXPORT_BATCH", "5000"))
+    EXPORT_GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+
+    # Idempotency-Key nos POSTs de clientes/interações (utils/idempotency.py): validade da resposta guardada,
+    # lease da requisição em andamento, espera dos retries concorrentes e intervalo da limpeza (0 desliga)
+    IDEMPOTENCY_ENABLED = os.getenv("IDEMPOTENCY_ENABLED", "1") == "1"
+    IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_LEASE_SECONDS = float(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "30"))
+    IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+    IDEMPOTENCY_PURGE_SECONDS = float(os.getenv("IDEMPOTENCY_PURGE_SECONDS", "600"))
+
+    # Compressão das respostas (utils/compression.py): br/zstd só se brotli/zstandard estiverem instalados
+    COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "1") == "1"
+    COMPRESSION_ALGORITHMS = os.getenv("COMPRESSION_ALGORITHMS", "zstd,br,gzip")
+    COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+    COMPRESSION_MIMETYPES = os.getenv(
+        "COMPRESSION_MIMETYPES", "application/json,application/x-ndjson,text/csv,text/plain,text/html"
+    )
+    COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+    COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+
+    # Orçamento de queries / N+1 (utils/query_budget.py): auto | raise | warn | off; amostragem no modo warn
+    QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "auto")
+    QUERY_BUDGET_SAMPLE_RATE = float(os.getenv("QUERY_BUDGET_SAMPLE_RATE", "0.05"))
+    QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "5"))
+
+    # Endpoints /api/v1/internal: token para acesso sem usuário ADMIN (vazio = só ADMIN)
+    INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN", "")
+
     # CORS
     # Permitir apenas origens conhecidas por padrão; pode sobrescrever via CORS_ORIGINS
     _cors_from_env = [o.strip() for o in os.getenv("CORS_ORIGINS", "").split(",") if o.strip()]
@@ -0,0 +1,337 @@
+# exports/jobs.py
+"""
+Jobs de export assíncronos.
+
+`submit` cria o job e o entrega ao pool de threads do worker
+(EXPORT_WORKERS); a thread lê os clientes do escopo em lotes (cursor no
+servidor, EXPORT_BATCH linhas por vez) e grava CSV ou NDJSON comprimido com
+gzip em EXPORT_DIR. Nada fica na requisição: o POST responde na hora e o
+cliente consulta o status até `done`.
+
+Tudo vive em arquivos no EXPORT_DIR, para que o status e o download funcionem
+em qualquer worker da máquina:
+- <id>.json        metadados (status, linhas, bytes, datas), gravados com
+                   os.replace (leitura nunca vê arquivo pela metade)
+- <id>.csv.gz      artefato (<id>.ndjson.gz no NDJSON); .part enquanto é gerado
+- key-<hash>       id do job corrente de cada (escopo, formato), trocado com
+                   os.replace sob flock em key-<hash>.lock
+
+Dedup: o mesmo escopo (o corretor, ou "all" para MANAGER/ADMIN) e formato
+reaproveitam o job na fila/rodando ou terminado há menos de
+EXPORT_DEDUP_SECONDS, venha de qualquer usuário do escopo ou de qualquer
+worker. Job na fila/rodando cujo processo morreu (restart do worker) vira
+`failed`.
+
+Expiração: o artefato some EXPORT_TTL_SECONDS depois de terminado (o job
+passa a `expired`) e os metadados um TTL depois disso (varredura a cada
+minuto, no POST e na consulta de status).
+"""
+
+import csv
+import fcntl
+import gzip
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from sqlalchemy import select
+
+from extensions import db
+from models.client import Client
+from utils.json_provider import dumpb
+
+FORMATS = {
+    "csv": {"suffix": ".csv.gz", "mimetype": "text/csv"},
+    "ndjson": {"suffix": ".ndjson.gz", "mimetype": "application/x-ndjson"},
+}
+ACTIVE = ("queued", "running")
+
+_lock = threading.Lock()
+_executor = None
+_executor_pid = None
+_pending = 0
+_last_sweep = 0.0
+_SWEEP_INTERVAL = 60.0
+_PROGRESS_INTERVAL = 2.0
+
+
+class QueueFull(Exception):
+    pass
+
+
+def export_dir() -> str:
+    path = current_app.config.get("EXPORT_DIR") or "var/exports"
+    path = path if os.path.isabs(path) else os.path.join(current_app.root_path, path)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def scope_for(claims: dict) -> str:
+    """Quem enxerga o quê: o corretor só os seus clientes; MANAGER/ADMIN todos."""
+    return claims.get("sub") if claims.get("role") == "BROKER" else "all"
+
+
+def _meta_path(base, job_id) -> str:
+    return os.path.join(base, f"{job_id}.json")
+
+
+def artifact_path(base, job: dict) -> str:
+    return os.path.join(base, job["id"] + FORMATS[job["format"]]["suffix"])
+
+
+def _write(base, job: dict) -> None:
+    tmp = os.path.join(base, f".{job['id']}.json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(job, f)
+    os.replace(tmp, _meta_path(base, job["id"]))
+
+
+def _read(base, job_id):
+    try:
+        with open(_meta_path(base, job_id), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _alive(pid) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # existe, de outro usuário
+        pass
+    return True
+
+
+def _settle(base, job: dict) -> dict:
+    """Aplica expiração e processo morto ao job lido do disco."""
+    now = time.time()
+    if job["status"] in ACTIVE and not _alive(job["pid"]):
+        job.update(status="failed", error="worker reiniciado durante o export", finishedAt=now,
+                   expiresAt=now + float(current_app.config.get("EXPORT_TTL_SECONDS", 86400)))
+        _write(base, job)
+    elif job.get("expiresAt") and job["expiresAt"] <= now and job["status"] != "expired":
+        _remove_artifacts(base, job)
+        job["status"] = "expired"
+        _write(base, job)
+    return job
+
+
+def get(job_id: str):
+    base = export_dir()
+    _maybe_sweep(base)
+    job = _read(base, job_id)
+    return _settle(base, job) if job else None
+
+
+def _reusable(job, dedup_seconds: float) -> bool:
+    if job is None:
+        return False
+    if job["status"] in ACTIVE:
+        return True
+    return job["status"] == "done" and time.time() - job["finishedAt"] < dedup_seconds
+
+
+def submit(claims: dict, fmt: str):
+    """(job, criado?) — reaproveita o job corrente do mesmo escopo e formato."""
+    app = current_app._get_current_object()
+    base = export_dir()
+    _maybe_sweep(base)
+    scope = scope_for(claims)
+    key_path = os.path.join(base, "key-" + hashlib.sha1(f"{scope}:{fmt}".encode()).hexdigest()[:20])
+    dedup_seconds = float(app.config.get("EXPORT_DEDUP_SECONDS", 60))
+
+    # flock no .lock serializa ler/decidir/publicar entre threads e workers da máquina
+    with open(key_path + ".lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            current = _read_key(base, key_path)
+            if current is not None:
+                current = _settle(base, current)
+                if _reusable(current, dedup_seconds):
+                    return current, False
+
+            now = time.time()
+            job = {
+                "id": str(uuid.uuid4()),
+                "status": "queued",
+                "format": fmt,
+                "scope": scope,
+                "createdBy": claims.get("sub"),
+                "pid": os.getpid(),
+                "rows": 0,
+                "bytes": None,
+                "createdAt": now,
+                "startedAt": None,
+                "finishedAt": None,
+                "expiresAt": None,
+                "error": None,
+            }
+            # metadados antes da chave: quem acha a chave sempre acha o job
+            _write(base, job)
+            try:
+                _enqueue(app, base, job)
+            except QueueFull:
+                os.unlink(_meta_path(base, job["id"]))
+                raise
+            tmp = f"{key_path}.{job['id']}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(job["id"])
+            os.replace(tmp, key_path)
+            return job, True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _read_key(base, key_path):
+    try:
+        with open(key_path, encoding="utf-8") as f:
+            return _read(base, f.read().strip())
+    except FileNotFoundError:
+        return None
+
+
+def _enqueue(app, base, job) -> None:
+    global _executor, _executor_pid, _pending
+    with _lock:
+        if _pending >= int(app.config.get("EXPORT_MAX_PENDING", 20)):
+            raise QueueFull()
+        if _executor is None or _executor_pid != os.getpid():  # pool herdado do master não tem threads
+            _executor = ThreadPoolExecutor(
+                max_workers=int(app.config.get("EXPORT_WORKERS", 2)), thread_name_prefix="export"
+            )
+            _executor_pid = os.getpid()
+        _pending += 1
+    _executor.submit(_run, app, base, job)
+
+
+def _run(app, base, job) -> None:
+    global _pending
+    path = artifact_path(base, job)
+    part = path + ".part"
+    try:
+        with app.app_context():
+            job.update(status="running", startedAt=time.time())
+            _write(base, job)
+            with open(part, "wb") as raw:
+                level = int(app.config.get("EXPORT_GZIP_LEVEL", 6))
+                with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=level) as out:
+                    job["rows"] = _produce(out, job, base, int(app.config.get("EXPORT_BATCH", 5000)))
+            os.replace(part, path)
+            now = time.time()
+            job.update(status="done", bytes=os.path.getsize(path), finishedAt=now,
+                       expiresAt=now + float(app.config.get("EXPORT_TTL_SECONDS", 86400)))
+            _write(base, job)
+            app.logger.info("[exports] %s %s: %s linhas, %s bytes em %.1fs", job["id"], job["format"],
+                            job["rows"], job["bytes"], now - job["startedAt"])
+    except Exception as e:
+        app.logger.exception("[exports] job %s falhou", job["id"])
+        now = time.time()
+        job.update(status="failed", error=str(e).splitlines()[0][:200] if str(e) else type(e).__name__,
+                   finishedAt=now, expiresAt=now + float(app.config.get("EXPORT_TTL_SECONDS", 86400)))
+        _write(base, job)
+        try:
+            os.unlink(part)
+        except FileNotFoundError:
+            pass
+    finally:
+        with _lock:
+            _pending -= 1
+
+
+def _produce(out, job, base, batch: int) -> int:
+    """Escreve as linhas no stream gzip, um lote por write; devolve quantas foram escritas."""
+    from clients.routes import EXPORT_HEADER, _export_row
+
+    stmt = select(Client).order_by(Client.created_at.desc().nullslast(), Client.id)
+    if job["scope"] != "all":
+        stmt = stmt.where(Client.owner_id == uuid.UUID(job["scope"]))
+    rows = db.session.execute(stmt.execution_options(yield_per=batch)).scalars()
+
+    as_csv = job["format"] == "csv"
+    text = io.StringIO()
+    writer = csv.writer(text)
+    lines = []
+    if as_csv:
+        writer.writerow(EXPORT_HEADER)
+
+    def flush():
+        if as_csv:
+            out.write(text.getvalue().encode())
+            text.seek(0)
+            text.truncate()
+        else:
+            out.write(b"".join(lines))
+            lines.clear()
+
+    count = 0
+    progress_at = time.monotonic()
+    for c in rows:
+        if as_csv:
+            writer.writerow(_export_row(c))
+        else:
+            lines.append(dumpb(_export_record(c)) + b"\n")
+        count += 1
+        if count % batch == 0:
+            flush()
+            if time.monotonic() - progress_at >= _PROGRESS_INTERVAL:
+                job["rows"] = count  # progresso visível no status
+                _write(base, job)
+                progress_at = time.monotonic()
+    flush()
+    return count
+
+
+def _export_record(c: Client) -> dict:
+    """Linha do NDJSON: as colunas do CSV com os tipos do JSON da API."""
+    return {
+        "id": c.id,
+        "name": c.name,
+        "phone": c.phone,
+        "email": c.email,
+        "source": c.source,
+        "status": c.status,
+        "followUpState": c.follow_up_state,
+        "product": c.product,
+        "propertyValue": c.property_value,
+        "createdAt": c.created_at,
+        "updatedAt": c.updated_at,
+    }
+
+
+def _remove_artifacts(base, job, meta=False) -> None:
+    paths = [artifact_path(base, job), artifact_path(base, job) + ".part"]
+    if meta:
+        paths.append(_meta_path(base, job["id"]))
+    for path in paths:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def _maybe_sweep(base) -> None:
+    global _last_sweep
+    now = time.time()
+    if now - _last_sweep < _SWEEP_INTERVAL:
+        return
+    _last_sweep = now
+    ttl = float(current_app.config.get("EXPORT_TTL_SECONDS", 86400))
+    for name in os.listdir(base):
+        if not name.endswith(".json") or name.startswith("."):
+            continue
+        job = _read(base, name[: -len(".json")])
+        if not job or not job.get("expiresAt") or job["expiresAt"] > now:
+            continue
+        # o status "expired" (410 no download) fica visível por mais um TTL; depois some tudo
+        if job["expiresAt"] + ttl <= now:
+            _remove_artifacts(base, job, meta=True)
+        else:
+            _settle(base, job)
@@ -0,0 +1,100 @@
+# exports/routes.py
+"""
+Exports assíncronos de clientes (/api/v1/exports); a geração fica em exports/jobs.py.
+
+POST cria (ou reaproveita) o job, GET /<id> devolve o status e
+GET /<id>/download entrega o arquivo .gz com suporte a Range. Cada usuário só
+enxerga os jobs do seu escopo (BROKER: os próprios clientes; MANAGER/ADMIN: todos).
+"""
+
+import uuid
+from datetime import datetime, timezone
+
+from flask import Blueprint, g, jsonify, request, send_file, url_for
+
+from auth.supabase_middleware import supabase_required
+from exports import jobs
+
+bp = Blueprint("exports", __name__)
+
+
+def _error(msg, code):
+    return jsonify({"error": msg}), code
+
+
+def _ts(value):
+    return datetime.fromtimestamp(value, tz=timezone.utc) if value else None
+
+
+def _job_json(job: dict) -> dict:
+    body = {
+        "id": job["id"],
+        "status": job["status"],
+        "format": job["format"],
+        "rows": job["rows"],
+        "bytes": job["bytes"],
+        "createdAt": _ts(job["createdAt"]),
+        "startedAt": _ts(job["startedAt"]),
+        "finishedAt": _ts(job["finishedAt"]),
+        "expiresAt": _ts(job["expiresAt"]),
+        "error": job["error"],
+    }
+    if job["status"] == "done":
+        body["downloadUrl"] = url_for("exports.download_export", job_id=job["id"])
+    return body
+
+
+def _visible_job(job_id: uuid.UUID):
+    job = jobs.get(str(job_id))
+    if job is None or job["scope"] != jobs.scope_for(getattr(g, "jwt", {})):
+        return None
+    return job
+
+
+@bp.post("")
+@supabase_required()
+def create_export():
+    """Body `{ format?: "csv" | "ndjson" }`; 202 com job novo, 200 quando reaproveita um igual."""
+    data = request.get_json(silent=True) or {}
+    fmt = str(data.get("format") or "csv").lower()
+    if fmt not in jobs.FORMATS:
+        return _error("Dados inválidos.", 400)
+    try:
+        job, created = jobs.submit(getattr(g, "jwt", {}), fmt)
+    except jobs.QueueFull:
+        resp, code = _error("Muitos exports na fila, tente novamente.", 503)
+        resp.headers["Retry-After"] = "30"
+        return resp, code
+    resp = jsonify(_job_json(job))
+    resp.headers["Location"] = url_for("exports.get_export", job_id=job["id"])
+    return resp, (202 if created else 200)
+
+
+@bp.get("/<uuid:job_id>")
+@supabase_required()
+def get_export(job_id: uuid.UUID):
+    job = _visible_job(job_id)
+    if job is None:
+        return _error("Not Found", 404)
+    return jsonify(_job_json(job)), 200
+
+
+@bp.get("/<uuid:job_id>/download")
+@supabase_required()
+def download_export(job_id: uuid.UUID):
+    job = _visible_job(job_id)
+    if job is None:
+        return _error("Not Found", 404)
+    if job["status"] == "expired":
+        return _error("Export expirado; gere outro.", 410)
+    if job["status"] != "done":
+        return _error(f"Export ainda não disponível ({job['status']}).", 409)
+    created = _ts(job["createdAt"])
+    name = f"clients-{created:%Y%m%d-%H%M%S}" + jobs.FORMATS[job["format"]]["suffix"]
+    # conditional=True: ETag/Last-Modified e Range (206) para retomar downloads grandes
+    resp = send_file(
+        jobs.artifact_path(jobs.export_dir(), job), mimetype="application/gzip",
+        as_attachment=True, download_name=name, conditional=True, max_age=0,
+    )
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
@@ -3,7 +3,10 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_cors import CORS
 
-db = SQLAlchemy()
+from utils.replica import RoutingSession
+
+# RoutingSession: leituras das rotas @read_replica vão para o bind "replica" (se configurado)
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 bcrypt = Bcrypt()
 
 def init_cors(app):
@@ -21,6 +24,7 @@ def init_cors(app):
             r"/api/v1/*": {"origins": allowed_origins},
         },
         methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        allow_headers=["Content-Type", "Authorization"],
+        allow_headers=["Content-Type", "Authorization", "Idempotency-Key", "X-Replica-Sticky-Until"],
+        expose_headers=["Idempotent-Replayed", "X-Replica-Sticky-Until"],
         supports_credentials=True,
     )
@@ -0,0 +1,111 @@
+# gunicorn.conf.py
+"""
+Configuração do gunicorn com perfis (GUNICORN_PROFILE):
+
+- sync (default): workers com threads (gthread). Cada requisição em voo ocupa
+  uma thread; concorrência por instância = workers x threads.
+- gevent: workers cooperativos. I/O de banco (psycopg2 via psycogreen) e de
+  rede (httpx/Supabase) cede a vez em vez de bloquear, então um worker atende
+  até GUNICORN_WORKER_CONNECTIONS requisições em voo. Bom também para o stream SSE.
+
+O pool do SQLAlchemy e o limite de streams SSE por worker são dimensionados
+pela concorrência do perfil, a menos que DB_POOL_SIZE/DB_MAX_OVERFLOW e
+REALTIME_MAX_SUBSCRIBERS sejam definidos explicitamente. No gevent o pool
+fica bem menor que a concorrência: requisições excedentes esperam uma conexão
+(DB_POOL_TIMEOUT) em vez de abrir centenas de conexões no Postgres.
+
+GUNICORN_PRELOAD=1 carrega o app uma vez no master (preload_app) e os workers
+herdam por fork: boot e recycle mais rápidos e menos memória. O pool herdado é
+descartado no post_fork (cada worker abre as próprias conexões).
+
+Cada worker roda o warm-up (utils/warmup.py) no post_worker_init, depois de
+carregar o app e antes de aceitar conexões; WARMUP_MODE=off desliga.
+
+Métricas (utils/metrics.py) são agregadas entre workers pelo modo multiprocess
+do prometheus_client: PROMETHEUS_MULTIPROC_DIR é definido aqui, antes do app
+ser importado, e limpo a cada start do master.
+
+Uso: gunicorn -c gunicorn.conf.py app:app
+"""
+
+import os
+import shutil
+import tempfile
+
+profile = os.getenv("GUNICORN_PROFILE", "sync").strip().lower()
+if profile not in ("sync", "gevent"):
+    raise RuntimeError(f"GUNICORN_PROFILE inválido: {profile!r} (use sync|gevent)")
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "0") == "1"
+if preload_app and profile == "gevent":
+    # com preload o app é importado no master: o patch precisa vir antes
+    from gevent import monkey
+    monkey.patch_all()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+accesslog = os.getenv("GUNICORN_ACCESSLOG") or None
+
+if profile == "gevent":
+    worker_class = "gevent"
+    worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "100"))
+    concurrency = worker_connections
+    pool_size = min(concurrency, int(os.getenv("GUNICORN_GEVENT_POOL_SIZE", "10")))
+else:
+    worker_class = "gthread"
+    threads = int(os.getenv("GUNICORN_THREADS", "4"))
+    concurrency = threads
+    # uma conexão por thread; o overflow cobre threads de fundo (listener SSE, snapshot)
+    pool_size = threads
+
+os.environ.setdefault("DB_POOL_SIZE", str(pool_size))
+os.environ.setdefault("DB_MAX_OVERFLOW", str(pool_size))
+# cada stream SSE prende uma vaga de concorrência (thread ou conexão gevent) por até
+# REALTIME_STREAM_MAX_SECONDS: no máximo 1/4 delas, o resto fica para a API (0 = stream recusado)
+os.environ.setdefault("REALTIME_MAX_SUBSCRIBERS", str(concurrency // 4))
+# warm-up síncrono por worker (post_worker_init), antes de aceitar conexões
+os.environ.setdefault("WARMUP_MODE", "hook")
+prometheus_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "i2sales-prometheus")
+)
+
+
+def on_starting(server):
+    # arquivos de um master anterior seriam somados aos contadores novos
+    shutil.rmtree(prometheus_dir, ignore_errors=True)
+    os.makedirs(prometheus_dir, exist_ok=True)
+
+
+def post_fork(server, worker):
+    if preload_app:
+        import app as app_module
+        from utils.db_engine import dispose_after_fork
+        dispose_after_fork(app_module.get_app())
+    if profile == "gevent":
+        # psycopg2 é C puro: sem o wait callback, cada query bloquearia o worker inteiro
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+    server.log.info(
+        "worker %s: profile=%s concurrency=%s db_pool=%s+%s",
+        worker.pid, profile, concurrency, os.environ["DB_POOL_SIZE"], os.environ["DB_MAX_OVERFLOW"],
+    )
+
+
+def post_worker_init(worker):
+    app = worker.wsgi
+    if getattr(app, "config", {}).get("WARMUP_MODE") != "hook":
+        return
+    from utils import warmup
+    result = warmup.run(app)
+    worker.log.info("worker %s: warm-up %s em %sms", worker.pid, result["status"], result["totalMs"])
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
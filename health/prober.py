@@ -0,0 +1,145 @@
+# health/prober.py
+"""
+Prober em segundo plano para /health e /ready.
+
+Uma thread por worker checa, a cada PROBE_INTERVAL_SECONDS, o banco (SELECT 1
+numa conexão própria, NullPool com connect_timeout: nunca disputa o pool das
+requisições) e a origem do JWKS do Supabase, e guarda o resultado. Os
+endpoints só leem esse resultado, então health checks e monitores não geram
+carga no banco nem ficam presos quando ele está lento.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from utils import db_engine
+
+_lock = threading.Lock()
+_prober = None
+
+
+class Prober:
+    def __init__(self, app):
+        self.app = app
+        self.pid = os.getpid()
+        cfg = app.config
+        self.interval = float(cfg.get("PROBE_INTERVAL_SECONDS", 10))
+        self.timeout = float(cfg.get("PROBE_TIMEOUT_SECONDS", 3))
+        self._engine = None
+        self._result = None
+        self._thread = None
+
+    def start(self) -> "Prober":
+        with _lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="health-prober", daemon=True)
+                self._thread.start()
+        return self
+
+    def _db_engine(self):
+        if self._engine is None:
+            # sem `options` na conexão: PgBouncer/Supavisor (DB_POOL_MODE=transaction) recusam o parâmetro
+            self._engine = create_engine(
+                self.app.config["SQLALCHEMY_DATABASE_URI"],
+                poolclass=NullPool,
+                connect_args={"connect_timeout": max(1, int(self.timeout))},
+            )
+            db_engine.install(self._engine, int(self.app.config.get("DB_DNS_CACHE_TTL", 300)))
+        return self._engine
+
+    def _check_db(self) -> dict:
+        t0 = time.perf_counter()
+        try:
+            with self._db_engine().connect() as conn, conn.begin():
+                conn.execute(text(f"SET LOCAL statement_timeout = {int(self.timeout * 1000)}"))
+                conn.execute(text("SELECT 1"))
+            return {"status": "ok", "latencyMs": round((time.perf_counter() - t0) * 1000, 1)}
+        except Exception as e:
+            return {"status": "error", "latencyMs": round((time.perf_counter() - t0) * 1000, 1),
+                    "detail": str(e).splitlines()[0][:200]}
+
+    def _check_jwks(self) -> dict:
+        base = (self.app.config.get("SUPABASE_URL") or "").rstrip("/")
+        if not base:
+            return {"status": "skipped"}
+        import httpx
+
+        headers = {}
+        if self.app.config.get("SUPABASE_ANON_KEY"):
+            headers["apikey"] = self.app.config["SUPABASE_ANON_KEY"]
+        t0 = time.perf_counter()
+        try:
+            r = httpx.get(f"{base}/auth/v1/keys", headers=headers, timeout=self.timeout)
+            ok = r.status_code < 500
+            out = {"status": "ok" if ok else "error", "httpStatus": r.status_code}
+        except Exception as e:
+            out = {"status": "error", "detail": str(e)[:200]}
+        out["latencyMs"] = round((time.perf_counter() - t0) * 1000, 1)
+        return out
+
+    def probe_once(self) -> dict:
+        result = {
+            "db": self._check_db(),
+            "jwks": self._check_jwks(),
+            "checkedAt": datetime.now(timezone.utc).isoformat(),
+            "_monotonic": time.monotonic(),
+        }
+        with _lock:
+            self._result = result
+        return result
+
+    def _loop(self) -> None:
+        if self.result() is not None:
+            time.sleep(self.interval)  # o warm-up já fez a primeira checagem
+        while True:
+            started = time.monotonic()
+            try:
+                self.probe_once()
+            except Exception:
+                self.app.logger.exception("[probe] falha inesperada")
+            time.sleep(max(0.5, self.interval - (time.monotonic() - started)))
+
+    def result(self):
+        with _lock:
+            return self._result
+
+
+def get_prober(app, *, start: bool = True) -> Prober:
+    """Prober deste processo (recriado após fork); `start` liga a thread se ainda não estiver rodando."""
+    global _prober
+    with _lock:
+        if _prober is None or _prober.pid != os.getpid():
+            _prober = Prober(app)
+        prober = _prober
+    return prober.start() if start else prober
+
+
+def status(app) -> dict:
+    """
+    Último resultado, sem I/O. status:
+    - starting: nenhuma checagem concluída ainda neste worker
+    - stale:    última checagem mais velha que 3 intervalos (thread travada/morta)
+    - ok/error: banco ok e, com PROBE_JWKS_REQUIRED, JWKS ok
+    """
+    prober = get_prober(app)
+    res = prober.result()
+    if res is None:
+        return {"status": "starting", "db": None, "jwks": None, "checkedAt": None}
+    if time.monotonic() - res["_monotonic"] > 3 * prober.interval:
+        overall = "stale"
+    else:
+        ok = res["db"]["status"] == "ok"
+        if app.config.get("PROBE_JWKS_REQUIRED"):
+            ok = ok and res["jwks"]["status"] in ("ok", "skipped")
+        overall = "ok" if ok else "error"
+    return {
+        "status": overall,
+        "db": res["db"],
+        "jwks": res["jwks"],
+        "checkedAt": res["checkedAt"],
+    }
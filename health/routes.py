@@ -1,8 +1,46 @@
 # health/routes.py
-from flask import Blueprint, jsonify
+"""
+Probes do worker. Nenhum deles usa o pool de conexões das requisições:
+- /live:   o processo responde (sem I/O); reiniciar o container só se falhar
+- /ready:  warm-up concluído e última checagem do prober ok; tirar do balanceador se 503
+- /health: resultado em cache do prober (banco + JWKS), para monitores e dashboards
+"""
+
+from flask import Blueprint, current_app, jsonify
+
+from health import prober
+from utils import warmup
 
 bp = Blueprint("health", __name__)
 
+
+@bp.get("/live")
+def live():
+    return jsonify({"status": "alive"}), 200
+
+
+@bp.get("/ready")
+def ready():
+    app = current_app._get_current_object()
+    probes = prober.status(app)
+    if not warmup.is_ready(app) or probes["status"] == "starting":
+        state = "warming"
+    else:
+        state = "ready" if probes["status"] == "ok" else "unavailable"
+    body = {"status": state, "warmup": warmup.state(), "probes": probes}
+    return jsonify(body), (200 if state == "ready" else 503)
+
+
 @bp.get("/health")
 def health():
-    return jsonify({"status": "ok"}), 200
+    probes = prober.status(current_app._get_current_object())
+    code = {"ok": 200, "error": 500}.get(probes["status"], 503)
+    return jsonify(probes), code
+
+
+@warmup.register("probes")
+def _first_probe():
+    """Primeira checagem síncrona: o /ready já responde 200 quando o worker começa a aceitar conexões."""
+    p = prober.get_prober(current_app._get_current_object(), start=False)
+    p.probe_once()
+    p.start()
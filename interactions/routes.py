@@ -6,6 +6,11 @@ from extensions import db
 from models.client import Client
 from models.interaction import Interaction
 from auth.supabase_middleware import supabase_required
+from analytics.cache import invalidate_owner
+from clients.followups import InvalidDueAt, parse_due_at
+from utils.idempotency import idempotent
+from utils.query_budget import query_budget
+from utils.statement_timeout import should_propagate
 
 # Blueprint sem prefixo interno; app.py registra em /api/v1/interactions
 bp = Blueprint("interactions", __name__)
@@ -18,6 +23,8 @@ def _error(msg, code=400):
 
 @bp.post("")
 @supabase_required()
+@idempotent
+@query_budget(10)
 def create_interaction():
     j = getattr(g, "jwt", {})
     data = request.get_json(silent=True) or {}
@@ -26,6 +33,10 @@ def create_interaction():
     type_ = data.get("type")
     observation = data.get("observation")
     explicit_next = data.get("explicitNext")
+    try:
+        due_at = parse_due_at(data.get("dueAt"))
+    except InvalidDueAt:
+        return _error("Dados inválidos.", 400)
 
     if not client_id:
         return _error("Dados inválidos.", 400)
@@ -69,6 +80,7 @@ def create_interaction():
             c.status = explicit_next
         elif type_ == "FOLLOW_UP_SCHEDULED":
             c.follow_up_state = "Ativo"
+            c.follow_up_due_at = due_at
         elif type_ in {
             "FOLLOW_UP_DONE",
             "FOLLOW_UP_CANCELED",
@@ -77,12 +89,17 @@ def create_interaction():
             "FOLLOW_UP_CLOSED",
         }:
             c.follow_up_state = "Sem Follow Up"
+            c.follow_up_due_at = None
         # NOTE -> sem efeito no cliente
 
+        owner_id = c.owner_id
         db.session.commit()
+        invalidate_owner(owner_id, user_uuid)
         return jsonify({"message": "Interação criada com sucesso."}), 201
 
-    except Exception:
+    except Exception as e:
         db.session.rollback()
+        if should_propagate(e):  # 503/504 dos handlers de utils/statement_timeout
+            raise
         import traceback; traceback.print_exc()
         return _error("Internal Server Error", 500)
@@ -0,0 +1,96 @@
+# internal/routes.py
+"""
+Endpoints operacionais (/api/v1/internal): não fazem parte da API do front.
+
+Acesso: header X-Internal-Token igual a INTERNAL_API_TOKEN (scrapers, scripts
+de infra) ou token de usuário ADMIN.
+"""
+
+import hmac
+import os
+from functools import wraps
+
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from extensions import db
+from auth.supabase_middleware import supabase_required
+from utils.rbac import require_roles
+from utils import metrics, replica, slow_queries
+from utils.db_pool import pool_status
+
+bp = Blueprint("internal", __name__)
+
+
+def internal_required(fn):
+    admin_only = supabase_required()(require_roles("ADMIN")(fn))
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        expected = current_app.config.get("INTERNAL_API_TOKEN") or ""
+        given = request.headers.get("X-Internal-Token") or ""
+        if expected and given and hmac.compare_digest(expected, given):
+            return fn(*args, **kwargs)
+        return admin_only(*args, **kwargs)
+
+    return wrapper
+
+
+@bp.get("/db-pool")
+@internal_required
+def db_pool():
+    """Estado do pool deste worker (cada worker tem o seu)."""
+    engines = {str(bind or "default"): pool_status(engine) for bind, engine in db.engines.items()}
+    return jsonify({
+        "pid": os.getpid(),
+        "mode": current_app.config.get("DB_POOL_MODE"),
+        "prePing": bool(current_app.config["SQLALCHEMY_ENGINE_OPTIONS"].get("pool_pre_ping")),
+        "engines": engines,
+    }), 200
+
+
+@bp.get("/replica")
+@internal_required
+def replica_status():
+    """Atraso da réplica visto por este worker e quantas requisições leram dela / do primário (e por quê)."""
+    monitor = replica.get_monitor()
+    if monitor is None:
+        return jsonify({"error": "Réplica não configurada (REPLICA_DATABASE_URL)"}), 404
+    return jsonify({"pid": os.getpid(), **monitor.status()}), 200
+
+
+@bp.get("/metrics")
+@internal_required
+def metrics_endpoint():
+    """Formato texto do Prometheus; no gunicorn soma todos os workers."""
+    if not metrics.enabled():
+        return jsonify({"error": "Métricas desligadas (METRICS_ENABLED=0 ou prometheus_client ausente)"}), 404
+    body, content_type = metrics.exposition()
+    return Response(body, content_type=content_type), 200
+
+
+@bp.get("/slow-queries")
+@internal_required
+def slow_queries_list():
+    """Queries lentas deste worker, mais recentes primeiro (?limit=50, ?plan=0 omite o EXPLAIN)."""
+    recorder = slow_queries.get_recorder()
+    if recorder is None:
+        return jsonify({"error": "Log de queries lentas desligado (SLOW_QUERY_MS=0)"}), 404
+    try:
+        limit = max(1, min(int(request.args.get("limit", 50)), 1000))
+    except ValueError:
+        return jsonify({"error": "limit inválido"}), 400
+    with_plan = request.args.get("plan", "1") != "0"
+    return jsonify({
+        "pid": os.getpid(),
+        "thresholdMs": recorder.threshold * 1000,
+        "items": recorder.entries(limit, with_plan=with_plan),
+    }), 200
+
+
+@bp.delete("/slow-queries")
+@internal_required
+def slow_queries_clear():
+    recorder = slow_queries.get_recorder()
+    if recorder is not None:
+        recorder.clear()
+    return Response(status=204)
@@ -0,0 +1,93 @@
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import UUID
+from extensions import db
+
+
+class InteractionHourlyRollup(db.Model):
+    """Contagem de interações por hora (UTC), usuário e tipo.
+
+    Mantida pelo job de rollup (analytics/rollups.py) até o watermark
+    "interactions"; a granularidade horária permite reagrupar em dia/semana/mês.
+    """
+
+    __tablename__ = "analytics_interaction_hourly"
+    __table_args__ = (
+        db.Index("ix_analytics_interaction_hourly_user_bucket", "user_id", "bucket"),
+        {"schema": "public"},
+    )
+
+    bucket = db.Column(db.DateTime(timezone=True), primary_key=True)
+    user_id = db.Column(UUID(as_uuid=True), primary_key=True)
+    type = db.Column(db.String(255), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, server_default="0")
+
+    def __repr__(self) -> str:
+        return f"<InteractionHourlyRollup bucket={self.bucket} user_id={self.user_id} type={self.type} total={self.total}>"
+
+
+class ClientStatusRollup(db.Model):
+    """Contagem corrente de clientes por dono, dia de criação (UTC), status e follow-up.
+
+    Atualizada na escrita (hook de flush em analytics/rollups.py).
+    owner_id nulo é gravado como NIL_OWNER e follow_up_state nulo como ''.
+    """
+
+    __tablename__ = "analytics_client_status"
+    __table_args__ = {"schema": "public"}
+
+    owner_id = db.Column(UUID(as_uuid=True), primary_key=True)
+    created_day = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String, primary_key=True)
+    follow_up_state = db.Column(db.String(20), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, server_default="0")
+
+    def __repr__(self) -> str:
+        return f"<ClientStatusRollup owner_id={self.owner_id} day={self.created_day} status={self.status} total={self.total}>"
+
+
+class RollupState(db.Model):
+    """Watermark por rollup: tudo antes de `watermark` já está agregado."""
+
+    __tablename__ = "analytics_rollup_state"
+    __table_args__ = {"schema": "public"}
+
+    name = db.Column(db.String(64), primary_key=True)
+    watermark = db.Column(db.DateTime(timezone=True))
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<RollupState name={self.name} watermark={self.watermark}>"
+
+
+class StageStint(db.Model):
+    """Permanência de um cliente em uma etapa do funil.
+
+    Uma linha por interação CLIENT_CREATED/STATUS_CHANGE (analytics/transitions.py):
+    `prev_stage` -> `stage` é a transição de entrada; `left_at`/`next_stage`
+    são preenchidos quando a próxima mudança de status do cliente é processada.
+    """
+
+    __tablename__ = "analytics_stage_stints"
+    __table_args__ = (
+        db.Index("ix_analytics_stage_stints_owner_entered", "owner_id", "entered_at"),
+        db.Index("ix_analytics_stage_stints_owner_left", "owner_id", "left_at"),
+        db.Index(
+            "ix_analytics_stage_stints_open",
+            "client_id",
+            postgresql_where=db.text("left_at IS NULL"),
+        ),
+        {"schema": "public"},
+    )
+
+    interaction_id = db.Column(UUID(as_uuid=True), primary_key=True)
+    client_id = db.Column(UUID(as_uuid=True), nullable=False)
+    owner_id = db.Column(UUID(as_uuid=True), nullable=False)
+    user_id = db.Column(UUID(as_uuid=True), nullable=False)
+    prev_stage = db.Column(db.String(255))
+    stage = db.Column(db.String(255), nullable=False)
+    entered_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    left_at = db.Column(db.DateTime(timezone=True))
+    next_stage = db.Column(db.String(255))
+
+    def __repr__(self) -> str:
+        return f"<StageStint client_id={self.client_id} {self.prev_stage}->{self.stage} at={self.entered_at}>"
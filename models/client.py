@@ -11,6 +11,19 @@ class Client(db.Model):
             "follow_up_state IN ('Ativo','Concluido','Cancelado','Atrasado','Sem Follow Up')",
             name="clients_follow_up_state_check",
         ),
+        # scheduler de follow-up: só as pendências ainda não vencidas/marcadas
+        db.Index(
+            "ix_clients_follow_up_due_pending",
+            "follow_up_due_at",
+            postgresql_where=db.text("follow_up_state = 'Ativo' AND follow_up_due_at IS NOT NULL"),
+        ),
+        # worklist por corretor ordenada por vencimento
+        db.Index(
+            "ix_clients_owner_follow_up_due",
+            "owner_id",
+            "follow_up_due_at",
+            postgresql_where=db.text("follow_up_state IN ('Ativo','Atrasado') AND follow_up_due_at IS NOT NULL"),
+        ),
         {"schema": "public"},
     )
 
@@ -32,6 +45,8 @@ class Client(db.Model):
     product = db.Column(db.String(255))
     property_value = db.Column(NUMERIC(15, 2))
     follow_up_state = db.Column(db.String(20), server_default="Sem Follow Up", nullable=True)
+    # vencimento do follow-up agendado; o scheduler marca "Atrasado" quando passa
+    follow_up_due_at = db.Column(db.DateTime(timezone=True), nullable=True)
 
     # relacionamento com interactions (FK está no model Interaction)
     interactions = db.relationship(
@@ -0,0 +1,34 @@
+# models/idempotency_key.py
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from extensions import db
+
+
+class IdempotencyKey(db.Model):
+    """Resposta guardada de um POST com `Idempotency-Key`, por (usuário, chave).
+
+    `in_flight` enquanto a primeira requisição roda (`locked_at` = início do
+    lease); `done` com status/corpo/headers da resposta até `expires_at`.
+    Mantida por utils/idempotency.py.
+    """
+
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        db.Index("ix_idempotency_keys_expires_at", "expires_at"),
+        {"schema": "public"},
+    )
+
+    user_id = db.Column(UUID(as_uuid=True), primary_key=True)
+    key = db.Column(db.String(255), primary_key=True)
+    endpoint = db.Column(db.String(128), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.String(16), nullable=False)
+    response_status = db.Column(db.Integer)
+    response_body = db.Column(db.LargeBinary)
+    response_headers = db.Column(JSONB)
+    locked_at = db.Column(db.DateTime(timezone=True))
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=func.now())
+    expires_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<IdempotencyKey user_id={self.user_id} key={self.key} status={self.status}>"
@@ -0,0 +1,99 @@
+"""
+Publicação de mudanças em clients/interactions via Postgres NOTIFY.
+
+O hook after_flush emite um `pg_notify` por registro alterado, na mesma
+transação da escrita: o Postgres só entrega na confirmação (commit) e descarta
+no rollback, então os ouvintes (realtime/hub.py, um por worker) nunca veem
+mudanças que não aconteceram. Escritas fora do ORM chamam `publish`.
+
+Payload (JSON, bem abaixo do limite de 8000 bytes do NOTIFY):
+    {"t": "client"|"interaction", "op": "insert"|"update"|"delete",
+     "id", "owner", "prevOwner"?, "clientId"?, "user"?}
+"""
+
+import json
+
+from flask import current_app
+from sqlalchemy import event, inspect, text
+
+from extensions import db
+from models.client import Client
+from models.interaction import Interaction
+
+_NOTIFY = text("SELECT pg_notify(:channel, :payload)")
+# dono da interação resolvido no próprio banco (o cliente pode não estar na sessão)
+_NOTIFY_INTERACTION = text(
+    """
+    SELECT pg_notify(:channel, json_build_object(
+        't', 'interaction', 'op', :op, 'id', :id, 'clientId', :client_id, 'user', :user_id,
+        'owner', (SELECT owner_id FROM public.clients WHERE id = CAST(:client_id AS uuid))
+    )::text)
+    """
+)
+
+
+def _str(value):
+    return str(value) if value is not None else None
+
+
+def channel() -> str:
+    return current_app.config.get("REALTIME_CHANNEL", "i2sales_changes")
+
+
+def enabled(session=None) -> bool:
+    if not current_app or not current_app.config.get("REALTIME_ENABLED", True):
+        return False
+    bind = session.get_bind() if session is not None else db.engine
+    return bind.dialect.name == "postgresql"
+
+
+def publish(conn, events) -> None:
+    """Enfileira eventos (dicts) na transação de `conn`."""
+    ch = channel()
+    for ev in events:
+        conn.execute(_NOTIFY, {"channel": ch, "payload": json.dumps(ev, default=str)})
+
+
+def _attr(obj, name, op):
+    # objetos removidos não podem recarregar atributos expirados
+    return inspect(obj).dict.get(name) if op == "delete" else getattr(obj, name)
+
+
+def _prev_owner(obj: Client):
+    hist = inspect(obj).attrs.owner_id.history
+    return hist.deleted[0] if hist.deleted else None
+
+
+def _after_flush(session, flush_context):
+    if not enabled(session):
+        return
+    conn = session.connection()
+    events = []
+    for op, objs in (("insert", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        for obj in objs:
+            if isinstance(obj, Client):
+                if op == "update" and not session.is_modified(obj):
+                    continue
+                ev = {
+                    "t": "client", "op": op,
+                    "id": _str(_attr(obj, "id", op)), "owner": _str(_attr(obj, "owner_id", op)),
+                }
+                prev = _prev_owner(obj) if op == "update" else None
+                if prev is not None and prev != obj.owner_id:
+                    ev["prevOwner"] = _str(prev)
+                events.append(ev)
+            elif isinstance(obj, Interaction):
+                if op == "update" and not session.is_modified(obj):
+                    continue
+                conn.execute(_NOTIFY_INTERACTION, {
+                    "channel": channel(), "op": op, "id": _str(_attr(obj, "id", op)),
+                    "client_id": _str(_attr(obj, "client_id", op)), "user_id": _str(_attr(obj, "user_id", op)),
+                })
+    if events:
+        publish(conn, events)
+
+
+def init_app(app):
+    """Registra o hook de publicação (after_flush: ids e defaults já preenchidos)."""
+    if not event.contains(db.session, "after_flush", _after_flush):
+        event.listen(db.session, "after_flush", _after_flush)
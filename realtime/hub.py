@@ -0,0 +1,227 @@
+"""
+Fan-out das mudanças (NOTIFY) para as conexões SSE deste worker.
+
+Um `Hub` por processo: uma thread com uma conexão dedicada (fora do pool) faz
+LISTEN no canal e, a cada lote de notificações,
+- invalida o cache de analytics dos donos afetados (também para escritas
+  feitas em outros workers);
+- entrega os eventos às assinaturas no escopo do papel (BROKER só os seus);
+- recalcula os KPIs dos escopos afetados (uma consulta por escopo, não por
+  assinante) e envia só as chaves que mudaram.
+
+A thread só sobe na primeira assinatura, já no worker (depois do fork).
+"""
+
+import json
+import os
+import queue
+import select
+import threading
+import time
+
+from analytics import cache as analytics_cache
+from analytics import team
+from extensions import db
+
+# sentinela: a fila estourou, o cliente precisa reconectar e recarregar
+RESYNC = ("resync", {})
+
+_TEAM = "*"
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+class Subscription:
+    def __init__(self, role: str, sub: str, maxsize: int):
+        self.role = role
+        self.sub = str(sub)
+        self.queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.kpis: dict = {}
+        self.closed = False
+
+    @property
+    def scope(self) -> str:
+        return self.sub if self.role == "BROKER" else _TEAM
+
+    def sees(self, ev: dict) -> bool:
+        if self.role != "BROKER":
+            return True
+        return self.sub in (ev.get("owner"), ev.get("prevOwner"))
+
+    def put(self, item) -> None:
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            # cliente lento: descarta o que está pendente e pede resync
+            self.closed = True
+            while True:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            self.queue.put_nowait(RESYNC)
+
+
+class Hub:
+    def __init__(self, app):
+        self.app = app
+        self.pid = os.getpid()
+        self._subs: set = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._direct = None
+        self._stop = threading.Event()
+
+    # -- assinaturas ---------------------------------------------------------
+
+    def subscribe(self, role: str, sub: str) -> Subscription:
+        cfg = self.app.config
+        with self._lock:
+            if len(self._subs) >= int(cfg.get("REALTIME_MAX_SUBSCRIBERS", 100)):
+                raise TooManySubscribers()
+            s = Subscription(role, sub, int(cfg.get("REALTIME_QUEUE_SIZE", 256)))
+            self._subs.add(s)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="realtime-listener", daemon=True)
+                self._thread.start()
+        return s
+
+    def unsubscribe(self, s: Subscription) -> None:
+        with self._lock:
+            self._subs.discard(s)
+
+    def subscribers(self) -> list:
+        with self._lock:
+            return list(self._subs)
+
+    # -- listener ------------------------------------------------------------
+
+    def _engine(self):
+        """Engine do LISTEN: DATABASE_DIRECT_URL se houver (pooler em modo transação não mantém LISTEN)."""
+        url = self.app.config.get("DATABASE_DIRECT_URL")
+        if not url:
+            return db.engine
+        if self._direct is None:
+            from sqlalchemy import create_engine
+            from sqlalchemy.pool import NullPool
+            from utils import db_engine
+
+            if url.startswith("postgres://"):
+                url = url.replace("postgres://", "postgresql+psycopg2://", 1)
+            self._direct = create_engine(url, poolclass=NullPool)
+            db_engine.install(self._direct, int(self.app.config.get("DB_DNS_CACHE_TTL", 300)))
+        return self._direct
+
+    def _connect(self):
+        raw = self._engine().raw_connection()
+        pg = raw.driver_connection
+        raw.detach()  # conexão longa e exclusiva: não ocupa vaga do pool
+        pg.autocommit = True
+        with pg.cursor() as cur:
+            cur.execute(f'LISTEN "{self.app.config.get("REALTIME_CHANNEL", "i2sales_changes")}"')
+        return pg
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while not self._stop.is_set():
+            pg = None
+            try:
+                with self.app.app_context():
+                    pg = self._connect()
+                backoff = 1.0
+                self._listen(pg)
+            except Exception:
+                self.app.logger.exception("[realtime] listener caiu; reconectando em %.0fs", backoff)
+                # eventos perdidos no intervalo: clientes recarregam
+                for s in self.subscribers():
+                    s.put(RESYNC)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                if pg is not None:
+                    try:
+                        pg.close()
+                    except Exception:
+                        pass
+
+    def _listen(self, pg) -> None:
+        debounce = float(self.app.config.get("REALTIME_DEBOUNCE_MS", 250)) / 1000.0
+        while not self._stop.is_set():
+            if select.select([pg], [], [], 5.0) == ([], [], []):
+                continue
+            pg.poll()
+            if not pg.notifies:
+                continue
+            # junta as notificações de uma rajada de escritas em um único lote
+            time.sleep(debounce)
+            pg.poll()
+            payloads = [n.payload for n in pg.notifies]
+            pg.notifies.clear()
+            self.dispatch(payloads)
+
+    # -- entrega -------------------------------------------------------------
+
+    def dispatch(self, payloads) -> None:
+        events = []
+        for p in payloads:
+            try:
+                events.append(json.loads(p))
+            except ValueError:
+                continue
+        if not events:
+            return
+
+        touched = set()
+        for ev in events:
+            touched.update(o for o in (ev.get("owner"), ev.get("prevOwner"), ev.get("user")) if o)
+        if touched:
+            analytics_cache.invalidate_owner(*touched)
+
+        subs = self.subscribers()
+        for s in subs:
+            for ev in events:
+                if s.sees(ev):
+                    s.put((ev["t"], _public(ev)))
+
+        scopes = {s.scope for s in subs} & (touched | {_TEAM})
+        if not scopes:
+            return
+        with self.app.app_context():
+            try:
+                fresh = {scope: team.kpis_for(None if scope == _TEAM else scope) for scope in scopes}
+            finally:
+                db.session.remove()
+        for s in subs:
+            if s.scope not in fresh:
+                continue
+            changed = {k: v for k, v in fresh[s.scope].items() if s.kpis.get(k) != v}
+            if changed:
+                s.kpis.update(changed)
+                s.put(("kpis", {"kpis": changed}))
+
+
+def _public(ev: dict) -> dict:
+    out = {"op": ev.get("op"), "id": ev.get("id"), "ownerId": ev.get("owner")}
+    if ev.get("prevOwner"):
+        out["previousOwnerId"] = ev["prevOwner"]
+    if ev.get("t") == "interaction":
+        out["clientId"] = ev.get("clientId")
+        out["userId"] = ev.get("user")
+    return out
+
+
+_hub: Hub | None = None
+_hub_lock = threading.Lock()
+
+
+def get_hub(app) -> Hub:
+    """Hub do processo atual (recriado depois de um fork)."""
+    global _hub
+    with _hub_lock:
+        if _hub is None or _hub.pid != os.getpid():
+            _hub = Hub(app)
+        return _hub
@@ -0,0 +1,69 @@
+# realtime/routes.py
+import json
+import queue
+import time
+
+from flask import Blueprint, Response, current_app, g, jsonify, stream_with_context
+
+from extensions import db
+from auth.supabase_middleware import supabase_required
+from analytics import team
+from realtime import events
+from realtime.hub import RESYNC, TooManySubscribers, get_hub
+
+bp = Blueprint("realtime", __name__)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+@bp.get("/stream")
+@supabase_required()
+def stream():
+    """Server-Sent Events: mudanças em clients/interactions e deltas de KPIs.
+
+    Aceita o token no header Authorization ou no cookie de acesso (EventSource
+    não envia headers). A conexão é encerrada depois de REALTIME_STREAM_MAX_SECONDS
+    e o navegador reconecta sozinho (campo `retry`).
+    """
+    cfg = current_app.config
+    if not events.enabled() or int(cfg.get("REALTIME_MAX_SUBSCRIBERS", 100)) <= 0:
+        return jsonify({"error": "Stream indisponível."}), 503
+    j = getattr(g, "jwt", {})
+    role, sub = j.get("role"), j.get("sub")
+
+    initial = team.kpis_for(sub if role == "BROKER" else None)
+    # não segura conexão do pool durante o stream
+    db.session.remove()
+    hub = get_hub(current_app._get_current_object())
+    try:
+        subscription = hub.subscribe(role, sub)
+    except TooManySubscribers:
+        return jsonify({"error": "Muitas conexões de stream."}), 503
+    subscription.kpis = dict(initial)
+
+    heartbeat = float(cfg.get("REALTIME_HEARTBEAT_SECONDS", 15))
+    deadline = time.monotonic() + float(cfg.get("REALTIME_STREAM_MAX_SECONDS", 300))
+
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            yield _sse("kpis", {"kpis": initial, "full": True})
+            while time.monotonic() < deadline:
+                try:
+                    item = subscription.queue.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                yield _sse(*item)
+                if item is RESYNC:
+                    return
+        finally:
+            hub.unsubscribe(subscription)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -8,6 +8,8 @@ from extensions import db
 from models.client import Client
 from utils.supabase_jwt import auth_required
 from utils.responses import bad_request, ok
+from analytics.cache import invalidate_owner
+from utils.statement_timeout import statement_timeout
 
 
 bp = Blueprint("clients_v2", __name__)
@@ -15,7 +17,7 @@ bp = Blueprint("clients_v2", __name__)
 
 def _camel_client(c: Client) -> dict:
     return {
-        "id": str(c.id),
+        "id": c.id,
         "name": c.name,
         "phone": c.phone,
         "source": c.source,
@@ -23,15 +25,16 @@ def _camel_client(c: Client) -> dict:
         "email": c.email,
         "observations": c.observations,
         "product": c.product,
-        "propertyValue": float(c.property_value) if c.property_value is not None else None,
+        "propertyValue": c.property_value,
         "followUpState": c.follow_up_state,
-        "createdAt": c.created_at.isoformat() if c.created_at else None,
-        "updatedAt": c.updated_at.isoformat() if c.updated_at else None,
+        "createdAt": c.created_at,
+        "updatedAt": c.updated_at,
     }
 
 
 @bp.get("/clients")
 @auth_required
+@statement_timeout(5000)
 def list_clients():
     owner_id = g.user_id
     if not owner_id:
@@ -94,5 +97,6 @@ def create_client():
 
     db.session.add(c)
     db.session.commit()
+    invalidate_owner(owner_id)
     return jsonify(_camel_client(c)), 201
 
@@ -45,12 +45,12 @@ def list_interactions():
     )
     data = [
         {
-            "id": str(i.id),
+            "id": i.id,
             "type": i.type,
             "observation": i.observation,
             "fromStatus": i.from_status,
             "toStatus": i.to_status,
-            "createdAt": i.created_at.isoformat() if i.created_at else None,
+            "createdAt": i.created_at,
         }
         for i in items
     ]
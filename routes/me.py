@@ -39,7 +39,7 @@ def me():
 
     return jsonify({
         "user": {
-            "id": str(user.id),
+            "id": user.id,
             "email": user.email,
             "name": user.name,
             "role": user.role,
@@ -0,0 +1,301 @@
+"""
+Gerador de dados sintéticos em volume (`flask generate_data`).
+
+Cria N usuários (1 ADMIN, ~5% MANAGER, o resto BROKER), milhões de clientes e
+dezenas de milhões de interações com distribuições próximas das de produção:
+- dono do cliente enviesado (Zipf: poucos corretores concentram a carteira;
+  ~1% sem dono)
+- created_at espalhado em --days dias, mais denso perto do "agora" (carteira
+  crescendo) e no horário comercial
+- status pelo funil (Primeiro Atendimento -> Em Tratativa -> Proposta ->
+  Fechado, ou Perdido em qualquer etapa), mais avançado quanto mais antigo o cliente
+- histórico coerente: CLIENT_CREATED, um STATUS_CHANGE por etapa, NOTEs e
+  follow-ups agendados/concluídos; o follow_up_state e o vencimento do cliente
+  saem do último follow-up (vencido = "Atrasado")
+
+Os clientes são gerados em fatias de --chunk-size; cada fatia tem o próprio
+`random.Random(f"{seed}:{fatia}")`, então a mesma semente e os mesmos
+parâmetros geram as mesmas linhas qualquer que seja o número de workers. As
+fatias são carregadas com COPY (clientes e interações na mesma transação) por
+--workers processos, cada um com a própria conexão (DATABASE_DIRECT_URL quando
+definida). Todos os usuários compartilham um único hash bcrypt da senha do
+seed_admin. No fim, os rollups de analytics são recalculados do zero (o COPY
+não passa pelo hook do ORM) e as tabelas são analisadas.
+
+Para banco descartável: --truncate apaga clientes, interações e os usuários
+gerados antes (os ids são determinísticos, então rodar duas vezes sem ele viola
+a chave primária).
+"""
+
+import csv
+import io
+import multiprocessing
+import os
+import random
+import time
+import uuid
+from bisect import bisect
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+
+from flask import current_app
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from extensions import db, bcrypt
+from scripts.seed_admin import PASSWORD
+
+EMAIL_DOMAIN = "generated.i2sales.test"
+
+FUNNEL = ["Primeiro Atendimento", "Em Tratativa", "Proposta", "Fechado"]
+LOST = "Perdido"
+# etapa final do cliente por idade (dias): clientes novos ainda estão no começo do funil
+STAGE_WEIGHTS = [
+    (7, {"Primeiro Atendimento": 70, "Em Tratativa": 25, "Proposta": 5}),
+    (30, {"Primeiro Atendimento": 40, "Em Tratativa": 35, "Proposta": 12, "Fechado": 3, LOST: 10}),
+    (None, {"Primeiro Atendimento": 28, "Em Tratativa": 24, "Proposta": 12, "Fechado": 9, LOST: 27}),
+]
+# follow-up encerrado: o que sobra no cliente
+CLOSED_FU = (["Sem Follow Up", "Concluido", "Cancelado"], [60, 30, 10])
+
+SOURCES = (["site", "indicacao", "instagram", "portal", "facebook", "whatsapp", "plantao"],
+           [30, 18, 16, 14, 10, 8, 4])
+PRODUCTS = (["Apartamento", "Casa", "Terreno", "Sala Comercial", "Cobertura", None],
+            [45, 22, 8, 6, 4, 15])
+FIRST_NAMES = ["Ana", "Bruno", "Carla", "Diego", "Eduarda", "Felipe", "Gabriela", "Henrique", "Isabela",
+               "João", "Karina", "Lucas", "Mariana", "Nicolas", "Olívia", "Pedro", "Rafaela", "Samuel",
+               "Tatiane", "Vinícius", "Yasmin", "Leonardo", "Beatriz", "Gustavo", "Larissa", "Thiago"]
+SURNAMES = ["Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima",
+            "Gomes", "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Rocha", "Barbosa"]
+NOTES = ["Cliente pediu retorno à tarde", "Enviado material do empreendimento", "Sem resposta no WhatsApp",
+         "Visita agendada", "Cliente comparando com outro imóvel", "Aguardando aprovação de crédito",
+         "Ligação sem sucesso", "Cliente pediu desconto"]
+# horário comercial em UTC (09h-21h em São Paulo)
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 6, 8, 9, 9, 7, 8, 9, 9, 8, 6, 4, 2]
+
+CLIENT_COLUMNS = ("id", "name", "phone", "email", "source", "status", "owner_id", "observations",
+                  "created_at", "updated_at", "product", "property_value", "follow_up_state", "follow_up_due_at")
+INTERACTION_COLUMNS = ("id", "client_id", "user_id", "type", "observation", "from_status", "to_status",
+                       "created_at", "updated_at")
+
+# estado de cada processo worker
+_engine = None
+
+
+def _uuid(rng) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def make_users(n: int, seed: int, anchor: datetime) -> list:
+    """[(id, name, email, role, created_at)]: 1 ADMIN, ~5% MANAGER, o resto BROKER."""
+    rng = random.Random(f"{seed}:users")
+    managers = max(1, n // 20) if n > 2 else 0
+    users = []
+    for i in range(n):
+        role = "ADMIN" if i == 0 else "MANAGER" if i <= managers else "BROKER"
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}"
+        created = anchor - timedelta(days=rng.uniform(0, 900))
+        users.append((_uuid(rng), name, f"gen-{role.lower()}-{i:05d}@{EMAIL_DOMAIN}", role, created))
+    return users
+
+
+def owner_weights(n: int, skew: float) -> list:
+    """Pesos cumulativos Zipf(skew) sobre os corretores (o 1º concentra mais clientes)."""
+    return list(accumulate(1.0 / (k + 1) ** skew for k in range(n)))
+
+
+def _pick(rng, cum, items):
+    return items[bisect(cum, rng.random() * cum[-1])]
+
+
+def _moment(rng, base: datetime) -> datetime:
+    """Um instante no dia de `base`, no horário comercial."""
+    hour = rng.choices(range(24), HOUR_WEIGHTS)[0]
+    return base.replace(hour=hour, minute=rng.randrange(60), second=rng.randrange(60),
+                        microsecond=rng.randrange(1_000_000))
+
+
+def _final_stage(rng, age_days: float) -> str:
+    for limit, weights in STAGE_WEIGHTS:
+        if limit is None or age_days < limit:
+            return rng.choices(list(weights), list(weights.values()))[0]
+
+
+def _stage_path(rng, final: str) -> list:
+    """Etapas percorridas depois da primeira (uma STATUS_CHANGE por etapa)."""
+    if final == LOST:
+        return FUNNEL[1:rng.randint(1, 3)] + [LOST]
+    return FUNNEL[1:FUNNEL.index(final) + 1]
+
+
+def generate_chunk(spec: dict, index: int):
+    """Linhas (clientes, interações) da fatia `index`; determinístico por (seed, index)."""
+    rng = random.Random(f"{spec['seed']}:{index}")
+    anchor = spec["anchor"]
+    brokers, managers = spec["brokers"], spec["managers"]
+    owner_cum = spec["owner_cum"]
+    mean_extra = max(0.0, spec["interactions_per_client"] - 2.3)
+    first = index * spec["chunk_size"]
+    count = min(spec["chunk_size"], spec["clients"] - first)
+
+    clients, interactions = [], []
+    for k in range(count):
+        cid = _uuid(rng)
+        owner = None if rng.random() < 0.01 else _pick(rng, owner_cum, brokers)
+        # densidade crescente em direção ao anchor (a carteira cresce com o tempo)
+        age = spec["days"] * (1 - rng.random() ** 0.5)
+        created = _moment(rng, anchor - timedelta(days=age))
+        if created > anchor:
+            created = anchor - timedelta(minutes=rng.uniform(1, 600))
+        age = (anchor - created).total_seconds() / 86400
+
+        final = _final_stage(rng, age)
+        path = _stage_path(rng, final)
+        extras = int(rng.expovariate(1 / mean_extra)) if mean_extra else 0
+        # o histórico do cliente dura em média 45 dias depois da criação
+        span = min(anchor - created, timedelta(days=rng.expovariate(1 / 45.0)))
+        times = sorted(created + span * rng.random() for _ in range(len(path) + extras))
+        kinds = ["STATUS_CHANGE"] * len(path) + ["EXTRA"] * extras
+        rng.shuffle(kinds)
+
+        first_name, surname = rng.choice(FIRST_NAMES), rng.choice(SURNAMES)
+        name = f"{first_name} {surname} {first + k}"
+        actor = owner or _pick(rng, owner_cum, brokers)
+        status = FUNNEL[0]
+        fu_state, fu_due, fu_open = "Sem Follow Up", None, False
+        rows = [(_uuid(rng), cid, actor, "CLIENT_CREATED", "Cliente criado", None, status, created, created)]
+        steps = iter(path)
+        for when, kind in zip(times, kinds):
+            user = rng.choice(managers) if managers and rng.random() < 0.05 else actor
+            if kind == "STATUS_CHANGE":
+                nxt = next(steps)
+                rows.append((_uuid(rng), cid, user, "STATUS_CHANGE", None, status, nxt, when, when))
+                status = nxt
+                if status in ("Fechado", LOST):
+                    fu_open, fu_due = False, None
+                continue
+            roll = rng.random()
+            if roll < 0.25 and not fu_open and status not in ("Fechado", LOST):
+                fu_open, fu_due = True, when + timedelta(days=rng.uniform(1, 10))
+                rows.append((_uuid(rng), cid, user, "FOLLOW_UP_SCHEDULED", None, status, status, when, when))
+            elif roll < 0.45 and fu_open:
+                fu_open, fu_due = False, None
+                rows.append((_uuid(rng), cid, user, "FOLLOW_UP_DONE", None, status, status, when, when))
+            else:
+                rows.append((_uuid(rng), cid, user, "NOTE", rng.choice(NOTES), status, status, when, when))
+        if fu_open and fu_due < anchor - timedelta(days=30) and rng.random() < 0.8:
+            fu_open, fu_due = False, None  # pendência antiga: quase sempre encerrada na edição do cliente
+        if fu_open:
+            fu_state = "Ativo" if fu_due > anchor else "Atrasado"
+        elif len(rows) > 1 and rng.random() < 0.5:
+            fu_state = rng.choices(*CLOSED_FU)[0]
+        last = rows[-1][7]
+
+        product = rng.choices(*PRODUCTS)[0]
+        value = round(rng.lognormvariate(13.0, 0.6), -3) if product and rng.random() < 0.7 else None
+        clients.append((
+            cid, name, f"119{rng.randrange(10**8):08d}",
+            f"{first_name}.{surname}.{first + k}@example.com".lower() if rng.random() < 0.6 else None,
+            rng.choices(*SOURCES)[0], status, owner,
+            rng.choice(NOTES) if rng.random() < 0.1 else None,
+            created, last, product, value, fu_state, fu_due,
+        ))
+        interactions.extend(rows)
+    return clients, interactions
+
+
+def _csv(rows) -> io.StringIO:
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    for row in rows:
+        w.writerow([v.isoformat() if isinstance(v, datetime) else v for v in row])
+    buf.seek(0)
+    return buf
+
+
+def _copy(cur, table: str, columns, rows) -> None:
+    cur.copy_expert(f"COPY public.{table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", _csv(rows))
+
+
+def _init_worker(dsn: str) -> None:
+    global _engine
+    _engine = create_engine(dsn, poolclass=NullPool)
+
+
+def load_chunk(args) -> tuple:
+    """Worker: gera a fatia e grava com COPY numa transação; devolve (clientes, interações)."""
+    spec, index = args
+    clients, interactions = generate_chunk(spec, index)
+    conn = _engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("SET synchronous_commit = off")
+        _copy(cur, "clients", CLIENT_COLUMNS, clients)
+        _copy(cur, "interactions", INTERACTION_COLUMNS, interactions)
+        conn.commit()
+    finally:
+        conn.close()
+    return len(clients), len(interactions)
+
+
+def _truncate() -> None:
+    db.session.execute(text("TRUNCATE public.interactions, public.clients CASCADE"))
+    db.session.execute(text("DELETE FROM public.users WHERE email LIKE :p"), {"p": f"%@{EMAIL_DOMAIN}"})
+    db.session.commit()
+
+
+def _load_users(users) -> None:
+    pwd_hash = bcrypt.generate_password_hash(PASSWORD).decode("utf-8")  # um hash só para todos
+    conn = db.session.connection().connection.driver_connection
+    _copy(conn.cursor(), "users", ("id", "name", "email", "password_hash", "role", "created_at"),
+          [(uid, name, email, pwd_hash, role, created) for uid, name, email, role, created in users])
+    db.session.commit()
+
+
+def run(*, users: int, clients: int, interactions_per_client: float, workers: int, seed: int,
+        days: int, chunk_size: int, owner_skew: float, truncate: bool) -> dict:
+    if users < 3:
+        raise ValueError("--users precisa de pelo menos 3 (admin, gerente e corretor)")
+    anchor = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    started = time.perf_counter()
+
+    if truncate:
+        _truncate()
+    generated = make_users(users, seed, anchor)
+    _load_users(generated)
+    brokers = [u[0] for u in generated if u[3] == "BROKER"]
+    spec = {
+        "seed": seed, "anchor": anchor, "days": days, "clients": clients, "chunk_size": chunk_size,
+        "interactions_per_client": interactions_per_client,
+        "brokers": brokers, "managers": [u[0] for u in generated if u[3] == "MANAGER"],
+        "owner_cum": owner_weights(len(brokers), owner_skew),
+    }
+    chunks = (clients + chunk_size - 1) // chunk_size
+    print(f"{users} usuários; {clients} clientes em {chunks} fatias com {workers} workers (seed {seed})")
+
+    cfg = current_app.config
+    dsn = cfg.get("DATABASE_DIRECT_URL") or cfg["SQLALCHEMY_DATABASE_URI"]
+    total_c = total_i = done = 0
+    # spawn: o worker não herda o engine/pool do app
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(workers, initializer=_init_worker, initargs=(dsn,)) as pool:
+        for n_c, n_i in pool.imap_unordered(load_chunk, ((spec, k) for k in range(chunks))):
+            total_c, total_i, done = total_c + n_c, total_i + n_i, done + 1
+            elapsed = time.perf_counter() - started
+            print(f"  {done}/{chunks} fatias: {total_c} clientes, {total_i} interações "
+                  f"({total_i / elapsed:,.0f} interações/s)", flush=True)
+
+    from analytics import rollups
+    print("Rollups:", rollups.refresh_all(rebuild=True))
+    db.session.execute(text("ANALYZE public.users, public.clients, public.interactions"))
+    db.session.commit()
+
+    out = {"users": users, "clients": total_c, "interactions": total_i,
+           "seconds": round(time.perf_counter() - started, 1)}
+    print("Gerado:", out)
+    print(f"Login: qualquer gen-*@{EMAIL_DOMAIN} / {PASSWORD}")
+    return out
+
+
+def default_workers() -> int:
+    return max(1, min(8, (os.cpu_count() or 2) - 1))
@@ -0,0 +1,56 @@
+"""
+Aplica scripts/migrations/*.sql em ordem, cada arquivo uma única vez.
+
+Os aplicados ficam em public.schema_migrations. Cada arquivo roda na própria
+transação, junto com o registro; um advisory lock de transação impede dois
+deploys aplicando o mesmo arquivo. Roda antes do gunicorn no deploy
+(`python -m flask --app app migrate`).
+"""
+
+import os
+
+from sqlalchemy import text
+
+from extensions import db
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+_LOCK_KEY = "i2sales_migrate"
+# espera por locks curtas: um deploy não fica na fila atrás de uma query longa segurando a tabela
+_LOCK_TIMEOUT = "10s"
+
+
+def pending_files(applied: set) -> list:
+    names = sorted(n for n in os.listdir(MIGRATIONS_DIR) if n.endswith(".sql"))
+    return [n for n in names if n not in applied]
+
+
+def run() -> list:
+    """Aplica as migrações pendentes; devolve os nomes aplicados."""
+    done = []
+    with db.engine.connect() as conn:
+        conn.execute(text(
+            """
+            CREATE TABLE IF NOT EXISTS public.schema_migrations (
+                name       varchar(255) PRIMARY KEY,
+                applied_at timestamptz  NOT NULL DEFAULT now()
+            )
+            """
+        ))
+        conn.commit()
+        applied = set(conn.execute(text("SELECT name FROM public.schema_migrations")).scalars())
+        conn.commit()
+        for name in pending_files(applied):
+            # lock de transação (não de sessão): funciona também atrás do pooler em modo transaction
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:k))"), {"k": _LOCK_KEY})
+            if conn.execute(text("SELECT 1 FROM public.schema_migrations WHERE name = :n"), {"n": name}).first():
+                conn.rollback()  # outro deploy aplicou enquanto esperávamos o lock
+                continue
+            with open(os.path.join(MIGRATIONS_DIR, name), encoding="utf-8") as f:
+                sql = f.read()
+            conn.exec_driver_sql(f"SET LOCAL lock_timeout = '{_LOCK_TIMEOUT}'")
+            conn.exec_driver_sql(sql)
+            conn.execute(text("INSERT INTO public.schema_migrations (name) VALUES (:n)"), {"n": name})
+            conn.commit()
+            done.append(name)
+    return done
@@ -0,0 +1,27 @@
+-- Rollups de analytics (analytics/rollups.py)
+-- Depois de aplicar: `python -m flask --app app refresh_rollups` para o backfill inicial.
+
+CREATE TABLE IF NOT EXISTS public.analytics_interaction_hourly (
+    bucket      timestamptz  NOT NULL,
+    user_id     uuid         NOT NULL,
+    type        varchar(255) NOT NULL,
+    total       integer      NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, user_id, type)
+);
+CREATE INDEX IF NOT EXISTS ix_analytics_interaction_hourly_user_bucket
+    ON public.analytics_interaction_hourly (user_id, bucket);
+
+CREATE TABLE IF NOT EXISTS public.analytics_client_status (
+    owner_id        uuid        NOT NULL,
+    created_day     date        NOT NULL,
+    status          varchar     NOT NULL,
+    follow_up_state varchar(20) NOT NULL,
+    total           integer     NOT NULL DEFAULT 0,
+    PRIMARY KEY (owner_id, created_day, status, follow_up_state)
+);
+
+CREATE TABLE IF NOT EXISTS public.analytics_rollup_state (
+    name        varchar(64) PRIMARY KEY,
+    watermark   timestamptz,
+    updated_at  timestamptz NOT NULL DEFAULT now()
+);
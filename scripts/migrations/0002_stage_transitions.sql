@@ -0,0 +1,20 @@
+-- Permanências por etapa (analytics/transitions.py)
+-- Preenchida por `python -m flask --app app refresh_rollups` a partir do histórico de interações.
+
+CREATE TABLE IF NOT EXISTS public.analytics_stage_stints (
+    interaction_id uuid         PRIMARY KEY,
+    client_id      uuid         NOT NULL,
+    owner_id       uuid         NOT NULL,
+    user_id        uuid         NOT NULL,
+    prev_stage     varchar(255),
+    stage          varchar(255) NOT NULL,
+    entered_at     timestamptz  NOT NULL,
+    left_at        timestamptz,
+    next_stage     varchar(255)
+);
+CREATE INDEX IF NOT EXISTS ix_analytics_stage_stints_owner_entered
+    ON public.analytics_stage_stints (owner_id, entered_at);
+CREATE INDEX IF NOT EXISTS ix_analytics_stage_stints_owner_left
+    ON public.analytics_stage_stints (owner_id, left_at);
+CREATE INDEX IF NOT EXISTS ix_analytics_stage_stints_open
+    ON public.analytics_stage_stints (client_id) WHERE left_at IS NULL;
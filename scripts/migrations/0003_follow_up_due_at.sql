@@ -0,0 +1,11 @@
+-- Vencimento de follow-up (clients/followups.py)
+
+ALTER TABLE public.clients ADD COLUMN IF NOT EXISTS follow_up_due_at timestamptz;
+
+CREATE INDEX IF NOT EXISTS ix_clients_follow_up_due_pending
+    ON public.clients (follow_up_due_at)
+    WHERE follow_up_state = 'Ativo' AND follow_up_due_at IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS ix_clients_owner_follow_up_due
+    ON public.clients (owner_id, follow_up_due_at)
+    WHERE follow_up_state IN ('Ativo','Atrasado') AND follow_up_due_at IS NOT NULL;
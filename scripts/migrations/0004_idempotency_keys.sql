@@ -0,0 +1,20 @@
+-- Idempotency-Key nos POSTs de clientes e interações (utils/idempotency.py)
+
+CREATE TABLE IF NOT EXISTS public.idempotency_keys (
+    user_id          uuid         NOT NULL,
+    key              varchar(255) NOT NULL,
+    endpoint         varchar(128) NOT NULL,
+    request_hash     varchar(64)  NOT NULL,
+    status           varchar(16)  NOT NULL,
+    response_status  integer,
+    response_body    bytea,
+    response_headers jsonb,
+    locked_at        timestamptz,
+    created_at       timestamptz  NOT NULL DEFAULT now(),
+    expires_at       timestamptz  NOT NULL,
+    PRIMARY KEY (user_id, key)
+);
+
+-- limpeza periódica dos registros vencidos
+CREATE INDEX IF NOT EXISTS ix_idempotency_keys_expires_at
+    ON public.idempotency_keys (expires_at);
@@ -16,3 +16,55 @@ def test_funnel(client, base_url, auth_headers):
     r = client.get(f"{base_url}/analytics/funnel?startDate=2025-01-01&endDate=2025-12-31", headers=auth_headers)
     assert r.status_code == 200
     assert "stages" in r.json()
+
+def test_productivity_invalid_range(client, base_url, auth_headers):
+    r = client.get(f"{base_url}/analytics/productivity?startDate=2025-12-31&endDate=2025-01-01", headers=auth_headers)
+    assert r.status_code == 400
+    r = client.get(f"{base_url}/analytics/funnel?startDate=foo&endDate=2025-01-01", headers=auth_headers)
+    assert r.status_code == 400
+
+def test_cache_stats(client, base_url, auth_headers):
+    client.get(f"{base_url}/analytics/broker-kpis", headers=auth_headers)
+    client.get(f"{base_url}/analytics/broker-kpis", headers=auth_headers)
+    r = client.get(f"{base_url}/analytics/cache-stats", headers=auth_headers)
+    assert r.status_code == 200
+    body = r.json()
+    for k in ["hits", "misses", "hitRatio", "size"]:
+        assert k in body
+
+def test_productivity_granularity_and_group_by(client, base_url, auth_headers):
+    r = client.get(
+        f"{base_url}/analytics/productivity?startDate=2025-01-01&endDate=2025-03-31"
+        "&granularity=month&tz=America/Sao_Paulo&groupBy=type",
+        headers=auth_headers,
+    )
+    assert r.status_code == 200
+    body = r.json()
+    assert body["granularity"] == "month"
+    for g in body["groups"]:
+        assert [p["date"] for p in g["series"]] == ["2025-01-01", "2025-02-01", "2025-03-01"]
+
+def test_team_dashboard(client, base_url, manager_headers):
+    r = client.get(f"{base_url}/analytics/team?startDate=2025-01-01&endDate=2025-01-31", headers=manager_headers)
+    assert r.status_code == 200
+    body = r.json()
+    assert len(body["buckets"]) == 31
+    for b in body["brokers"]:
+        assert set(b["kpis"]) == {"totalLeads", "leadsPrimeiroAtendimento", "leadsEmTratativa", "followUpAtrasado"}
+        assert len(b["productivity"]) == len(body["buckets"])
+
+def test_stage_transitions(client, base_url, auth_headers):
+    r = client.get(f"{base_url}/analytics/stage-transitions?startDate=2025-01-01&endDate=2025-12-31", headers=auth_headers)
+    assert r.status_code == 200
+    body = r.json()
+    for k in ["matrix", "conversionRates", "timeInStage", "watermark"]:
+        assert k in body
+
+def test_reports(client, base_url, auth_headers):
+    for name in ["cohorts", "pipeline", "conversion"]:
+        r = client.get(f"{base_url}/analytics/reports/{name}", headers=auth_headers)
+        assert r.status_code in (200, 503)
+        if r.status_code == 200:
+            assert {"report", "snapshotAt", "rows"} <= set(r.json())
+    r = client.get(f"{base_url}/analytics/reports/unknown", headers=auth_headers)
+    assert r.status_code == 404
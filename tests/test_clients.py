@@ -43,3 +43,30 @@ def test_clients_crud_flow(client, base_url, auth_headers):
     # Delete (requires ADMIN)
     r = client.delete(f"{base_url}/clients/{cid}", headers=auth_headers)
     assert r.status_code in (204, 200)
+
+
+def test_clients_list_compression(client, base_url, auth_headers):
+    r = client.get(f"{base_url}/clients", headers={**auth_headers, "Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert "accept-encoding" in r.headers.get("vary", "").lower()
+    # httpx descomprime; abaixo de COMPRESSION_MIN_BYTES (1024) a resposta vai sem compressão
+    assert r.headers.get("content-encoding") == ("gzip" if len(r.content) >= 1024 else None)
+    assert isinstance(r.json(), list)
+
+
+@pytest.mark.destructive
+def test_create_client_idempotency_key(client, base_url, auth_headers):
+    headers = {**auth_headers, "Idempotency-Key": f"pytest-{rand_phone()}"}
+    payload = {"name": rand_name("IDEM"), "phone": rand_phone(), "source": "pytest"}
+    r1 = client.post(f"{base_url}/clients", headers=headers, json=payload)
+    assert r1.status_code == 201, r1.text
+    # retry: mesma resposta, sem criar outro cliente
+    r2 = client.post(f"{base_url}/clients", headers=headers, json=payload)
+    assert r2.status_code == 201
+    assert r2.headers.get("idempotent-replayed") == "true"
+    assert r2.json()["id"] == r1.json()["id"]
+    # mesma chave com outro corpo
+    r3 = client.post(f"{base_url}/clients", headers=headers, json={**payload, "name": rand_name("IDEM")})
+    assert r3.status_code == 422
+
+    client.delete(f"{base_url}/clients/{r1.json()['id']}", headers=auth_headers)
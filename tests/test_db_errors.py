@@ -0,0 +1,82 @@
+# Roda em processo (sem servidor): as falhas de banco são simuladas, nenhuma conexão é aberta.
+import os
+import sys
+import uuid
+from pathlib import Path
+
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg2://i2sales@localhost:5432/i2sales")
+os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # app do repo, sem servidor
+
+import pytest
+from sqlalchemy import exc
+
+import app as appmod
+from auth import supabase_middleware
+from extensions import db
+
+
+class _QueryCanceled(Exception):
+    pgcode = "57014"
+
+
+@pytest.fixture
+def api(monkeypatch):
+    app = appmod.create_app()
+    claims = {"sub": str(uuid.uuid4()), "email": "pool@example.com", "role": "authenticated"}
+    monkeypatch.setattr(supabase_middleware, "verify_supabase_jwt", lambda token: claims)
+    return app
+
+
+def _fail_user_lookup(monkeypatch, error):
+    def boom(*args, **kwargs):
+        raise error
+
+    monkeypatch.setattr(db.session, "get", boom)
+
+
+def test_pool_exhausted_during_auth_is_503(api, monkeypatch):
+    _fail_user_lookup(monkeypatch, exc.TimeoutError("QueuePool limit of size 5 overflow 10 reached"))
+    r = api.test_client().get("/api/v1/clients", headers={"Authorization": "Bearer x"})
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "1"
+    assert "QueuePool" not in r.get_data(as_text=True)
+
+
+def test_statement_timeout_during_auth_is_504(api, monkeypatch):
+    _fail_user_lookup(monkeypatch, exc.OperationalError("SELECT ...", {}, _QueryCanceled("canceling statement")))
+    r = api.test_client().get("/api/v1/clients", headers={"Authorization": "Bearer x"})
+    assert r.status_code == 504
+    assert "timeoutMs" in r.get_json()
+
+
+@pytest.fixture
+def authed(api, monkeypatch):
+    user = type("User", (), {"id": uuid.uuid4(), "role": "BROKER", "email": "pool@example.com"})()
+    monkeypatch.setattr(supabase_middleware, "_ensure_local_user", lambda *args, **kwargs: user)
+    monkeypatch.setattr(db.session, "execute", lambda *args, **kwargs: None)  # upsert do profile
+    return api
+
+
+def _fail_commit(monkeypatch, error):
+    def boom(*args, **kwargs):
+        raise error
+
+    monkeypatch.setattr(db.session, "commit", boom)
+
+
+def test_pool_exhausted_on_create_client_is_503(authed, monkeypatch):
+    _fail_commit(monkeypatch, exc.TimeoutError("QueuePool limit of size 5 overflow 10 reached"))
+    r = authed.test_client().post("/api/v1/clients", json={"name": "Pool", "phone": "11900000000"},
+                                  headers={"Authorization": "Bearer x"})
+    assert r.status_code == 503
+    assert "QueuePool" not in r.get_data(as_text=True)
+
+
+def test_statement_timeout_on_create_client_is_504(authed, monkeypatch):
+    _fail_commit(monkeypatch, exc.OperationalError("INSERT ...", {}, _QueryCanceled("canceling statement")))
+    r = authed.test_client().post("/api/v1/clients", json={"name": "Pool", "phone": "11900000000"},
+                                  headers={"Authorization": "Bearer x"})
+    assert r.status_code == 504
+    assert "INSERT" not in r.get_data(as_text=True)
@@ -0,0 +1,43 @@
+# Roda em processo (sem servidor): só o registro dos jobs, sem gerar arquivo nem tocar no banco.
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg2://i2sales@localhost:5432/i2sales")
+os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # app do repo, sem servidor
+
+import app as appmod
+from exports import jobs
+
+
+def test_concurrent_identical_exports_share_one_job(tmp_path, monkeypatch):
+    app = appmod.create_app()
+    app.config["EXPORT_DIR"] = str(tmp_path)
+    monkeypatch.setattr(jobs, "_enqueue", lambda app, base, job: None)
+    write = jobs._write
+
+    def slow_write(base, job):
+        time.sleep(0.05)  # alarga a janela entre reservar e publicar o job
+        write(base, job)
+
+    monkeypatch.setattr(jobs, "_write", slow_write)
+
+    results = []
+    barrier = threading.Barrier(8)
+
+    def submit():
+        with app.app_context():
+            barrier.wait()
+            results.append(jobs.submit({"sub": "manager", "role": "MANAGER"}, "csv"))
+
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len({job["id"] for job, _ in results}) == 1
+    assert sum(created for _, created in results) == 1
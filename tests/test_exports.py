@@ -0,0 +1,34 @@
+import gzip
+import time
+
+
+def test_export_job_flow(client, base_url, auth_headers):
+    r = client.post(f"{base_url}/exports", headers=auth_headers, json={"format": "csv"})
+    assert r.status_code in (200, 202), r.text
+    job = r.json()
+    # pedido igual enquanto o primeiro não expira: mesmo job
+    r = client.post(f"{base_url}/exports", headers=auth_headers, json={"format": "csv"})
+    assert r.json()["id"] == job["id"]
+
+    for _ in range(60):
+        job = client.get(f"{base_url}/exports/{job['id']}", headers=auth_headers).json()
+        if job["status"] not in ("queued", "running"):
+            break
+        time.sleep(0.5)
+    assert job["status"] == "done", job
+    assert job["downloadUrl"].endswith(f"/exports/{job['id']}/download")
+
+    download = f"{base_url}/exports/{job['id']}/download"
+    r = client.get(download, headers=auth_headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/gzip"
+    assert gzip.decompress(r.content).decode().startswith("id,name,phone")
+
+    r = client.get(download, headers={**auth_headers, "Range": "bytes=0-9"})
+    assert r.status_code == 206
+    assert len(r.content) == 10
+
+
+def test_export_invalid_format(client, base_url, auth_headers):
+    r = client.post(f"{base_url}/exports", headers=auth_headers, json={"format": "xml"})
+    assert r.status_code == 400
@@ -0,0 +1,40 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from conftest import rand_phone, rand_name
+
+@pytest.mark.destructive
+def test_follow_up_due_and_worklist(client, base_url, auth_headers):
+    payload = {
+        "name": rand_name("FU"),
+        "phone": rand_phone(),
+        "source": "pytest",
+        "status": "Primeiro Atendimento",
+        "followUpState": "Sem Follow Up"
+    }
+    r = client.post(f"{base_url}/clients", headers=auth_headers, json=payload)
+    assert r.status_code == 201, r.text
+    cid = r.json()["id"]
+
+    due = (datetime.now(timezone.utc) + timedelta(hours=2)).isoformat()
+    inter = {"clientId": cid, "type": "FOLLOW_UP_SCHEDULED", "dueAt": due}
+    r = client.post(f"{base_url}/interactions", headers=auth_headers, json=inter)
+    assert r.status_code == 201, r.text
+
+    r = client.get(f"{base_url}/clients/{cid}", headers=auth_headers)
+    assert r.json()["followUpState"] == "Ativo"
+    assert r.json()["followUpDueAt"] is not None
+
+    # worklist ordenada por vencimento
+    r = client.get(f"{base_url}/clients/follow-ups?withinHours=3", headers=auth_headers)
+    assert r.status_code == 200
+    items = r.json()
+    assert cid in [c["id"] for c in items]
+    dues = [c["followUpDueAt"] for c in items]
+    assert dues == sorted(dues)
+
+    # dueAt inválido
+    r = client.post(f"{base_url}/interactions", headers=auth_headers, json={**inter, "dueAt": "amanhã"})
+    assert r.status_code == 400
+
+    # cleanup
+    client.delete(f"{base_url}/clients/{cid}", headers=auth_headers)
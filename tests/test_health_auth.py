@@ -6,6 +6,23 @@ def test_health(client, base_url):
     assert r.status_code == 200
     assert r.json().get("status") == "ok"
 
+@pytest.mark.smoke
+def test_ready(client, base_url):
+    r = client.get(f"{base_url}/ready")
+    assert r.status_code in (200, 503)
+    body = r.json()
+    if r.status_code == 200:
+        assert body["status"] == "ready"
+    else:
+        assert body["status"] in ("warming", "unavailable")
+    assert "steps" in body["warmup"]
+
+@pytest.mark.smoke
+def test_live(client, base_url):
+    r = client.get(f"{base_url}/live")
+    assert r.status_code == 200
+    assert r.json() == {"status": "alive"}
+
 @pytest.mark.smoke
 def test_me(client, base_url, auth_headers):
     r = client.get(f"{base_url}/auth/me", headers=auth_headers)
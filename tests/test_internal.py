@@ -0,0 +1,51 @@
+import pytest
+
+
+def test_internal_requires_admin(client, base_url, broker_headers):
+    assert client.get(f"{base_url}/internal/db-pool").status_code == 401
+    assert client.get(f"{base_url}/internal/db-pool", headers=broker_headers).status_code == 403
+
+
+@pytest.mark.smoke
+def test_db_pool(client, base_url, admin_headers):
+    r = client.get(f"{base_url}/internal/db-pool", headers=admin_headers)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["mode"] in ("local", "transaction")
+    assert "checkouts" in body["engines"]["default"]
+
+
+def test_metrics(client, base_url, admin_headers):
+    client.get(f"{base_url}/clients", headers=admin_headers)
+    r = client.get(f"{base_url}/internal/metrics", headers=admin_headers)
+    if r.status_code == 404:
+        pytest.skip("métricas desligadas neste servidor")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    text = r.text
+    assert "i2sales_http_request_seconds_bucket" in text
+    assert 'phase="db"' in text
+    assert 'phase="auth"' in text
+
+
+def test_slow_queries(client, base_url, admin_headers):
+    r = client.get(f"{base_url}/internal/slow-queries", params={"limit": 5, "plan": 0}, headers=admin_headers)
+    if r.status_code == 404:
+        pytest.skip("log de queries lentas desligado neste servidor")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["thresholdMs"] > 0
+    assert len(body["items"]) <= 5
+    for item in body["items"]:
+        assert "explain" not in item
+        assert {"sql", "params", "route", "durationMs"} <= set(item)
+
+
+def test_replica_status(client, base_url, admin_headers):
+    r = client.get(f"{base_url}/internal/replica", headers=admin_headers)
+    if r.status_code == 404:
+        pytest.skip("réplica de leitura não configurada neste servidor")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["maxLagSeconds"] >= 0
+    assert set(body["decisions"]) == {"replica", "sticky", "lagging"}
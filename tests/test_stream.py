@@ -0,0 +1,31 @@
+import pytest
+from conftest import rand_phone, rand_name
+
+def _read_events(resp, wanted):
+    """Lê o stream até achar os eventos `wanted` (ou o servidor fechar)."""
+    seen, event = [], None
+    for line in resp.iter_lines():
+        if line.startswith("event:"):
+            event = line.split(":", 1)[1].strip()
+        elif line == "" and event:
+            seen.append(event)
+            event = None
+            if wanted <= set(seen):
+                break
+    return seen
+
+def test_stream_requires_auth(client, base_url):
+    r = client.get(f"{base_url}/stream")
+    assert r.status_code == 401
+
+@pytest.mark.destructive
+def test_stream_pushes_client_changes(client, base_url, auth_headers):
+    with client.stream("GET", f"{base_url}/stream", headers=auth_headers, timeout=30.0) as resp:
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        payload = {"name": rand_name("SSE"), "phone": rand_phone(), "source": "pytest"}
+        r = client.post(f"{base_url}/clients", headers=auth_headers, json=payload)
+        assert r.status_code == 201, r.text
+        seen = _read_events(resp, {"kpis", "client"})
+    assert seen[0] == "kpis"
+    assert "client" in seen
@@ -56,13 +56,6 @@ def sa_model_to_dict(instance, *, camel: bool = True, include=None, exclude=None
             continue
         if exclude and name in exclude:
             continue
-        val = getattr(instance, name)
-        # numerics do Postgres (Decimal) → float seguro p/ JSON (se não nulo)
-        try:
-            from decimal import Decimal
-            if isinstance(val, Decimal):
-                val = float(val)
-        except Exception:
-            pass
-        raw[name] = val
+        # UUID/Decimal/datetime ficam como estão: o JSONProvider do app (utils/json_provider.py) serializa
+        raw[name] = getattr(instance, name)
     return dict_keys_to_camel(raw) if camel else raw
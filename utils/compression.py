@@ -0,0 +1,205 @@
+# utils/compression.py
+"""
+Compressão das respostas (gzip; br e zstd quando `brotli`/`zstandard` estão instalados).
+
+A codificação sai do Accept-Encoding do cliente (maior q; empate segue
+COMPRESSION_ALGORITHMS) e só é aplicada quando:
+- o mimetype está em COMPRESSION_MIMETYPES (JSON, CSV, NDJSON, texto); nunca
+  text/event-stream, que depende de cada evento chegar na hora
+- o corpo tem pelo menos COMPRESSION_MIN_BYTES (respostas pequenas não pagam o
+  custo: o ganho some no overhead do cabeçalho e do TLS)
+- a resposta ainda não tem Content-Encoding, não é 204/206/304 e não é
+  passthrough de arquivo (send_file, downloads com Range)
+
+Respostas em streaming (Response com gerador) são comprimidas pedaço a pedaço,
+com flush a cada pedaço, então o cliente continua recebendo à medida que são
+geradas; o limiar só vale quando o tamanho é conhecido (Content-Length).
+`Vary: Accept-Encoding` vai em toda resposta compressível.
+
+Com as métricas ligadas (utils/metrics.py): bytes antes/depois por endpoint e
+codificação (a razão sai de raw/sent) e o tempo de CPU gasto comprimindo
+(também somado na fase "compress" da requisição).
+
+COMPRESSION_ENABLED=0 não registra o hook.
+"""
+
+import time
+import zlib
+
+from flask import request
+
+from utils import metrics
+
+_SKIP_STATUS = {204, 206, 304}
+
+
+class _Gzip:
+    def __init__(self, level):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._z.compress(data)
+
+    def flush(self):
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._z.flush()
+
+
+class _Brotli:
+    def __init__(self, level):
+        import brotli
+
+        self._c = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._c.process(data)
+
+    def flush(self):
+        return self._c.flush()
+
+    def finish(self):
+        return self._c.finish()
+
+
+class _Zstd:
+    def __init__(self, level):
+        import zstandard
+
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self._c = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._c.compress(data)
+
+    def flush(self):
+        return self._c.flush(self._flush_block)
+
+    def finish(self):
+        return self._c.flush()
+
+
+def _available_encoders() -> dict:
+    encoders = {"gzip": _Gzip}
+    try:
+        import brotli  # noqa: F401
+        encoders["br"] = _Brotli
+    except ImportError:
+        pass
+    try:
+        import zstandard  # noqa: F401
+        encoders["zstd"] = _Zstd
+    except ImportError:
+        pass
+    return encoders
+
+
+def _csv(value) -> list:
+    return [v.strip().lower() for v in (value or "").split(",") if v.strip()]
+
+
+class Compressor:
+    def __init__(self, app):
+        cfg = app.config
+        encoders = _available_encoders()
+        self.min_bytes = int(cfg.get("COMPRESSION_MIN_BYTES", 1024))
+        self.mimetypes = set(_csv(cfg.get("COMPRESSION_MIMETYPES")))
+        self.levels = {
+            "gzip": int(cfg.get("COMPRESSION_GZIP_LEVEL", 6)),
+            "br": int(cfg.get("COMPRESSION_BROTLI_QUALITY", 4)),
+            "zstd": int(cfg.get("COMPRESSION_ZSTD_LEVEL", 3)),
+        }
+        # ordem de preferência do servidor, só com o que está instalado
+        self.order = [e for e in _csv(cfg.get("COMPRESSION_ALGORITHMS")) if e in encoders]
+        self.encoders = {e: encoders[e] for e in self.order}
+
+    def negotiate(self):
+        if not self.order:
+            return None
+        return request.accept_encodings.best_match(self.order)
+
+    def new_encoder(self, encoding):
+        return self.encoders[encoding](self.levels[encoding])
+
+    def after_request(self, response):
+        if response.mimetype not in self.mimetypes:
+            return response
+        response.vary.add("Accept-Encoding")
+        if (
+            response.status_code in _SKIP_STATUS
+            or response.status_code < 200
+            or "Content-Encoding" in response.headers
+            or response.direct_passthrough
+            or request.method == "HEAD"
+        ):
+            return response
+        length = response.content_length
+        if length is not None and length < self.min_bytes:
+            return response
+        encoding = self.negotiate()
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            self._compress_stream(response, encoding)
+        else:
+            self._compress_body(response, encoding)
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f"{etag}-{encoding}", weak)
+        return response
+
+    def _compress_body(self, response, encoding):
+        raw = response.get_data()
+        t0 = time.thread_time()
+        enc = self.new_encoder(encoding)
+        body = enc.compress(raw) + enc.finish()
+        cpu = time.thread_time() - t0
+        response.set_data(body)  # atualiza o Content-Length
+        metrics.add("compress", cpu)
+        metrics.observe_compression(request.endpoint, encoding, len(raw), len(body), cpu)
+
+    def _compress_stream(self, response, encoding):
+        endpoint = request.endpoint  # o gerador termina fora do contexto da requisição
+        source = response.response
+        chunks = response.iter_encoded()
+        enc = self.new_encoder(encoding)
+
+        def generate():
+            raw = sent = 0
+            cpu = 0.0
+            try:
+                for chunk in chunks:
+                    if not chunk:
+                        continue
+                    t0 = time.thread_time()
+                    out = enc.compress(chunk) + enc.flush()
+                    cpu += time.thread_time() - t0
+                    raw, sent = raw + len(chunk), sent + len(out)
+                    yield out
+                t0 = time.thread_time()
+                out = enc.finish()
+                cpu += time.thread_time() - t0
+                sent += len(out)
+                yield out
+                metrics.observe_compression(endpoint, encoding, raw, sent, cpu)
+            finally:
+                if hasattr(source, "close"):
+                    source.close()
+
+        response.response = generate()
+        response.headers.pop("Content-Length", None)
+
+
+def init_app(app) -> None:
+    if not app.config.get("COMPRESSION_ENABLED"):
+        return
+    compressor = Compressor(app)
+    if not compressor.order:
+        app.logger.warning("[compression] nenhuma codificação disponível em COMPRESSION_ALGORITHMS")
+        return
+    app.extensions["compression"] = compressor
+    app.after_request(compressor.after_request)
+    app.logger.info("[compression] codificações: %s", ",".join(compressor.order))
@@ -0,0 +1,87 @@
+# utils/db_engine.py
+"""
+Hooks do engine do SQLAlchemy.
+
+- IPv4 para hosts do Supabase: o resolver de alguns hosts serverless devolve
+  IPv6 não alcançável. Antes de cada conexão nova o hook `do_connect` injeta
+  `hostaddr=<ipv4>`; a resolução é feita só quando a primeira conexão é aberta
+  (nunca no import), fica em cache por DB_DNS_CACHE_TTL e é descartada se a
+  conexão falhar, para que a próxima tentativa resolva de novo.
+- `dispose_after_fork`: com `preload_app` o engine é criado no master; cada
+  worker descarta as conexões herdadas sem fechá-las (são do processo pai).
+"""
+
+import socket
+import threading
+import time
+
+from sqlalchemy import event
+
+from extensions import db
+
+_lock = threading.Lock()
+_resolved: dict = {}  # (host, port) -> (ipv4, expira_em)
+
+
+def _wants_ipv4(host: str) -> bool:
+    return host.endswith("supabase.co") or host.endswith("supabase.com")
+
+
+def resolve_ipv4(host: str, port: int, ttl: int):
+    key = (host, port)
+    now = time.monotonic()
+    with _lock:
+        hit = _resolved.get(key)
+        if hit and hit[1] > now:
+            return hit[0]
+    try:
+        infos = socket.getaddrinfo(host, port, socket.AF_INET, socket.SOCK_STREAM)
+    except OSError:
+        return None
+    ipv4 = infos[0][4][0] if infos else None
+    if ipv4 and ttl > 0:
+        with _lock:
+            _resolved[key] = (ipv4, now + ttl)
+    return ipv4
+
+
+def forget(host: str, port: int) -> None:
+    with _lock:
+        _resolved.pop((host, port), None)
+
+
+def _make_do_connect(ttl: int):
+    def do_connect(dialect, conn_rec, cargs, cparams):
+        host = cparams.get("host") or ""
+        if "hostaddr" in cparams or not _wants_ipv4(host):
+            return None  # conexão padrão do dialeto
+        port = int(cparams.get("port") or 5432)
+        ipv4 = resolve_ipv4(host, port, ttl)
+        if ipv4:
+            cparams["hostaddr"] = ipv4
+        try:
+            return dialect.connect(*cargs, **cparams)
+        except Exception:
+            # IP pode ter mudado (failover/rotação): resolve de novo na próxima
+            forget(host, port)
+            raise
+
+    return do_connect
+
+
+def install(engine, ttl: int) -> None:
+    event.listen(engine, "do_connect", _make_do_connect(ttl))
+
+
+def init_app(app) -> None:
+    """Registra os hooks no(s) engine(s) do app (criar o engine não abre conexão)."""
+    ttl = int(app.config.get("DB_DNS_CACHE_TTL", 300))
+    with app.app_context():
+        for engine in db.engines.values():
+            install(engine, ttl)
+
+
+def dispose_after_fork(app) -> None:
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
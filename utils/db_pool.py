@@ -0,0 +1,131 @@
+# utils/db_pool.py
+"""
+Modos de pool do SQLAlchemy e telemetria de checkout.
+
+DB_POOL_MODE:
+- local (default): QueuePool por worker (DB_POOL_SIZE + DB_MAX_OVERFLOW),
+  pre_ping configurável (DB_POOL_PRE_PING).
+- transaction: um pooler externo em modo transação (PgBouncer / Supavisor na
+  porta 6543) faz o pool; o app usa NullPool (abre/fecha por checkout) e sem
+  pre_ping, que só custaria mais um round trip até o pooler. psycopg2 não usa
+  prepared statements do lado do servidor, então nada muda nas queries.
+  LISTEN/NOTIFY (realtime/) precisa de sessão: usa DATABASE_DIRECT_URL.
+
+As classes Timed* medem o tempo de cada checkout (espera por conexão livre +
+abertura de conexão nova), expostos em /api/v1/internal/db-pool.
+"""
+
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import NullPool, QueuePool
+
+MODES = ("local", "transaction")
+
+# limites (ms) do histograma de latência de checkout
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def observe(self, ms: float) -> None:
+        i = next((n for n, b in enumerate(BUCKETS_MS) if ms <= b), len(BUCKETS_MS))
+        with self._lock:
+            self.checkouts += 1
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+            self.buckets[i] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            # cumulativo por limite superior, como um histograma do Prometheus
+            cumulative, hist = 0, []
+            for le, n in zip([*map(str, BUCKETS_MS), "+Inf"], self.buckets):
+                cumulative += n
+                hist.append({"le": le, "count": cumulative})
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "checkoutMsAvg": round(self.total_ms / self.checkouts, 3) if self.checkouts else None,
+                "checkoutMsMax": round(self.max_ms, 3),
+                "checkoutMsHistogram": hist,
+            }
+
+
+class _TimedMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            with self.stats._lock:
+                self.stats.timeouts += 1
+            raise
+        self.stats.observe((time.perf_counter() - t0) * 1000)
+        return conn
+
+    def _create_connection(self):
+        with self.stats._lock:
+            self.stats.connects += 1
+        return super()._create_connection()
+
+    def recreate(self):
+        new = super().recreate()
+        new.stats = self.stats  # dispose() recria o pool: mantém os contadores
+        return new
+
+
+class TimedQueuePool(_TimedMixin, QueuePool):
+    pass
+
+
+class TimedNullPool(_TimedMixin, NullPool):
+    pass
+
+
+def apply_pool_mode(config) -> str:
+    """Ajusta SQLALCHEMY_ENGINE_OPTIONS conforme DB_POOL_MODE (chamar antes de db.init_app)."""
+    mode = (config.get("DB_POOL_MODE") or "local").strip().lower()
+    if mode not in MODES:
+        raise RuntimeError(f"DB_POOL_MODE inválido: {mode!r} (use local|transaction)")
+    opts = dict(config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    if mode == "transaction":
+        for key in ("pool_size", "max_overflow", "pool_timeout", "pool_recycle"):
+            opts.pop(key, None)
+        opts.update(poolclass=TimedNullPool, pool_pre_ping=False)
+    else:
+        opts.setdefault("poolclass", TimedQueuePool)
+    config["SQLALCHEMY_ENGINE_OPTIONS"] = opts
+    config["DB_POOL_MODE"] = mode
+    return mode
+
+
+def pool_status(engine) -> dict:
+    pool = engine.pool
+    out = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        out.update(
+            size=pool.size(),
+            checkedIn=pool.checkedin(),
+            checkedOut=pool.checkedout(),
+            overflow=max(0, pool.overflow()),
+            maxOverflow=pool._max_overflow,
+        )
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        out.update(stats.snapshot())
+    return out
@@ -0,0 +1,233 @@
+# utils/idempotency.py
+"""
+`Idempotency-Key` nos POSTs de criação (`@idempotent`, depois do @supabase_required).
+
+Com o header, a primeira requisição de cada (usuário, chave) reserva a chave
+em `idempotency_keys` (status `in_flight`, commit imediato) e roda a rota; a
+resposta (< 500) fica guardada por IDEMPOTENCY_TTL_SECONDS. Repetições com a
+mesma chave:
+- rota e corpo iguais, já terminada: devolve a resposta guardada (mesmo status,
+  corpo, Content-Type/Location) com `Idempotent-Replayed: true`, sem rodar a
+  rota nem tocar nas tabelas de negócio
+- ainda em andamento (retry concorrente): espera o resultado até
+  IDEMPOTENCY_WAIT_SECONDS; depois 409 com Retry-After
+- rota ou corpo diferentes: 422 (chave reutilizada para outra operação)
+
+Resposta 5xx ou exceção liberam a chave (o retry executa de novo). Se o worker
+morrer com a chave reservada, ela volta a ficar livre depois de
+IDEMPOTENCY_LEASE_SECONDS. Sem o header nada muda. Registros vencidos são
+apagados por uma thread do worker a cada IDEMPOTENCY_PURGE_SECONDS (a reserva
+também reaproveita chave vencida, então a limpeza não é pré-requisito).
+
+DDL em scripts/migrations/0004_idempotency_keys.sql.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from functools import wraps
+
+from flask import Response, current_app, g, jsonify, make_response, request
+from sqlalchemy import text
+
+from extensions import db
+from models.idempotency_key import IdempotencyKey  # noqa: F401 (tabela no create_all)
+from utils import query_budget
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+_STORED_HEADERS = ("Content-Type", "Location")
+_MAX_KEY = 255
+_PURGE_BATCH = 1000
+
+# reserva a chave: nova, vencida ou com lease expirado (mesma operação) -> devolve linha
+_CLAIM_SQL = text(
+    """
+    INSERT INTO public.idempotency_keys AS k (user_id, key, endpoint, request_hash, status, locked_at, expires_at)
+    VALUES (:user_id, :key, :endpoint, :request_hash, 'in_flight', now(), now() + make_interval(secs => :ttl))
+    ON CONFLICT (user_id, key) DO UPDATE
+       SET endpoint = excluded.endpoint,
+           request_hash = excluded.request_hash,
+           status = 'in_flight',
+           response_status = NULL,
+           response_body = NULL,
+           response_headers = NULL,
+           locked_at = now(),
+           created_at = now(),
+           expires_at = excluded.expires_at
+     WHERE k.expires_at <= now()
+        OR (k.status = 'in_flight'
+            AND k.locked_at <= now() - make_interval(secs => :lease)
+            AND k.endpoint = excluded.endpoint
+            AND k.request_hash = excluded.request_hash)
+    RETURNING true
+    """
+)
+_LOOKUP_SQL = text(
+    """
+    SELECT endpoint, request_hash, status, response_status, response_body, response_headers
+      FROM public.idempotency_keys
+     WHERE user_id = :user_id AND key = :key
+    """
+)
+_STORE_SQL = text(
+    """
+    UPDATE public.idempotency_keys
+       SET status = 'done', response_status = :status, response_body = :body,
+           response_headers = CAST(:headers AS jsonb), locked_at = NULL
+     WHERE user_id = :user_id AND key = :key
+    """
+)
+_RELEASE_SQL = text(
+    "DELETE FROM public.idempotency_keys WHERE user_id = :user_id AND key = :key AND status = 'in_flight'"
+)
+_PURGE_SQL = text(
+    """
+    DELETE FROM public.idempotency_keys
+     WHERE ctid IN (SELECT ctid FROM public.idempotency_keys WHERE expires_at <= now() LIMIT :batch)
+    """
+)
+
+_lock = threading.Lock()
+_last_purge = None
+
+
+def idempotent(fn):
+    """Aceita `Idempotency-Key` na rota (ver regras no módulo)."""
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        user_id = (g.get("jwt") or {}).get("sub")
+        if key is None or user_id is None or not current_app.config.get("IDEMPOTENCY_ENABLED"):
+            return fn(*args, **kwargs)
+        key = key.strip()
+        if not key or len(key) > _MAX_KEY:
+            return jsonify({"error": f"{HEADER} inválida (1 a {_MAX_KEY} caracteres)."}), 400
+
+        _maybe_purge()
+        ident = {"user_id": user_id, "key": key}
+        op = {"endpoint": request.endpoint, "request_hash": _fingerprint()}
+        if _claim(ident, op):
+            return _run(fn, args, kwargs, ident)
+        return _existing(fn, args, kwargs, ident, op)
+
+    return wrapper
+
+
+def _fingerprint() -> str:
+    """Hash do corpo: JSON canônico (ordem das chaves/espaços não contam) ou bytes crus."""
+    payload = request.get_json(silent=True)
+    if payload is not None:
+        raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str).encode()
+    else:
+        raw = request.get_data()
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _claim(ident: dict, op: dict) -> bool:
+    cfg = current_app.config
+    params = {
+        **ident, **op,
+        "ttl": float(cfg.get("IDEMPOTENCY_TTL_SECONDS", 86400)),
+        "lease": float(cfg.get("IDEMPOTENCY_LEASE_SECONDS", 30)),
+    }
+    claimed = db.session.execute(_CLAIM_SQL, params).scalar() is not None
+    db.session.commit()  # a reserva precisa ser visível para os retries já
+    return claimed
+
+
+def _run(fn, args, kwargs, ident: dict):
+    try:
+        response = make_response(fn(*args, **kwargs))
+    except Exception:
+        _release(ident)
+        raise
+    if response.status_code >= 500 or response.is_streamed:
+        _release(ident)
+        return response
+    headers = {h: response.headers[h] for h in _STORED_HEADERS if h in response.headers}
+    try:
+        db.session.execute(_STORE_SQL, {
+            **ident,
+            "status": response.status_code,
+            "body": response.get_data(),
+            "headers": json.dumps(headers),
+        })
+        db.session.commit()
+    except Exception as e:
+        # a escrita da rota já foi feita: responde normalmente; a chave fica livre quando o lease expirar
+        db.session.rollback()
+        current_app.logger.warning("[idempotency] falha ao guardar resposta (%s): %s", request.endpoint, e)
+    return response
+
+
+def _release(ident: dict) -> None:
+    try:
+        db.session.rollback()
+        db.session.execute(_RELEASE_SQL, ident)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning("[idempotency] falha ao liberar chave (%s): %s", request.endpoint, e)
+
+
+def _existing(fn, args, kwargs, ident: dict, op: dict):
+    deadline = time.monotonic() + float(current_app.config.get("IDEMPOTENCY_WAIT_SECONDS", 10))
+    delay = 0.05
+    waiting = False
+    while True:
+        row = db.session.execute(_LOOKUP_SQL, ident).one_or_none()
+        db.session.rollback()  # devolve a conexão ao pool enquanto espera
+        if row is not None:
+            if row.endpoint != op["endpoint"] or row.request_hash != op["request_hash"]:
+                return jsonify({"error": f"{HEADER} já usada em outra requisição."}), 422
+            if row.status == "done":
+                return _replay(row)
+            if time.monotonic() >= deadline:
+                resp = jsonify({"error": "Requisição com esta chave ainda em andamento."})
+                resp.headers["Retry-After"] = "1"
+                return resp, 409
+            if not waiting:
+                query_budget.skip()  # o polling repete o mesmo statement de propósito
+                waiting = True
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+        # chave vencida/apagada ou lease do dono expirado: assume a execução
+        if _claim(ident, op):
+            return _run(fn, args, kwargs, ident)
+
+
+def _replay(row) -> Response:
+    response = Response(bytes(row.response_body or b""), status=row.response_status)
+    for name, value in (row.response_headers or {}).items():
+        response.headers[name] = value
+    response.headers[REPLAYED_HEADER] = "true"
+    return response
+
+
+def _maybe_purge() -> None:
+    global _last_purge
+    interval = float(current_app.config.get("IDEMPOTENCY_PURGE_SECONDS", 600))
+    now = time.monotonic()
+    if interval <= 0 or (_last_purge is not None and now - _last_purge < interval):
+        return
+    with _lock:
+        if _last_purge is not None and now - _last_purge < interval:
+            return
+        _last_purge = now
+    app = current_app._get_current_object()
+    threading.Thread(target=_purge, args=(app,), name="idempotency-purge", daemon=True).start()
+
+
+def _purge(app) -> None:
+    try:
+        with app.app_context():
+            while True:
+                deleted = db.session.execute(_PURGE_SQL, {"batch": _PURGE_BATCH}).rowcount
+                db.session.commit()
+                if deleted < _PURGE_BATCH:
+                    break
+    except Exception as e:
+        app.logger.warning("[idempotency] limpeza das chaves vencidas falhou: %s", e)
@@ -0,0 +1,78 @@
+# utils/json_provider.py
+"""
+JSONProvider do app (jsonify, app.json.response, request.get_json) com orjson.
+
+Serializa direto os tipos que saem dos models e das consultas, sem conversão
+campo a campo nas rotas:
+- UUID -> string canônica
+- datetime/date/time -> ISO 8601 (o mesmo texto do `.isoformat()`)
+- Decimal (NUMERIC do Postgres) -> float
+- Row do SQLAlchemy -> objeto com as colunas; escalares/arrays numpy -> valores
+
+Sem orjson instalado cai no json da stdlib com o mesmo `default`, então o
+formato da saída não muda (só a velocidade). Chaves na ordem de inserção (as
+rotas já montam os dicts na ordem do contrato), saída compacta, UTF-8.
+"""
+
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+
+def default(o):
+    """Tipos que nem o orjson nem a stdlib serializam sozinhos."""
+    if isinstance(o, Decimal):
+        return float(o)
+    if isinstance(o, (datetime, date, time)):
+        return o.isoformat()
+    if isinstance(o, UUID):
+        return str(o)
+    mapping = getattr(o, "_mapping", None)  # sqlalchemy.engine.Row
+    if mapping is not None:
+        return dict(mapping)
+    if hasattr(o, "tolist"):  # numpy
+        return o.tolist()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumpb(obj) -> bytes:
+        return orjson.dumps(obj, default=default, option=_OPTIONS)
+
+    def loads(s):
+        return orjson.loads(s)
+else:
+    def dumpb(obj) -> bytes:
+        return json.dumps(obj, default=default, ensure_ascii=False, separators=(",", ":")).encode()
+
+    def loads(s):
+        return json.loads(s)
+
+
+class FastJSONProvider(JSONProvider):
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs:  # opções da stdlib (indent, sort_keys...) só existem no caminho lento
+            kwargs.setdefault("default", default)
+            kwargs.setdefault("ensure_ascii", False)
+            return json.dumps(obj, **kwargs)
+        return dumpb(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return json.loads(s, **kwargs) if kwargs else loads(s)
+
+    def response(self, *args, **kwargs):
+        # bytes direto para o corpo: sem decode/encode intermediário
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumpb(obj), mimetype=self.mimetype)
@@ -0,0 +1,185 @@
+# utils/metrics.py
+"""
+Métricas por endpoint no formato do Prometheus (prometheus_client).
+
+Por requisição, rotulado pelo endpoint do Flask (`clients.list_clients`; rotas
+inexistentes viram "unmatched" para não explodir a cardinalidade):
+- i2sales_http_request_seconds        latência total (histograma) + método
+- i2sales_http_requests_total         contagem por status
+- i2sales_http_request_db_statements  statements SQL executados (histograma)
+- i2sales_http_request_phase_seconds  tempo gasto em cada fase: db (eventos
+  before/after_cursor_execute), auth (validação do token), serialize
+  (app.json.response) e compress (CPU da compressão, utils/compression.py)
+- i2sales_http_compression_bytes      bytes antes (raw) e depois (sent) da
+  compressão, por endpoint e codificação; a razão é raw/sent
+- i2sales_http_compression_cpu_seconds  CPU gasta comprimindo cada resposta
+- i2sales_db_query_cancellations      queries canceladas por endpoint e motivo
+  (statement_timeout | client_disconnect; utils/statement_timeout.py)
+
+Sob o gunicorn (gunicorn.conf.py) o PROMETHEUS_MULTIPROC_DIR é definido antes
+do app ser importado: cada worker grava num arquivo mmap e o scrape em
+/api/v1/internal/metrics soma todos. Registrar uma amostra é só uma escrita em
+memória; o custo de agregar fica com quem faz o scrape.
+
+METRICS_ENABLED=0 (ou prometheus_client ausente) não registra nenhum hook.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from extensions import db
+
+PHASES = ("db", "auth", "serialize", "compress")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PHASE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+_metrics = None  # criadas uma vez por processo (o registry não aceita nomes repetidos)
+
+
+class _Metrics:
+    def __init__(self, prom):
+        self.latency = prom.Histogram(
+            "i2sales_http_request_seconds", "Latência da requisição",
+            ["endpoint", "method"], buckets=LATENCY_BUCKETS,
+        )
+        self.requests = prom.Counter(
+            "i2sales_http_requests", "Requisições atendidas",
+            ["endpoint", "method", "status"],
+        )
+        self.statements = prom.Histogram(
+            "i2sales_http_request_db_statements", "Statements SQL por requisição",
+            ["endpoint"], buckets=STATEMENT_BUCKETS,
+        )
+        self.phase = prom.Histogram(
+            "i2sales_http_request_phase_seconds", "Tempo por fase da requisição (db, auth, serialize, compress)",
+            ["endpoint", "phase"], buckets=PHASE_BUCKETS,
+        )
+        self.compression_bytes = prom.Counter(
+            "i2sales_http_compression_bytes", "Bytes do corpo antes (raw) e depois (sent) da compressão",
+            ["endpoint", "encoding", "kind"],
+        )
+        self.compression_cpu = prom.Histogram(
+            "i2sales_http_compression_cpu_seconds", "CPU gasta comprimindo a resposta",
+            ["endpoint", "encoding"], buckets=PHASE_BUCKETS,
+        )
+        self.cancellations = prom.Counter(
+            "i2sales_db_query_cancellations", "Queries canceladas (statement_timeout ou cliente desconectado)",
+            ["endpoint", "reason"],
+        )
+
+
+def enabled() -> bool:
+    return _metrics is not None
+
+
+def init_app(app) -> None:
+    global _metrics
+    if not app.config.get("METRICS_ENABLED"):
+        return
+    try:
+        import prometheus_client
+    except ImportError:
+        app.logger.warning("[metrics] prometheus_client não instalado; métricas desligadas")
+        return
+    if _metrics is None:
+        _metrics = _Metrics(prometheus_client)
+
+    app.before_request(_start)
+    app.after_request(_finish)
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, "before_cursor_execute", _before_cursor)
+            event.listen(engine, "after_cursor_execute", _after_cursor)
+
+    respond = app.json.response
+
+    def timed_response(*args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return respond(*args, **kwargs)
+        finally:
+            add("serialize", time.perf_counter() - t0)
+
+    app.json.response = timed_response
+
+
+def add(phase: str, seconds: float) -> None:
+    """Soma `seconds` na fase da requisição corrente (fora de requisição não faz nada)."""
+    m = g.get("_metrics") if has_request_context() else None
+    if m is not None:
+        m[phase] += seconds
+
+
+@contextmanager
+def timed(phase: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        add(phase, time.perf_counter() - t0)
+
+
+def observe_compression(endpoint, encoding: str, raw: int, sent: int, cpu_seconds: float) -> None:
+    if _metrics is None:
+        return
+    endpoint = endpoint or "unmatched"
+    _metrics.compression_bytes.labels(endpoint, encoding, "raw").inc(raw)
+    _metrics.compression_bytes.labels(endpoint, encoding, "sent").inc(sent)
+    _metrics.compression_cpu.labels(endpoint, encoding).observe(cpu_seconds)
+
+
+def observe_cancel(endpoint, reason: str) -> None:
+    if _metrics is None:
+        return
+    _metrics.cancellations.labels(endpoint or "unmatched", reason).inc()
+
+
+def _start():
+    g._metrics = {"t0": time.perf_counter(), "statements": 0, **dict.fromkeys(PHASES, 0.0)}
+
+
+def _finish(response):
+    m = g.pop("_metrics", None)
+    if m is None:
+        return response
+    endpoint = request.endpoint or "unmatched"
+    _metrics.latency.labels(endpoint, request.method).observe(time.perf_counter() - m["t0"])
+    _metrics.requests.labels(endpoint, request.method, str(response.status_code)).inc()
+    _metrics.statements.labels(endpoint).observe(m["statements"])
+    for phase in PHASES:
+        if m[phase]:
+            _metrics.phase.labels(endpoint, phase).observe(m[phase])
+    return response
+
+
+def _before_cursor(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_t0 = time.perf_counter()
+
+
+def _after_cursor(conn, cursor, statement, parameters, context, executemany):
+    t0 = getattr(context, "_metrics_t0", None)
+    m = g.get("_metrics") if has_request_context() else None
+    if t0 is not None and m is not None:
+        m["statements"] += 1
+        m["db"] += time.perf_counter() - t0
+
+
+def exposition():
+    """(corpo, content-type) no formato texto do Prometheus; soma os workers no modo multiprocess."""
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
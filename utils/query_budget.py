@@ -0,0 +1,120 @@
+# utils/query_budget.py
+"""
+Orçamento de queries por endpoint e detector de N+1.
+
+Um rastreador por requisição conta os statements executados no engine do app
+e agrupa por formato (SQL normalizado, o mesmo do log de queries lentas). No
+fim da requisição duas regras são checadas:
+- orçamento: endpoints declaram o máximo de statements com `@query_budget(n)`
+  (contando os da autenticação: lookup do usuário e upsert do profile; o
+  usuário legado, achado pelo e-mail, ganha 1 statement a mais com `allow`)
+- repetição: o mesmo formato executado QUERY_REPEAT_THRESHOLD vezes ou mais
+  numa requisição (padrão típico de N+1: uma query por item de uma lista)
+
+QUERY_BUDGET_MODE:
+- raise: levanta QueryBudgetExceeded (a requisição responde 500); para
+         dev/test, onde a regressão tem que quebrar o teste
+- warn:  loga um WARNING; só uma fração das requisições é rastreada
+         (QUERY_BUDGET_SAMPLE_RATE), para não pagar a normalização sempre
+- off:   nenhum hook
+- auto (default): raise com app.debug/app.testing, senão warn
+"""
+
+import random
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from extensions import db
+from utils.slow_queries import normalize_sql
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+def query_budget(max_statements: int, *, repeats: int | None = None):
+    """Declara o orçamento do endpoint; `repeats` sobrescreve QUERY_REPEAT_THRESHOLD."""
+
+    def decorator(fn):
+        # functools.wraps (supabase_required etc.) copia o __dict__: funciona em qualquer posição
+        fn._query_budget = {"max": max_statements, "repeats": repeats}
+        return fn
+
+    return decorator
+
+
+def mode(app) -> str:
+    value = (app.config.get("QUERY_BUDGET_MODE") or "auto").strip().lower()
+    if value == "auto":
+        return "raise" if app.debug or app.testing else "warn"
+    return value if value in ("raise", "warn", "off") else "warn"
+
+
+def init_app(app) -> None:
+    if mode(app) == "off":
+        return
+    app.before_request(_start)
+    app.after_request(_finish)
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, "after_cursor_execute", _after_cursor)
+
+
+def _start():
+    app = current_app
+    if mode(app) == "warn" and random.random() >= float(app.config.get("QUERY_BUDGET_SAMPLE_RATE", 0.05)):
+        return
+    g._query_tracker = Counter()
+
+
+def skip() -> None:
+    """Ignora as regras nesta requisição (caminhos raros e legítimos, ex.: provisionar o usuário no 1º login)."""
+    if has_request_context():
+        g.pop("_query_tracker", None)
+
+
+def allow(extra: int = 1) -> None:
+    """Soma `extra` statements ao orçamento desta requisição (ex.: lookup do usuário legado por e-mail)."""
+    if has_request_context() and g.get("_query_tracker") is not None:
+        g._query_budget_extra = g.get("_query_budget_extra", 0) + extra
+
+
+def _after_cursor(conn, cursor, statement, parameters, context, executemany):
+    tracker = g.get("_query_tracker") if has_request_context() else None
+    if tracker is not None:
+        tracker[normalize_sql(statement)] += 1
+
+
+def violations(tracker: Counter, budget: dict | None, repeat_threshold: int) -> list:
+    out = []
+    total = sum(tracker.values())
+    if budget and total > budget["max"]:
+        out.append(f"{total} statements (orçamento {budget['max']})")
+    threshold = (budget or {}).get("repeats") or repeat_threshold
+    for sql, n in tracker.most_common():
+        if n < threshold:
+            break
+        out.append(f"{n}x o mesmo statement (possível N+1): {sql[:300]}")
+    return out
+
+
+def _finish(response):
+    tracker = g.pop("_query_tracker", None)
+    extra = g.pop("_query_budget_extra", 0)
+    if tracker is None or request.endpoint is None:
+        return response
+    app = current_app
+    view = app.view_functions.get(request.endpoint)
+    budget = getattr(view, "_query_budget", None)
+    if budget and extra:
+        budget = {**budget, "max": budget["max"] + extra}
+    found = violations(tracker, budget, int(app.config.get("QUERY_REPEAT_THRESHOLD", 5)))
+    if not found:
+        return response
+    message = f"{request.method} {request.endpoint}: " + "; ".join(found)
+    if mode(app) == "raise":
+        raise QueryBudgetExceeded(message)
+    app.logger.warning("[query-budget] %s", message)
+    return response
@@ -0,0 +1,207 @@
+# utils/replica.py
+"""
+Réplica de leitura opcional (REPLICA_DATABASE_URL -> bind "replica").
+
+Rotas só de leitura declaram `@read_replica` (analytics, listagem, detalhe,
+worklist e export de clientes). Nelas, os SELECTs da sessão vão para o engine
+da réplica quando, na primeira leitura depois da autenticação:
+- o usuário não escreveu nos últimos REPLICA_STICKY_SECONDS (read-your-writes:
+  POST/PUT/PATCH/DELETE bem-sucedidos marcam o usuário na memória do worker e
+  devolvem o prazo no header X-Replica-Sticky-Until, que o cliente reenvia nas
+  próximas requisições para valer também em outro worker; o cookie i2s_rw faz
+  o mesmo para clientes do mesmo site — a SPA em outro domínio não o reenvia)
+- o atraso da réplica, medido com `pg_last_xact_replay_timestamp()` numa
+  thread do worker a cada REPLICA_LAG_CHECK_SECONDS, não passa de
+  REPLICA_MAX_LAG_SECONDS (réplica fora do ar ou ainda não medida conta como
+  atrasada)
+
+Caso contrário a requisição inteira lê do primário. A decisão vale para a
+requisição toda. Escritas, flush, SELECT ... FOR UPDATE, as consultas da
+autenticação e tudo fora de requisição (CLI, jobs, threads) sempre usam o
+primário; depois de um flush na requisição as leituras também voltam para ele.
+
+Sem REPLICA_DATABASE_URL nada muda: o decorator é só uma marcação.
+"""
+
+import threading
+import time
+
+from cachetools import TTLCache
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+
+BIND = "replica"
+COOKIE = "i2s_rw"
+STICKY_HEADER = "X-Replica-Sticky-Until"
+_WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+_LAG_SQL = text(
+    """
+    SELECT pg_is_in_recovery(),
+           CASE
+               WHEN NOT pg_is_in_recovery() THEN 0
+               WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+               ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+           END
+    """
+)
+
+_monitor = None
+
+
+def read_replica(fn):
+    """Marca a rota como só leitura: pode ler da réplica (ver regras no módulo)."""
+    # functools.wraps dos decorators de auth copia o __dict__, como em @query_budget
+    fn._read_replica = True
+    return fn
+
+
+class RoutingSession(Session):
+    """Sessão do Flask-SQLAlchemy que manda as leituras das rotas @read_replica para a réplica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not self.info.get("wrote") and _is_read(clause) and _use_replica():
+            return self._db.engines[BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _after_flush(session, flush_context):
+    session.info["wrote"] = True
+
+
+def _is_read(clause) -> bool:
+    if clause is None:
+        return False
+    if getattr(clause, "is_select", False):
+        return getattr(clause, "_for_update_arg", None) is None
+    if getattr(clause, "is_text", False):
+        sql = clause.text.lstrip().lower()
+        return sql.startswith("select") and " for update" not in sql and " for share" not in sql
+    return False
+
+
+class ReplicaMonitor:
+    """Atraso da réplica (medido em segundo plano, por worker) e contagem das decisões de roteamento."""
+
+    def __init__(self, app, engine):
+        cfg = app.config
+        self.app = app
+        self.engine = engine
+        self.max_lag = float(cfg.get("REPLICA_MAX_LAG_SECONDS", 5))
+        self.sticky = float(cfg.get("REPLICA_STICKY_SECONDS", 10))
+        self.interval = float(cfg.get("REPLICA_LAG_CHECK_SECONDS", 2))
+        self.recent_writes = TTLCache(maxsize=50_000, ttl=max(self.sticky, 0.001))
+        self.lag = None
+        self.error = None
+        self.checked_at = None
+        self.decisions = {"replica": 0, "sticky": 0, "lagging": 0}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def healthy(self) -> bool:
+        """Última medição; se velha, dispara outra numa thread (a requisição não espera o round trip)."""
+        stale = self.checked_at is None or time.monotonic() - self.checked_at >= self.interval
+        if stale:
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():  # após fork a thread não existe
+                    self._thread = threading.Thread(target=self.check, name="replica-lag", daemon=True)
+                    self._thread.start()
+        return self.lag is not None and self.lag <= self.max_lag
+
+    def check(self) -> None:
+        try:
+            with self.engine.connect() as conn:
+                _, lag = conn.execute(_LAG_SQL).one()
+            self.lag, self.error = (float(lag) if lag is not None else None), None
+        except Exception as e:
+            self.lag, self.error = None, str(e).splitlines()[0][:200]
+            self.app.logger.warning("[replica] checagem de atraso falhou: %s", self.error)
+        self.checked_at = time.monotonic()
+
+    def status(self) -> dict:
+        return {
+            "lagSeconds": self.lag,
+            "maxLagSeconds": self.max_lag,
+            "error": self.error,
+            "checkedSecondsAgo": round(time.monotonic() - self.checked_at, 3) if self.checked_at else None,
+            "stickySeconds": self.sticky,
+            "stickyUsers": len(self.recent_writes),
+            "decisions": dict(self.decisions),
+        }
+
+
+def _user_id():
+    return (g.get("jwt") or {}).get("sub")
+
+
+def _sticky(user_id) -> bool:
+    now = time.time()
+    until = _monitor.recent_writes.get(user_id) or 0.0
+    for value in (request.headers.get(STICKY_HEADER), request.cookies.get(COOKIE)):
+        try:
+            until = max(until, float(value or 0))
+        except ValueError:
+            pass
+    return until > now
+
+
+def _use_replica() -> bool:
+    if _monitor is None or not has_request_context():
+        return False
+    decided = g.get("_db_replica")
+    if decided is not None:
+        return decided
+    user_id = _user_id()
+    if user_id is None:
+        return False  # autenticação em andamento: lookup/provisionamento do usuário no primário
+    view = current_app.view_functions.get(request.endpoint)
+    if not getattr(view, "_read_replica", False):
+        g._db_replica = False
+        return False
+    if _sticky(user_id):
+        decision = "sticky"
+    elif not _monitor.healthy():
+        decision = "lagging"
+    else:
+        decision = "replica"
+    _monitor.decisions[decision] += 1
+    g._db_replica = decision == "replica"
+    return g._db_replica
+
+
+def _remember_write(response):
+    if request.method not in _WRITE_METHODS or response.status_code >= 400:
+        return response
+    user_id = _user_id()
+    if user_id is None or _monitor.sticky <= 0:
+        return response
+    until = time.time() + _monitor.sticky
+    _monitor.recent_writes[user_id] = until
+    response.headers[STICKY_HEADER] = f"{until:.3f}"
+    # atrás do proxy TLS (Render) o WSGI vê http: o esquema original vem no X-Forwarded-Proto
+    secure = request.is_secure or request.headers.get("X-Forwarded-Proto", "").split(",")[0].strip() == "https"
+    response.set_cookie(
+        COOKIE, f"{until:.3f}", max_age=int(_monitor.sticky) + 1, httponly=True,
+        secure=secure, samesite="None" if secure else "Lax",
+    )
+    return response
+
+
+def get_monitor():
+    return _monitor
+
+
+def init_app(app) -> None:
+    global _monitor
+    if BIND not in (app.config.get("SQLALCHEMY_BINDS") or {}):
+        return
+    from extensions import db
+
+    with app.app_context():
+        engine = db.engines[BIND]
+    _monitor = ReplicaMonitor(app, engine)
+    _monitor.healthy()  # primeira medição já em segundo plano
+    app.after_request(_remember_write)
+    app.logger.info("[replica] leituras das rotas @read_replica vão para a réplica")
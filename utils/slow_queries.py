@@ -0,0 +1,201 @@
+# utils/slow_queries.py
+"""
+Log de queries lentas com EXPLAIN automático.
+
+Statements do engine do app que passam de SLOW_QUERY_MS são registrados com:
+- SQL normalizado (literais e placeholders viram `?`, listas de IN colapsadas),
+  para agrupar a mesma query com filtros diferentes
+- formato dos parâmetros (tipo e tamanho; nunca os valores)
+- rota de origem (endpoint do Flask + método; "background" fora de requisição)
+- plano `EXPLAIN (FORMAT JSON)` capturado por uma thread própria, numa conexão
+  separada (NullPool, com statement_timeout), sem atrasar a requisição. Só
+  SELECT/WITH; o mesmo SQL normalizado é explicado no máximo uma vez a cada
+  SLOW_QUERY_EXPLAIN_TTL segundos
+
+Os registros ficam num buffer circular por worker (SLOW_QUERY_BUFFER), exposto
+em GET /api/v1/internal/slow-queries. SLOW_QUERY_MS=0 desliga.
+"""
+
+import itertools
+import queue
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from flask import has_request_context, request
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import NullPool
+
+from extensions import db
+
+_RE_STRING = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMBER = re.compile(r"(?<![\w.$])-?\d+(?:\.\d+)?\b")
+_RE_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_RE_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_RE_SPACE = re.compile(r"\s+")
+
+_recorder = None
+
+
+def normalize_sql(statement: str) -> str:
+    sql = _RE_STRING.sub("?", statement)
+    sql = _RE_PLACEHOLDER.sub("?", sql)
+    sql = _RE_NUMBER.sub("?", sql)
+    sql = _RE_IN_LIST.sub("(?, ...)", sql)
+    return _RE_SPACE.sub(" ", sql).strip()
+
+
+def _shape(value):
+    if value is None:
+        return "null"
+    if isinstance(value, (str, bytes)):
+        return f"{type(value).__name__}[{len(value)}]"
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def param_shapes(parameters, executemany: bool):
+    if executemany:
+        rows = list(parameters or ())
+        return {"rows": len(rows), "shape": param_shapes(rows[0], False) if rows else None}
+    if isinstance(parameters, dict):
+        return {k: _shape(v) for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_shape(v) for v in parameters]
+    return None
+
+
+class SlowQueryRecorder:
+    def __init__(self, app):
+        cfg = app.config
+        self.app = app
+        self.threshold = float(cfg.get("SLOW_QUERY_MS", 500)) / 1000
+        self.explain = bool(cfg.get("SLOW_QUERY_EXPLAIN", True))
+        self.explain_ttl = float(cfg.get("SLOW_QUERY_EXPLAIN_TTL", 300))
+        self.explain_timeout_ms = int(cfg.get("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", 5000))
+        self._entries = deque(maxlen=int(cfg.get("SLOW_QUERY_BUFFER", 200)))
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._explained: dict = {}  # sql normalizado -> (monotonic, plano)
+        self._queue: queue.Queue = queue.Queue(maxsize=32)
+        self._thread = None
+        self._engine = None
+
+    # -- hooks do engine --------------------------------------------------
+
+    def before_cursor(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._slowlog_t0 = time.perf_counter()
+
+    def after_cursor(self, conn, cursor, statement, parameters, context, executemany):
+        t0 = getattr(context, "_slowlog_t0", None)
+        if t0 is None:
+            return
+        elapsed = time.perf_counter() - t0
+        if elapsed >= self.threshold:
+            self.record(statement, parameters, executemany, elapsed)
+
+    # -- registro ---------------------------------------------------------
+
+    def record(self, statement, parameters, executemany, elapsed):
+        sql = normalize_sql(statement)
+        if has_request_context():
+            route = {"endpoint": request.endpoint or "unmatched", "method": request.method}
+        else:
+            route = {"endpoint": "background", "method": None}
+        entry = {
+            "id": next(self._ids),
+            "at": datetime.now(timezone.utc).isoformat(),
+            "durationMs": round(elapsed * 1000, 1),
+            "sql": sql,
+            "params": param_shapes(parameters, executemany),
+            "route": route,
+            "explain": None,
+            "explainStatus": "skipped",
+        }
+        if self.explain and not executemany and sql.split(" ", 1)[0].upper() in ("SELECT", "WITH"):
+            entry["explainStatus"] = "pending"
+            self._schedule_explain(entry, statement, parameters)
+        with self._lock:
+            self._entries.append(entry)
+        self.app.logger.warning(
+            "[slow-query] %sms %s %s sql=%s params=%s",
+            entry["durationMs"], route["method"] or "-", route["endpoint"], sql[:500], entry["params"],
+        )
+
+    def entries(self, limit: int, with_plan: bool = True):
+        with self._lock:
+            items = list(self._entries)[-limit:][::-1]
+            if not with_plan:
+                return [{k: v for k, v in e.items() if k != "explain"} for e in items]
+            return [dict(e) for e in items]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    # -- EXPLAIN assíncrono -----------------------------------------------
+
+    def _schedule_explain(self, entry, statement, parameters):
+        with self._lock:
+            cached = self._explained.get(entry["sql"])
+        if cached and time.monotonic() - cached[0] < self.explain_ttl:
+            entry.update(explain=cached[1], explainStatus="cached")
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():  # após fork a thread não existe
+                self._thread = threading.Thread(target=self._explain_loop, name="slow-query-explain", daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait((entry, statement, parameters))
+        except queue.Full:
+            entry["explainStatus"] = "dropped"
+
+    def _explain_engine(self):
+        if self._engine is None:
+            self._engine = create_engine(
+                self.app.config["SQLALCHEMY_DATABASE_URI"],
+                poolclass=NullPool,  # o timeout vai por SET LOCAL: o pooler em modo transaction recusa `options`
+            )
+            from utils import db_engine
+            db_engine.install(self._engine, int(self.app.config.get("DB_DNS_CACHE_TTL", 300)))
+        return self._engine
+
+    def _explain_loop(self):
+        while True:
+            entry, statement, parameters = self._queue.get()
+            try:
+                with self._explain_engine().connect() as conn:
+                    conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(self.explain_timeout_ms)}")
+                    sql = "EXPLAIN (FORMAT JSON) " + statement
+                    result = conn.exec_driver_sql(sql, parameters) if parameters else conn.exec_driver_sql(sql)
+                    plan = result.scalar()
+                    conn.rollback()
+                now = time.monotonic()
+                with self._lock:
+                    if len(self._explained) >= 256:
+                        self._explained = {k: v for k, v in self._explained.items() if now - v[0] < self.explain_ttl}
+                    self._explained[entry["sql"]] = (now, plan)
+                status = "done"
+            except Exception as e:
+                plan, status = None, f"error: {str(e).splitlines()[0][:200]}"
+            with self._lock:
+                entry.update(explain=plan, explainStatus=status)
+
+
+def get_recorder():
+    return _recorder
+
+
+def init_app(app) -> None:
+    global _recorder
+    if float(app.config.get("SLOW_QUERY_MS", 0) or 0) <= 0:
+        return
+    _recorder = SlowQueryRecorder(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, "before_cursor_execute", _recorder.before_cursor)
+            event.listen(engine, "after_cursor_execute", _recorder.after_cursor)
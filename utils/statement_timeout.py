@@ -0,0 +1,209 @@
+# utils/statement_timeout.py
+"""
+Tempo máximo de banco por rota e cancelamento de queries.
+
+- timeout: cada transação aberta numa requisição recebe
+  `SET LOCAL statement_timeout` com o limite da rota, declarado com
+  `@statement_timeout(ms)` (sem o decorator vale STATEMENT_TIMEOUT_MS). O SET
+  vai direto no cursor do driver: não conta no orçamento de queries nem nas
+  métricas de statements. Vale também para as transações na réplica de
+  leitura e no modo transaction do pooler (SET LOCAL morre com a transação)
+- desconexão: enquanto uma query da requisição roda há mais de
+  STATEMENT_CANCEL_POLL_SECONDS, uma thread do worker olha o socket do cliente;
+  se ele fechou (navegador cancelou, proxy desistiu), a query é cancelada com
+  `connection.cancel()` do psycopg2 em vez de segurar a thread e a conexão até
+  o fim
+- resposta: query cancelada por timeout vira 504 JSON; por desconexão, 499
+  (ninguém lê, mas o log e as métricas mostram o motivo). Pool esgotado
+  (DB_POOL_TIMEOUT) vira 503 com Retry-After em vez de 500
+
+Cada cancelamento entra em `i2sales_db_query_cancellations{endpoint,reason}`
+(reason = statement_timeout | client_disconnect), inclusive quando a rota
+captura a exceção por conta própria.
+
+Fora de requisição (CLI, jobs, threads) nada muda. STATEMENT_TIMEOUT_MS=0
+desliga o SET LOCAL em todas as rotas; STATEMENT_CANCEL_ON_DISCONNECT=0 desliga
+o cancelamento por desconexão.
+"""
+
+import select
+import socket
+import threading
+import time
+
+from flask import Response, current_app, g, has_request_context, jsonify, request
+from sqlalchemy import event, exc
+
+from extensions import db
+from utils import metrics
+
+QUERY_CANCELED = "57014"  # SQLSTATE de statement_timeout e de pg_cancel_backend/PQcancel
+
+_lock = threading.Lock()
+_running: dict = {}  # thread -> _Running (só queries de requisição)
+_watchdog = None
+_poll_seconds = 0.5
+_logger = None  # app.logger (a thread do watchdog roda fora do contexto do app)
+
+
+def statement_timeout(ms: int):
+    """Limite (ms) de cada statement da rota; 0 = sem limite."""
+
+    def decorator(fn):
+        # functools.wraps dos decorators de auth copia o __dict__, como em @query_budget
+        fn._statement_timeout_ms = int(ms)
+        return fn
+
+    return decorator
+
+
+def route_timeout_ms() -> int:
+    """Limite da requisição corrente (calculado uma vez por requisição)."""
+    ms = g.get("_statement_timeout_ms")
+    if ms is None:
+        view = current_app.view_functions.get(request.endpoint) if request.endpoint else None
+        ms = getattr(view, "_statement_timeout_ms", None)
+        if ms is None:
+            ms = int(current_app.config.get("STATEMENT_TIMEOUT_MS", 0))
+        g._statement_timeout_ms = ms
+    return ms
+
+
+class _Running:
+    __slots__ = ("conn", "sock", "started", "reason")
+
+    def __init__(self, conn, sock):
+        self.conn = conn
+        self.sock = sock
+        self.started = time.monotonic()
+        self.reason = None
+
+
+def _after_begin(session, transaction, connection):
+    if not has_request_context() or not current_app.config.get("STATEMENT_TIMEOUT_MS"):
+        return
+    ms = route_timeout_ms()
+    if ms <= 0:
+        return
+    cursor = connection.connection.cursor()  # cursor do driver: sem eventos do engine
+    try:
+        cursor.execute(f"SET LOCAL statement_timeout = {int(ms)}")
+    finally:
+        cursor.close()
+
+
+def _client_socket():
+    sock = g.get("_client_socket", False)
+    if sock is False:
+        env = request.environ
+        sock = g._client_socket = env.get("gunicorn.socket") or env.get("werkzeug.socket")
+    return sock
+
+
+def _before_cursor(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context():
+        return
+    sock = _client_socket()
+    if sock is None:
+        return
+    entry = g._db_running = _Running(conn.connection.driver_connection, sock)
+    with _lock:
+        _running[threading.get_ident()] = entry
+    _ensure_watchdog()
+
+
+def _done(*_args, **_kwargs):
+    if _running:
+        with _lock:
+            _running.pop(threading.get_ident(), None)
+
+
+def _handle_error(context):
+    _done()
+    orig = context.original_exception
+    if getattr(orig, "pgcode", None) != QUERY_CANCELED or not has_request_context():
+        return
+    entry = g.get("_db_running")
+    reason = entry.reason if entry is not None and entry.reason else "statement_timeout"
+    g._db_cancel_reason = reason
+    metrics.observe_cancel(request.endpoint, reason)
+
+
+def _closed(sock) -> bool:
+    """Cliente fechou a conexão? (EOF no socket; dados de keep-alive não contam)."""
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+        if not readable:
+            return False
+        return sock.recv(1, socket.MSG_PEEK) == b""
+    except (OSError, ValueError):  # socket já fechado / fd fora do FD_SETSIZE
+        return False
+
+
+def _watch():
+    while True:
+        time.sleep(_poll_seconds)
+        now = time.monotonic()
+        for ident, entry in list(_running.items()):
+            if entry.reason or now - entry.started < _poll_seconds or not _closed(entry.sock):
+                continue
+            with _lock:
+                if _running.get(ident) is not entry:
+                    continue  # a query terminou enquanto olhávamos o socket
+                entry.reason = "client_disconnect"
+                try:
+                    entry.conn.cancel()
+                except Exception as e:  # conexão já fechada
+                    entry.reason = None
+                    _logger.warning("[statement-timeout] cancel falhou: %s", e)
+
+
+def _ensure_watchdog():
+    global _watchdog
+    if _watchdog is not None and _watchdog.is_alive():
+        return
+    with _lock:
+        if _watchdog is None or not _watchdog.is_alive():  # após fork a thread não existe
+            _watchdog = threading.Thread(target=_watch, name="db-cancel-watchdog", daemon=True)
+            _watchdog.start()
+
+
+def should_propagate(e: Exception) -> bool:
+    """Erros que viram 503/504 nos handlers daqui: quem captura Exception deve relançar."""
+    if isinstance(e, exc.TimeoutError):
+        return True
+    return isinstance(e, exc.OperationalError) and getattr(e.orig, "pgcode", None) == QUERY_CANCELED
+
+
+def _canceled(e):
+    if getattr(e.orig, "pgcode", None) != QUERY_CANCELED:
+        raise e
+    if g.get("_db_cancel_reason") == "client_disconnect":
+        current_app.logger.info("[statement-timeout] %s %s: cliente desconectou, query cancelada", request.method, request.path)
+        return Response(status=499)
+    ms = route_timeout_ms()
+    current_app.logger.warning("[statement-timeout] %s %s: query passou de %s ms", request.method, request.path, ms)
+    return jsonify({"error": "A consulta excedeu o tempo limite.", "timeoutMs": ms}), 504
+
+
+def _pool_exhausted(e):
+    current_app.logger.warning("[statement-timeout] %s %s: pool de conexões esgotado", request.method, request.path)
+    response = jsonify({"error": "Serviço sobrecarregado, tente novamente."})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
+def init_app(app) -> None:
+    global _poll_seconds, _logger
+    _logger = app.logger
+    _poll_seconds = max(0.05, float(app.config.get("STATEMENT_CANCEL_POLL_SECONDS", 0.5)))
+    if not event.contains(db.session, "after_begin", _after_begin):
+        event.listen(db.session, "after_begin", _after_begin)
+    with app.app_context():
+        for engine in db.engines.values():
+            if app.config.get("STATEMENT_CANCEL_ON_DISCONNECT"):
+                event.listen(engine, "before_cursor_execute", _before_cursor)
+                event.listen(engine, "after_cursor_execute", _done)
+            event.listen(engine, "handle_error", _handle_error)
+    app.register_error_handler(exc.OperationalError, _canceled)
+    app.register_error_handler(exc.TimeoutError, _pool_exhausted)
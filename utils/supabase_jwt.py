@@ -7,8 +7,6 @@ import logging
 from functools import wraps
 from typing import Any, Dict, Optional, Tuple
 
-import httpx
-import jwt as pyjwt
 from cachetools import TTLCache
 from flask import current_app, g, request
 
@@ -43,6 +41,8 @@ def _fetch_jwks() -> Dict[str, Any]:
     url = _jwks_url()
     if url in _jwks_cache:
         return _jwks_cache[url]
+    import httpx  # import pesado (~250 ms): só quando o JWKS é buscado
+
     with httpx.Client(timeout=5.0) as c:
         r = c.get(url)
         r.raise_for_status()
@@ -53,6 +53,11 @@ def _fetch_jwks() -> Dict[str, Any]:
         return data
 
 
+def prefetch_jwks() -> None:
+    """Load the JWKS into the cache ahead of the first RS256 token (worker warm-up)."""
+    _fetch_jwks()
+
+
 def _b64url_decode(data: str) -> bytes:
     pad = '=' * (-len(data) % 4)
     return base64.urlsafe_b64decode(data + pad)
@@ -66,6 +71,8 @@ def _select_key(jwks: Dict[str, Any], kid: str) -> Optional[Dict[str, Any]]:
 
 
 def _public_key_from_jwk(jwk: Dict[str, Any]):
+    import jwt as pyjwt
+
     # PyJWT understands JWKs directly from from_jwk
     return pyjwt.algorithms.RSAAlgorithm.from_jwk(json.dumps(jwk))
 
@@ -89,6 +96,8 @@ def verify_supabase_jwt(bearer_token: str) -> Dict[str, Any]:
 
     Raises JwtValidationError on failure.
     """
+    import jwt as pyjwt  # carrega cryptography; adiado até o primeiro token
+
     token = bearer_token.strip()
     if token.lower().startswith("bearer "):
         token = token.split(" ", 1)[1].strip()
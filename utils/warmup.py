@@ -0,0 +1,134 @@
+# utils/warmup.py
+"""
+Warm-up por worker, antes de receber tráfego.
+
+Os módulos registram passos com `@register(nome)`; `run(app)` executa todos em
+ordem, mede cada um e guarda o estado do processo para o /api/v1/ready.
+Passos padrão (registrados aqui): abrir `pool_size` conexões, configurar os
+mappers e pré-carregar o JWKS. Os blueprints registram as consultas quentes
+(executadas com um id inexistente: compilam e entram no cache de statements do
+SQLAlchemy sem devolver linhas).
+
+WARMUP_MODE:
+- off:        nada roda; o worker é considerado pronto de cara
+- hook:       roda síncrono no post_worker_init do gunicorn (gunicorn.conf.py),
+              antes do worker aceitar conexões
+- background: roda numa thread ao criar o app (servidor de dev); /ready fica
+              503 até terminar
+"""
+
+import os
+import threading
+import time
+import uuid
+
+from flask import current_app
+
+from extensions import db
+
+NIL_ID = uuid.UUID(int=0)
+
+_steps: list = []
+_lock = threading.Lock()
+_state = {"status": "pending", "pid": None, "totalMs": None, "steps": {}}
+
+
+def register(name: str):
+    """Decorator: adiciona `fn()` (chamada dentro do app context) ao warm-up."""
+
+    def decorator(fn):
+        if not any(n == name for n, _ in _steps):
+            _steps.append((name, fn))
+        return fn
+
+    return decorator
+
+
+def mode(app) -> str:
+    value = (app.config.get("WARMUP_MODE") or "off").strip().lower()
+    return value if value in ("off", "hook", "background") else "off"
+
+
+def state() -> dict:
+    with _lock:
+        return {**_state, "steps": dict(_state["steps"])}
+
+
+def is_ready(app) -> bool:
+    if mode(app) == "off":
+        return True
+    with _lock:
+        # depois de um fork o estado herdado do master não vale para este worker
+        return _state["status"] in ("done", "failed") and _state["pid"] == os.getpid()
+
+
+def run(app) -> dict:
+    """Executa os passos; falha de um passo é registrada e não impede os demais."""
+    with _lock:
+        _state.update(status="running", pid=os.getpid(), totalMs=None, steps={})
+    started = time.perf_counter()
+    failed = False
+    with app.app_context():
+        for name, fn in list(_steps):
+            t0 = time.perf_counter()
+            try:
+                fn()
+                result = {"ms": round((time.perf_counter() - t0) * 1000, 1)}
+            except Exception as e:
+                db.session.rollback()
+                failed = True
+                result = {"ms": round((time.perf_counter() - t0) * 1000, 1), "error": str(e)}
+            with _lock:
+                _state["steps"][name] = result
+        db.session.remove()
+    total = round((time.perf_counter() - started) * 1000, 1)
+    with _lock:
+        # "failed" ainda libera o /ready: o worker atende, só sem parte do aquecimento
+        _state.update(status="failed" if failed else "done", totalMs=total)
+    app.logger.info(
+        "[warmup] pid=%s total=%sms %s", os.getpid(), total,
+        " ".join(f"{n}={s['ms']}ms{'(erro)' if 'error' in s else ''}" for n, s in state()["steps"].items()),
+    )
+    return state()
+
+
+def init_app(app) -> None:
+    if mode(app) == "background":
+        threading.Thread(target=run, args=(app,), name="warmup", daemon=True).start()
+
+
+# ---------------------------------------------------------------------------
+# Passos padrão
+# ---------------------------------------------------------------------------
+
+@register("pool")
+def _open_pool():
+    """Abre pool_size conexões ao mesmo tempo (handshake TCP/SSL fora do caminho da requisição)."""
+    from sqlalchemy.pool import QueuePool
+
+    engine = db.engine
+    if not isinstance(engine.pool, QueuePool):
+        return  # DB_POOL_MODE=transaction: não há pool local para aquecer
+    size = engine.pool.size()
+    conns = []
+    try:
+        for _ in range(size):
+            conns.append(engine.connect())
+    finally:
+        for c in conns:
+            c.close()
+
+
+@register("mappers")
+def _configure_mappers():
+    from sqlalchemy.orm import configure_mappers
+    configure_mappers()
+
+
+@register("jwks")
+def _prefetch_jwks():
+    # só faz sentido com Supabase real e tokens RS256; também paga o import de httpx/PyJWT
+    import jwt  # noqa: F401
+    if current_app.config.get("WARMUP_JWKS", True) and current_app.config.get("SUPABASE_URL"):
+        from utils.supabase_jwt import prefetch_jwks
+        prefetch_jwks()